@@ -0,0 +1,201 @@
+"""
+TEFAS BES Fon Analizi — Fon Yöneticisi Strateji Değişikliği Tespiti
+Toplu varlık dağılımı geçmişi ({tarih: {fon: {varlık: yüzde}}}) tarih × fon ×
+varlık matrisine çevrilir; varlık adları ve fon kodları bir kez satır/sütun
+numarasına eşlenir. Her yeni anlık görüntü gününde tüm fonların dağılımı,
+önceki `window_days` gündeki dağılımlarının ortalamasıyla tek vektörel geçişte
+karşılaştırılır: L1 (el değiştiren yüzde puan) veya cosine (1 - benzerlik).
+Eşiği aşan fonlar işaretlenir; eşiğin ilk aşıldığı gün (başlangıç) tarih
+sırasıyla saklanır, böylece "bu hafta strateji değiştiren fonlar" yalnızca
+son satırlara bakılarak listelenir. Geçmiş uzadığında yalnızca yeni günler
+hesaplanır. GUI'den bağımsızdır.
+"""
+import threading
+
+import numpy as np
+
+METRIC_L1 = "l1"
+METRIC_COSINE = "cosine"
+
+
+class AllocationDrift:
+    """Tarih × fon dağılım değişimi ve strateji değişikliği başlangıçları."""
+
+    def __init__(self, metric=METRIC_L1, threshold=15.0, window_days=28):
+        """
+        Args:
+            metric: METRIC_L1 (eşik yüzde puan) veya METRIC_COSINE (eşik 0-1)
+            threshold: Bu değeri aşan uzaklık strateji değişikliği sayılır
+            window_days: Karşılaştırılan önceki dönem (takvim günü)
+        """
+        if metric not in (METRIC_L1, METRIC_COSINE):
+            raise ValueError(f"Bilinmeyen uzaklık ölçüsü: {metric}")
+        self.metric = metric
+        self.threshold = threshold
+        self.window_days = window_days
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.assets = []                 # Sütun → varlık adı
+        self._asset_index = {}
+        self.codes = []                  # Satır → fon kodu
+        self._index = {}
+        self.dates = np.array([], dtype='datetime64[D]')
+        self.matrix = np.zeros((0, 0, 0), dtype=np.float32)   # (D × N × A) yüzde, toplam 100
+        self.present = np.zeros((0, 0), dtype=bool)           # (D × N) o gün dağılımı var
+        self.distance = np.zeros((0, 0), dtype=np.float32)    # (D × N) NaN = karşılaştırma yok
+        self.flags = np.zeros((0, 0), dtype=bool)             # (D × N) eşik aşıldı
+        self.onsets = np.zeros((0, 0), dtype=bool)            # (D × N) eşik ilk kez aşıldı
+
+    def __len__(self):
+        return len(self.dates)
+
+    # ── Güncelleme ────────────────────────────────
+
+    def update(self, history):
+        """Dağılım geçmişiyle eşitle; hesaplanan gün sayısını döndür.
+
+        Kayıtlı günler geçmişin önekiyse yalnızca son kayıtlı gün (yeniden
+        çekilmiş olabilir) ve sonrası hesaplanır; aksi halde baştan hesaplanır.
+        Geçmişin başından düşen günler atılır.
+        """
+        days = sorted(day for day, funds in history.items() if funds)
+        if not days:
+            return 0
+        day_arr = np.array(days, dtype='datetime64[D]')
+        with self._lock:
+            start = int(np.searchsorted(self.dates, day_arr[0]))
+            kept = self.dates[start:-1] if len(self.dates) else self.dates
+            if len(kept) and (len(kept) >= len(day_arr)
+                              or not np.array_equal(kept, day_arr[:len(kept)])):
+                self._reset()
+                start, kept = 0, self.dates
+            end = start + len(kept)
+            for name in ("dates", "matrix", "present", "distance", "flags", "onsets"):
+                setattr(self, name, getattr(self, name)[start:end])
+
+            new_days = days[len(kept):]
+            self._append(new_days, [history[day] for day in new_days])
+            for t in range(len(kept), len(self.dates)):
+                self._score_day(t)
+            return len(new_days)
+
+    def _append(self, days, snapshots):
+        """Yeni günlerin dağılımlarını matrise ekle (yeni fon/varlıklar için büyütülür)."""
+        for funds in snapshots:
+            for code, assets in funds.items():
+                if code not in self._index:
+                    self._index[code] = len(self.codes)
+                    self.codes.append(code)
+                for name in assets:
+                    if name not in self._asset_index:
+                        self._asset_index[name] = len(self.assets)
+                        self.assets.append(name)
+
+        n_days, n_funds, n_assets = len(days), len(self.codes), len(self.assets)
+        d0, n0, a0 = self.matrix.shape
+        matrix = np.zeros((d0 + n_days, n_funds, n_assets), dtype=np.float32)
+        matrix[:d0, :n0, :a0] = self.matrix
+        present = np.zeros((d0 + n_days, n_funds), dtype=bool)
+        present[:d0, :n0] = self.present
+
+        for t, funds in enumerate(snapshots, d0):
+            for code, assets in funds.items():
+                i = self._index[code]
+                total = sum(pct for pct in assets.values() if pct > 0)
+                if total <= 0:
+                    continue
+                for name, pct in assets.items():
+                    if pct > 0:
+                        matrix[t, i, self._asset_index[name]] = pct * 100.0 / total
+                present[t, i] = True
+
+        def _grow(values, fill):
+            out = np.full((d0 + n_days, n_funds), fill, dtype=values.dtype)
+            out[:d0, :n0] = values
+            return out
+
+        self.matrix, self.present = matrix, present
+        self.distance = _grow(self.distance, np.nan)
+        self.flags = _grow(self.flags, False)
+        self.onsets = _grow(self.onsets, False)
+        self.dates = np.concatenate([self.dates, np.array(days, dtype='datetime64[D]')])
+
+    def _baseline(self, t):
+        """t gününden önceki pencerenin ortalama dağılımı (N × A) ve gün sayısı (N,)."""
+        lo = int(np.searchsorted(self.dates, self.dates[t] - np.timedelta64(self.window_days, 'D')))
+        count = self.present[lo:t].sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            base = self.matrix[lo:t].sum(axis=0) / count[:, None]
+        return base, count
+
+    def _score_day(self, t):
+        """t gününün tüm fonlar için uzaklığı, işareti ve başlangıcı (tek geçiş)."""
+        base, count = self._baseline(t)
+        current = self.matrix[t]
+        valid = self.present[t] & (count > 0)
+        if self.metric == METRIC_L1:
+            dist = np.abs(current - base).sum(axis=1) / 2.0
+        else:
+            norms = np.linalg.norm(current, axis=1) * np.linalg.norm(base, axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                dist = 1.0 - (current * base).sum(axis=1) / norms
+        self.distance[t] = np.where(valid, dist, np.nan)
+        self.flags[t] = valid & (dist > self.threshold)
+        previous = self.flags[t - 1] if t > 0 else False
+        self.onsets[t] = self.flags[t] & ~previous
+
+    # ── Sorgular ──────────────────────────────────
+
+    def changed_since(self, day):
+        """`day` (ISO veya datetime64) ve sonrasında strateji değiştiren fonlar.
+
+        Returns:
+            [(fon_kodu, başlangıç ISO, en yüksek uzaklık, hâlâ işaretli mi)],
+            uzaklığa göre büyükten küçüğe
+        """
+        with self._lock:
+            lo = int(np.searchsorted(self.dates, np.datetime64(day, 'D')))
+            onsets = self.onsets[lo:]
+            rows = np.flatnonzero(onsets.any(axis=0))
+            if not len(rows):
+                return []
+            # Her fonun penceredeki son başlangıcı ve o günden sonraki en yüksek uzaklık
+            last = len(onsets) - 1 - onsets[::-1, rows].argmax(axis=0)
+            window = self.distance[lo:, rows]
+            after = np.arange(len(onsets))[:, None] >= last[None, :]
+            peak = np.nanmax(np.where(after, window, np.nan), axis=0)
+            still = self.flags[-1, rows]
+            found = [(self.codes[i], str(self.dates[lo + s]), float(p), bool(f))
+                     for i, s, p, f in zip(rows, last, peak, still)]
+        return sorted(found, key=lambda x: -x[2])
+
+    def recent(self, days=7):
+        """Son kayıtlı günden geriye `days` takvim gününde strateji değiştiren fonlar."""
+        if not len(self.dates):
+            return []
+        return self.changed_since(self.dates[-1] - np.timedelta64(days - 1, 'D'))
+
+    def shift(self, code, day=None, top=3):
+        """Fonun `day` (varsayılan son gün) dağılımının önceki döneme göre farkı.
+
+        Returns:
+            (artanlar, azalanlar) — [(varlık, yüzde puan)], büyükten küçüğe; veri yoksa ([], [])
+        """
+        with self._lock:
+            i = self._index.get(code)
+            if i is None or not len(self.dates):
+                return [], []
+            t = len(self.dates) - 1 if day is None else \
+                int(np.searchsorted(self.dates, np.datetime64(day, 'D'), side='right')) - 1
+            if t < 0 or not self.present[t, i]:
+                return [], []
+            base, count = self._baseline(t)
+            if not count[i]:
+                return [], []
+            delta = self.matrix[t, i] - base[i]
+        order = np.argsort(delta)
+        gains = [(self.assets[a], float(delta[a])) for a in order[::-1][:top] if delta[a] > 0.5]
+        losses = [(self.assets[a], float(delta[a])) for a in order[:top] if delta[a] < -0.5]
+        return gains, losses
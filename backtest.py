@@ -0,0 +1,284 @@
+"""
+TEFAS BES Fon Analizi — Strateji Backtest Motoru
+Geçmiş anlık görüntüleri (NavStore fiyatları, varlık dağılımı geçmişi,
+makro kapanışlar) ay sonları boyunca yeniden oynatır. Her ay sonunda
+StrategyEngine sıralaması (calculate_composite_vector — calculate_all_forecasts
+ile aynı kurallar) tüm fonlar için tek seferde hesaplanır, en iyi N fon
+tutulur, yıllık BES değişiklik hakkı aşılmaz ve gerçekleşen aylık getiriler
+raporlanır. Parametre setleri süreç havuzunda paralel koşar.
+GUI'den bağımsızdır.
+"""
+import bisect
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from risk_metrics import (TRADING_DAYS_PER_MONTH, TRADING_DAYS_PER_YEAR,
+                          daily_returns, prefix_sums, window_metrics)
+from regime_history import RegimeHistory
+from strategy_engine import StrategyEngine
+
+ALLOCATION_CURRENT = "güncel"   # Adım tarihinden önce dağılım geçmişi yoksa
+
+
+def macro_snapshot(history, day):
+    """{ad: ([tarih], [kapanış])} geçmişinden `day` gününe kadarki makro verisi.
+
+    load_macro_data ile aynı biçim: daily = son iki kapanış, monthly = 22 kapanış öncesi.
+    """
+    snapshot = {}
+    for name, (dates, closes) in history.items():
+        i = bisect.bisect_right(dates, day)
+        if i < 2:
+            continue
+        current, prev = closes[i - 1], closes[i - 2]
+        monthly = (current - closes[i - 22]) / closes[i - 22] * 100 if i >= 22 else None
+        snapshot[name] = {
+            "price": current,
+            "daily": (current - prev) / prev * 100,
+            "monthly": monthly,
+            "quarterly": None,
+        }
+    return snapshot
+
+
+class BacktestData:
+    """Parametreden bağımsız, ay sonu adımlarına göre önceden hesaplanmış girdiler.
+
+    K adım × N fon; adım k'da seçilen portföy k → k+1 arasında tutulur.
+    """
+
+    def __init__(self, codes, step_dates, period_returns, asset_groups, risk_totals,
+                 regimes, growth, eligible, allocation_asof):
+        self.codes = codes
+        self.step_dates = step_dates          # [ISO tarih] (K)
+        self.period_returns = period_returns  # (K × N × 6) %, 0 = veri yok
+        self.asset_groups = asset_groups      # (K × N × 6) varlık sınıfı %
+        self.risk_totals = risk_totals        # (K × N) fiyat geçmişinden risk skoru / NaN
+        self.regimes = regimes                # [rejim] (K)
+        self.growth = growth                  # ((K-1) × N) adım arası fiyat oranı
+        self.eligible = eligible              # (K × N) fiyatı ve 1 aylık getirisi olan fonlar
+        self.allocation_asof = allocation_asof  # [dağılım anlık görüntüsü tarihi] (K)
+
+    @classmethod
+    def build(cls, dates, codes, prices, periods, allocation_history=None,
+              allocation_cache=None, macro_history=None, warmup_days=TRADING_DAYS_PER_YEAR,
+              engine=None, regime_history=None):
+        """NavStore.price_matrix çıktısından ay sonu anlık görüntülerini üret.
+
+        Args:
+            dates, codes, prices: NavStore.price_matrix (ileri doldurulmuş)
+            periods: Config.PORTFOLIO_PERIODS (PERFORMANCE_COLUMNS sırası)
+            allocation_history: {tarih: {fon_kodu: {varlık: yüzde}}} (opsiyonel)
+            allocation_cache: Güncel dağılımlar; geçmişte olmayan fonlar için
+                kullanılır (ileriye bakma payı — allocation_asof'ta işaretli)
+            macro_history: DataFetcher.fetch_macro_history çıktısı (yoksa nötr rejim)
+            warmup_days: İlk adımdan önce gereken işlem günü
+            regime_history: Hazır RegimeHistory (opsiyonel; yoksa macro_history'den kurulur)
+        """
+        engine = engine or StrategyEngine()
+        dates = np.asarray(dates, dtype='datetime64[D]')
+        prices = np.asarray(prices, dtype=np.float64)
+        months = dates.astype('datetime64[M]')
+        month_end = np.flatnonzero(np.append(months[1:] != months[:-1], True))
+        steps = month_end[month_end >= warmup_days]
+        if len(steps) < 2:
+            raise ValueError("Backtest için fiyat geçmişi yetersiz "
+                             f"(en az {warmup_days} işlem günü + 1 ay gerekli).")
+        n_steps, n_funds = len(steps), prices.shape[1]
+        step_dates = [str(d) for d in dates[steps]]
+
+        # Dönem getirileri: ay = 21 işlem günü (risk_metrics ile aynı)
+        period_returns = np.zeros((n_steps, n_funds, len(periods)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j, (_, _, period_months) in enumerate(periods):
+                lookback = period_months * TRADING_DAYS_PER_MONTH
+                ok = steps >= lookback
+                ret = (prices[steps[ok]] / prices[steps[ok] - lookback] - 1) * 100
+                period_returns[ok, :, j] = np.nan_to_num(ret, nan=0.0, posinf=0.0, neginf=0.0)
+
+        # Fiyat geçmişinden risk-getiri: RISK_WINDOW_PREFERENCE sırasıyla ilk geçerli pencere
+        months_of = {label: m for _, label, m in periods}
+        windows = [months_of[label] * TRADING_DAYS_PER_MONTH
+                   for label in engine.RISK_WINDOW_PREFERENCE if label in months_of]
+        ps = prefix_sums(daily_returns(prices))
+        risk_totals = np.full((n_steps, n_funds), np.nan)
+        for k, t in enumerate(steps):
+            for window in windows:
+                if window > t:
+                    continue
+                metrics = window_metrics(ps, window, end=t)
+                with np.errstate(invalid='ignore'):
+                    total = engine.history_risk_totals(metrics["sharpe"], metrics["max_drawdown"])
+                fill = (np.isnan(risk_totals[k]) & ~np.isnan(metrics["volatility"])
+                        & np.isfinite(total))
+                risk_totals[k, fill] = total[fill]
+
+        # Varlık dağılımları: adım gününe kadarki son anlık görüntü
+        snapshots = sorted(allocation_history or {})
+        allocation_cache = allocation_cache or {}
+        group_names = list(engine.ASSET_CLASS_KEYWORDS)
+        asset_groups = np.zeros((n_steps, n_funds, len(group_names)))
+        allocation_asof = []
+        by_snapshot = {}
+        for k, day in enumerate(step_dates):
+            i = bisect.bisect_right(snapshots, day) - 1
+            asof = snapshots[i] if i >= 0 else ALLOCATION_CURRENT
+            if asof not in by_snapshot:
+                merged = dict(allocation_cache)
+                if asof != ALLOCATION_CURRENT:
+                    merged.update(allocation_history[asof])
+                matrix = np.zeros((n_funds, len(group_names)))
+                for col, code in enumerate(codes):
+                    allocation = merged.get(code)
+                    if allocation:
+                        groups = engine.classify_assets(allocation)
+                        matrix[col] = [groups[g] for g in group_names]
+                by_snapshot[asof] = matrix
+            asset_groups[k] = by_snapshot[asof]
+            allocation_asof.append(asof)
+
+        # Rejim: o güne kadarki makro kapanışlardan (günlük zaman çizelgesi)
+        if regime_history is None and macro_history:
+            regime_history = RegimeHistory()
+            regime_history.update(macro_history)
+        if regime_history is not None and len(regime_history):
+            regimes = regime_history.regimes_at(step_dates)
+        else:
+            regimes = [engine.REGIME_NEUTRAL] * n_steps
+
+        step_prices = prices[steps]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = step_prices[1:] / step_prices[:-1]
+        eligible = np.isfinite(step_prices) & (period_returns[:, :, 0] != 0)
+
+        return cls(list(codes), step_dates, period_returns, asset_groups, risk_totals,
+                   regimes, growth, eligible, allocation_asof)
+
+
+def summarize(monthly_returns):
+    """Aylık getiri serisinden özet: toplam, yıllık, volatilite, maks. düşüş, Sharpe (kesir)."""
+    r = np.asarray(monthly_returns, dtype=np.float64)
+    if not len(r):
+        return {"total_return": 0.0, "annual_return": 0.0, "volatility": 0.0,
+                "max_drawdown": 0.0, "sharpe": 0.0, "months": 0}
+    wealth = np.concatenate(([1.0], np.cumprod(1 + r)))
+    std = r.std(ddof=1) if len(r) > 1 else 0.0
+    return {
+        "total_return": float(wealth[-1] - 1),
+        "annual_return": float(wealth[-1] ** (12 / len(r)) - 1),
+        "volatility": float(std * np.sqrt(12)),
+        "max_drawdown": float(-(wealth / np.maximum.accumulate(wealth) - 1).min()),
+        "sharpe": float(r.mean() / std * np.sqrt(12)) if std > 0 else 0.0,
+        "months": len(r),
+    }
+
+
+class BacktestResult:
+    """Tek parametre setinin aylık sonuçları."""
+
+    def __init__(self, params, dates, returns, benchmark, holdings, switches):
+        self.params = params
+        self.dates = dates            # Her ayın başlangıç tarihi
+        self.returns = returns        # Portföy aylık getirisi (kesir)
+        self.benchmark = benchmark    # Tüm uygun fonlar, eşit ağırlık
+        self.holdings = holdings      # Her ay tutulan fon kodları
+        self.switches = switches      # {yıl: değişiklik sayısı}
+        self.stats = summarize(returns)
+        self.benchmark_stats = summarize(benchmark)
+        beat = np.asarray(returns) > np.asarray(benchmark)
+        self.stats["hit_rate"] = float(beat.mean()) if len(beat) else 0.0
+        self.stats["switches"] = sum(switches.values())
+
+
+def run_backtest(data, top_n=5, switch_limit=6, min_improvement=0.0, weights=None,
+                 engine=None):
+    """Ay sonlarında en iyi `top_n` fonu seçerek portföyü yeniden oynat.
+
+    Portföy değiştiğinde eşit ağırlıkla alınır, değişiklik olmayan aylarda
+    ağırlıklar fiyatlarla kayar. Bir takvim yılında en fazla `switch_limit`
+    değişiklik yapılır; yeni sepetin ortalama skoru tutulanı `min_improvement`
+    kadar geçmiyorsa değişiklik yapılmaz. İlk alım değişiklik sayılmaz.
+    """
+    engine = engine or StrategyEngine()
+    params = {"top_n": top_n, "switch_limit": switch_limit,
+              "min_improvement": min_improvement, "weights": weights}
+    held = np.empty(0, dtype=np.intp)
+    shares = np.empty(0)
+    switches, holdings, returns, benchmark = {}, [], [], []
+
+    for k in range(len(data.step_dates) - 1):
+        eligible = data.eligible[k]
+        scores = engine.calculate_composite_vector(
+            data.period_returns[k], data.asset_groups[k], data.risk_totals[k],
+            regime=data.regimes[k], weights=weights)
+        scores = np.where(eligible, scores, -np.inf)
+        desired = np.argsort(-scores, kind="stable")[:min(top_n, int(eligible.sum()))]
+
+        year = data.step_dates[k][:4]
+        if not len(held):
+            held = desired
+            shares = np.full(len(held), 1.0 / max(len(held), 1))
+        elif len(desired) and set(desired.tolist()) != set(held.tolist()):
+            held_scores = scores[held]
+            held_scores = held_scores[np.isfinite(held_scores)]
+            gain = (scores[desired].mean() - held_scores.mean()
+                    if len(held_scores) else np.inf)
+            if switches.get(year, 0) < switch_limit and gain >= min_improvement:
+                held = desired
+                shares = np.full(len(held), shares.sum() / len(held))
+                switches[year] = switches.get(year, 0) + 1
+
+        growth = data.growth[k]
+        held_growth = np.where(np.isfinite(growth[held]), growth[held], 1.0)
+        grown = shares * held_growth
+        returns.append(float(grown.sum() / shares.sum() - 1) if shares.sum() > 0 else 0.0)
+        shares = grown
+
+        valid = eligible & np.isfinite(growth)
+        benchmark.append(float(growth[valid].mean() - 1) if valid.any() else 0.0)
+        holdings.append([data.codes[i] for i in held])
+
+    return BacktestResult(params, data.step_dates[:-1], returns, benchmark, holdings, switches)
+
+
+def default_param_grid(switch_limit, top_ns=(3, 5, 10), min_improvements=(0.0, 5.0)):
+    """Backtest menüsünde denenen parametre setleri."""
+    return [{"top_n": n, "switch_limit": switch_limit, "min_improvement": m}
+            for n in top_ns for m in min_improvements]
+
+
+_WORKER_DATA = None
+
+
+def _init_worker(data):
+    """Havuz süreci başlangıcı: veri her iş için değil, süreç başına bir kez aktarılır."""
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _run_worker(params):
+    return run_backtest(_WORKER_DATA, **params)
+
+
+def run_grid(data, param_sets, processes=2, min_pool_runs=4):
+    """Parametre setlerini süreç havuzunda paralel çalıştır (sonuçlar aynı sırada).
+
+    Set sayısı azsa, processes < 1 ise veya havuz kurulamazsa sırayla çalışır.
+    """
+    param_sets = list(param_sets)
+    processes = min(processes, os.cpu_count() or 1, len(param_sets))
+    if processes < 1 or len(param_sets) < min_pool_runs:
+        return [run_backtest(data, **p) for p in param_sets]
+    try:
+        # fork, Tk ve açık HTTP oturumu olan çok thread'li süreçte güvenli değil
+        with ProcessPoolExecutor(max_workers=processes,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(data,)) as pool:
+            return list(pool.map(_run_worker, param_sets))
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Backtest süreç havuzu kullanılamadı, sırayla çalıştırılacak: {e}")
+        return [run_backtest(data, **p) for p in param_sets]
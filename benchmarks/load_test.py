@@ -0,0 +1,216 @@
+"""
+TEFAS BES Fon Analizi — Çekme Yolu Yük Testi
+DataFetcher'ın toplu fon çekme ve makro yenileme yollarını yerel test
+sunucusuna (mock_server.py) karşı uçtan uca çalıştırır; verim (istek/sn),
+gecikme yüzdelikleri ve hata dağılımını raporlar.
+
+Kullanım:
+    python benchmarks/load_test.py --funds 300 --workers 4 --latency-ms 80 --jitter-ms 40
+    python benchmarks/load_test.py --workers 1 --delay 1.5 --rate-limit 1 --reject-burst-len 10
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8765   # ayrı çalışan sunucu
+    python benchmarks/load_test.py --pipeline --workers 8 --parse-processes 4
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import warnings  # noqa: E402
+warnings.filterwarnings("ignore")  # verify=False uyarıları
+
+from config import Config  # noqa: E402
+from data_fetcher import DataFetcher, RequestRejected  # noqa: E402
+from fetch_pipeline import FundPagePipeline  # noqa: E402
+import mock_server  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    """En yakın sıra yöntemiyle yüzdelik."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[k]
+
+
+def summarize(latencies, outcomes, elapsed):
+    lat = sorted(latencies)
+    counts = {}
+    for o in outcomes:
+        counts[o] = counts.get(o, 0) + 1
+    return {
+        "requests": len(outcomes),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(outcomes) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(lat, 50) * 1000, 2),
+            "p95": round(percentile(lat, 95) * 1000, 2),
+            "p99": round(percentile(lat, 99) * 1000, 2),
+            "max": round((lat[-1] if lat else 0) * 1000, 2),
+        },
+        "outcomes": counts,
+    }
+
+
+def _classify(exc):
+    if exc is None:
+        return "ok"
+    if isinstance(exc, RequestRejected):
+        return "rejected"
+    text = str(exc)
+    if "429" in text:
+        return "rate_limited"
+    if "403" in text:
+        return "forbidden"
+    if any(code in text for code in ("500", "502", "503")):
+        return "server_error"
+    return "other_error"
+
+
+def run_batch(fetcher, codes, workers, delay):
+    """_batch_fetch_worker ile aynı çağrıyı (fetch_fund_page) N işçiyle yürüt."""
+    work = queue.Queue()
+    for code in codes:
+        work.put(code)
+    latencies, outcomes = [], []
+    lock = threading.Lock()
+
+    def _worker():
+        while True:
+            try:
+                code = work.get_nowait()
+            except queue.Empty:
+                return
+            if delay > 0:
+                fetcher.throttle_request(delay)
+            start = time.perf_counter()
+            error = None
+            try:
+                fetcher.fetch_fund_page(code)
+            except Exception as e:
+                error = e
+            took = time.perf_counter() - start
+            with lock:
+                latencies.append(took)
+                outcomes.append(_classify(error))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=_worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return summarize(latencies, outcomes, time.perf_counter() - start)
+
+
+def run_pipeline(fetcher, codes, workers, delay, parse_processes):
+    """_batch_fetch_worker'ın kullandığı hattı (I/O thread'leri + parse havuzu) yürüt.
+
+    Gecikme, ilk bayttan değil hattın başından sonucun tüketiciye ulaşmasına kadardır.
+    """
+    pipeline = FundPagePipeline(fetcher, io_workers=workers, delay=delay,
+                                parse_processes=parse_processes)
+    pipeline.min_pool_pages = 1
+    latencies, outcomes = [], []
+    start = time.perf_counter()
+
+    def _on_result(code, allocation, daily, error):
+        latencies.append(time.perf_counter() - start)
+        outcomes.append(_classify(error))
+
+    pipeline.run(codes, _on_result)
+    report = summarize(latencies, outcomes, time.perf_counter() - start)
+    report["pool_used"] = pipeline.pool_used
+    return report
+
+
+def run_macro(fetcher, rounds):
+    """Tam makro yükleme ve hafif (toplu) yenileme döngülerini ölç."""
+    symbols = list(fetcher.config.MACRO_SYMBOLS.values())
+    report = {}
+    for name, call in (("macro_full", fetcher.load_macro_data),
+                       ("macro_quick", lambda: fetcher.fetch_yahoo_batch(symbols))):
+        latencies, outcomes = [], []
+        start = time.perf_counter()
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            result = call()
+            latencies.append(time.perf_counter() - t0)
+            got = len(result[0] if isinstance(result, tuple) else result)
+            outcomes.append("ok" if got == len(symbols) else f"partial_{got}")
+        report[name] = summarize(latencies, outcomes, time.perf_counter() - start)
+    return report
+
+
+def _print_summary(name, s):
+    lat = s["latency_ms"]
+    print(f"{name:<12} {s['requests']:>5} istek  {s['throughput_rps']:>8.2f} ist/sn  "
+          f"p50 {lat['p50']:>8.1f}  p95 {lat['p95']:>8.1f}  p99 {lat['p99']:>8.1f}  "
+          f"max {lat['max']:>8.1f} ms  {s['outcomes']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DataFetcher yük testi")
+    parser.add_argument("--base-url", help="Çalışan bir test sunucusu (verilmezse içeride başlatılır)")
+    parser.add_argument("--funds", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="İstekler arası throttle (BATCH_REQUEST_DELAY karşılığı)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Toplu çekmeyi FundPagePipeline (parse süreç havuzu) ile yürüt")
+    parser.add_argument("--parse-processes", type=int, default=Config.PARSE_PROCESSES)
+    parser.add_argument("--macro-rounds", type=int, default=10)
+    parser.add_argument("--output", help="Rapor JSON yolu")
+    mock_server.add_behaviour_args(parser)
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = mock_server.MockServer(behaviour=mock_server.behaviour_from_args(args))
+        base_url = server.start()
+
+    workdir = tempfile.TemporaryDirectory(prefix="tefas_load_")
+    fetcher = DataFetcher(Config(), cache_path=os.path.join(workdir.name, "cache.json"),
+                          tefas_base_url=base_url, yahoo_base_urls=[base_url])
+    try:
+        report = {"config": vars(args), "base_url": base_url}
+        codes = synthetic.fund_codes(args.funds)
+        if args.pipeline:
+            report["batch"] = run_pipeline(fetcher, codes, args.workers, args.delay,
+                                           args.parse_processes)
+        else:
+            report["batch"] = run_batch(fetcher, codes, args.workers, args.delay)
+        _print_summary("batch", report["batch"])
+        if args.macro_rounds > 0:
+            report.update(run_macro(fetcher, args.macro_rounds))
+            _print_summary("macro_full", report["macro_full"])
+            _print_summary("macro_quick", report["macro_quick"])
+        if server:
+            report["server"] = server.stats
+            print(f"sunucu: {server.stats['requests']} istek, "
+                  f"{server.stats['rejected']} rejected, {server.stats['rate_limited']} 429, "
+                  f"{server.stats['errors']} hata, {server.stats['bytes'] / 1e6:.1f} MB")
+    finally:
+        if server:
+            server.stop()
+        workdir.cleanup()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Rapor: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
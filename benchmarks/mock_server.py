@@ -0,0 +1,340 @@
+"""
+TEFAS BES Fon Analizi — Yerel TEFAS / Yahoo Test Sunucusu
+Kayıtlı FonAnaliz.aspx sayfalarını, toplu getiri (BindComparisonFundReturns),
+toplu varlık dağılımı (BindHistoryAllocation), fiyat geçmişi (BindHistoryInfo)
+ve Yahoo v8 chart / v7 spark JSON yanıtlarını yerelden sunar. Gecikme, hata oranı, "rejected" patlamaları ve
+rate-limit davranışı ayarlanabilir; DataFetcher'ın çekme yolları gerçek
+sunucuları yormadan yük testine sokulabilir.
+
+Kullanım:
+    python benchmarks/mock_server.py --port 8765 --latency-ms 120 --rate-limit 5
+    TEFAS_BASE_URL=http://127.0.0.1:8765 YAHOO_BASE_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import synthetic  # noqa: E402
+
+YAHOO_FIXTURE = "yahoo_chart_XU100.IS.json"
+
+# F5 güvenlik duvarının TEFAS'ta döndürdüğü engelleme sayfası
+REJECTED_PAGE = (
+    "<html><head><title>Request Rejected</title></head><body>"
+    "The requested URL was rejected. Please consult with your administrator."
+    "<br><br>Your support ID is: {support_id}<br><br>"
+    "<a href='javascript:history.back();'>[Go Back]</a></body></html>"
+)
+
+# Sembol → yaklaşık fiyat seviyesi (kayıtlı seri bu seviyeye ölçeklenir)
+SYMBOL_LEVELS = {
+    "XU100.IS": 9850.0, "GC=F": 2950.0, "SI=F": 33.0, "USDTRY=X": 36.4,
+    "EURTRY=X": 39.2, "BZ=F": 74.5, "BTC-USD": 96500.0, "ETH-USD": 2700.0,
+}
+
+RANGE_POINTS = {"1d": 1, "2d": 2, "5d": 5, "1mo": 21, "3mo": 63,
+                "6mo": 126, "1y": 252, "2y": 504, "5y": 1260}
+
+
+class MockBehaviour:
+    """Sunucu davranış ayarları."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 reject_burst_rate=0.0, reject_burst_len=20, reject_status=200,
+                 rate_limit=0.0, seed=0):
+        self.latency_ms = latency_ms            # Ortalama yanıt gecikmesi
+        self.jitter_ms = jitter_ms              # Gecikme sapması (üstel kuyruk)
+        self.error_rate = error_rate            # 500/503 dönme olasılığı
+        self.reject_burst_rate = reject_burst_rate  # TEFAS engel patlaması başlama olasılığı
+        self.reject_burst_len = reject_burst_len    # Patlamadaki engellenen istek sayısı
+        self.reject_status = reject_status      # 200 (F5 sayfası) veya 403
+        self.rate_limit = rate_limit            # Saniyede izin verilen istek (0 = sınırsız)
+        self.seed = seed
+
+
+class _TokenBucket:
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self):
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class MockServer:
+    """Arka plan thread'inde çalışan yerel TEFAS + Yahoo sunucusu."""
+
+    def __init__(self, host="127.0.0.1", port=0, behaviour=None, comparison_funds=0):
+        self.behaviour = behaviour or MockBehaviour()
+        self._rnd = random.Random(self.behaviour.seed)
+        self._lock = threading.Lock()
+        self._buckets = {"tefas": _TokenBucket(self.behaviour.rate_limit),
+                         "yahoo": _TokenBucket(self.behaviour.rate_limit)}
+        self._reject_left = 0
+        self._template = synthetic.load_fixture(synthetic.FONANALIZ_FIXTURE)
+        self._chart = synthetic.load_json_fixture(YAHOO_FIXTURE)
+        # 0 → kayıtlı yanıt; aksi halde bu büyüklükte sentetik evren
+        self._comparison = json.dumps(
+            synthetic.make_comparison_response(comparison_funds) if comparison_funds
+            else synthetic.load_json_fixture(synthetic.COMPARISON_FIXTURE),
+            ensure_ascii=False)
+        self._universe = [r["FONKODU"] for r in json.loads(self._comparison)["data"]]
+        self.stats = {"requests": 0, "bytes": 0, "status": {}, "routes": {},
+                      "rejected": 0, "rate_limited": 0, "errors": 0}
+
+        handler = type("_Handler", (_MockHandler,), {"mock": self})
+        self._httpd = ThreadingHTTPServer((host, port), handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # ── Davranış ──────────────────────────────────
+
+    def _delay(self):
+        b = self.behaviour
+        with self._lock:
+            jitter = self._rnd.expovariate(1 / b.jitter_ms) if b.jitter_ms > 0 else 0.0
+        delay = (b.latency_ms + jitter) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+    def _decide(self, service):
+        """İsteğin kaderi: 'ok', 'error', 'rejected' veya 'rate_limited'."""
+        b = self.behaviour
+        with self._lock:
+            if service == "tefas" and self._reject_left > 0:
+                self._reject_left -= 1
+                return "rejected"
+            if not self._buckets[service].take():
+                if service == "tefas":
+                    # F5 aşımda bir süre engellemeye devam eder
+                    self._reject_left = b.reject_burst_len - 1
+                    return "rejected"
+                return "rate_limited"
+            if service == "tefas" and self._rnd.random() < b.reject_burst_rate:
+                self._reject_left = b.reject_burst_len - 1
+                return "rejected"
+            if self._rnd.random() < b.error_rate:
+                return "error"
+        return "ok"
+
+    def _record(self, route, status, size, outcome):
+        with self._lock:
+            s = self.stats
+            s["requests"] += 1
+            s["bytes"] += size
+            s["status"][str(status)] = s["status"].get(str(status), 0) + 1
+            s["routes"][route] = s["routes"].get(route, 0) + 1
+            if outcome == "rejected":
+                s["rejected"] += 1
+            elif outcome == "rate_limited":
+                s["rate_limited"] += 1
+            elif outcome == "error":
+                s["errors"] += 1
+
+    # ── İçerik ────────────────────────────────────
+
+    def fund_page(self, code):
+        rnd = random.Random(code)
+        allocation = synthetic.make_allocation(rnd)
+        daily = "%" + f"{rnd.gauss(0.1, 0.8):.4f}".replace(".", ",")
+        return synthetic.render_fund_page(self._template, code, allocation, daily)
+
+    def chart_result(self, symbol, range_):
+        """Kayıtlı grafiği sembol seviyesine ölçekleyip aralığa göre kes."""
+        base = self._chart["chart"]["result"][0]
+        points = RANGE_POINTS.get(range_, 63)
+        closes = base["indicators"]["quote"][0]["close"]
+        last = next(c for c in reversed(closes) if c is not None)
+        scale = SYMBOL_LEVELS.get(symbol, last) / last
+
+        def _cut(values):
+            return [round(v * scale, 4) if v is not None else None for v in values[-points:]]
+
+        quote = base["indicators"]["quote"][0]
+        return {
+            "meta": dict(base["meta"], symbol=symbol, range=range_,
+                         regularMarketPrice=round(last * scale, 4)),
+            "timestamp": base["timestamp"][-points:],
+            "indicators": {"quote": [{
+                "open": _cut(quote["open"]), "high": _cut(quote["high"]),
+                "low": _cut(quote["low"]), "close": _cut(quote["close"]),
+                "volume": quote["volume"][-points:],
+            }]},
+        }
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    mock = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, route, outcome):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        self.mock._record(route, status, len(data), outcome)
+
+    def _reply_failure(self, route, outcome):
+        """Başarısız kader için yanıt gönder; gönderildiyse True."""
+        if outcome == "rejected":
+            status = self.mock.behaviour.reject_status
+            page = REJECTED_PAGE.format(support_id=random.getrandbits(60))
+            self._send(status, page, "text/html", route, outcome)
+        elif outcome == "rate_limited":
+            self._send(429, "Too Many Requests", "text/plain", route, outcome)
+        elif outcome == "error":
+            self._send(random.choice((500, 503)), "Server Error", "text/plain", route, outcome)
+        else:
+            return False
+        return True
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+
+        if path.endswith("/api/DB/BindComparisonFundReturns"):
+            route = "comparison"
+        elif path.endswith("/api/DB/BindHistoryAllocation"):
+            route = "allocation"
+        elif path.endswith("/api/DB/BindHistoryInfo"):
+            route = "history"
+        else:
+            self._send(404, "not found", "text/plain", "unknown", "error")
+            return
+
+        self.mock._delay()
+        if self._reply_failure(route, self.mock._decide("tefas")):
+            return
+        if form.get("fontip", "YAT") != "EMK":
+            body = json.dumps({"draw": 0, "recordsTotal": 0, "recordsFiltered": 0, "data": []})
+        elif route == "comparison":
+            body = self.mock._comparison
+        else:
+            start = datetime.strptime(form["bastarih"], "%d.%m.%Y").date()
+            end = datetime.strptime(form["bittarih"], "%d.%m.%Y").date()
+            make = (synthetic.make_allocation_history_response if route == "allocation"
+                    else synthetic.make_price_history_response)
+            body = json.dumps(make(self.mock._universe, start, end), ensure_ascii=False)
+        self._send(200, body, "application/json", route, "ok")
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        path = parsed.path
+
+        if path.endswith("/FonAnaliz.aspx"):
+            service, route = "tefas", "fonanaliz"
+        elif "/v8/finance/chart/" in path:
+            service, route = "yahoo", "chart"
+        elif path.endswith("/v7/finance/spark"):
+            service, route = "yahoo", "spark"
+        else:
+            self._send(404, "not found", "text/plain", "unknown", "error")
+            return
+
+        self.mock._delay()
+        outcome = self.mock._decide(service)
+        if self._reply_failure(route, outcome):
+            return
+
+        if route == "fonanaliz":
+            code = query.get("FonKod", "AFT").upper()
+            self._send(200, self.mock.fund_page(code), "text/html; charset=utf-8", route, outcome)
+        elif route == "chart":
+            symbol = path.rsplit("/", 1)[-1]
+            body = {"chart": {"result": [self.mock.chart_result(symbol, query.get("range", "3mo"))],
+                              "error": None}}
+            self._send(200, json.dumps(body), "application/json", route, outcome)
+        else:
+            symbols = [s for s in query.get("symbols", "").split(",") if s]
+            body = {"spark": {"result": [
+                {"symbol": s, "response": [self.mock.chart_result(s, query.get("range", "3mo"))]}
+                for s in symbols], "error": None}}
+            self._send(200, json.dumps(body), "application/json", route, outcome)
+
+
+def add_behaviour_args(parser):
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reject-burst-rate", type=float, default=0.0)
+    parser.add_argument("--reject-burst-len", type=int, default=20)
+    parser.add_argument("--reject-status", type=int, default=200, choices=(200, 403))
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Servis başına saniyede izin verilen istek (0 = sınırsız)")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def behaviour_from_args(args):
+    return MockBehaviour(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, reject_burst_rate=args.reject_burst_rate,
+        reject_burst_len=args.reject_burst_len, reject_status=args.reject_status,
+        rate_limit=args.rate_limit, seed=args.seed,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Yerel TEFAS / Yahoo test sunucusu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--comparison-funds", type=int, default=0,
+                        help="Toplu getiri yanıtındaki fon sayısı (0 = kayıtlı yanıt)")
+    add_behaviour_args(parser)
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.host, args.port, behaviour_from_args(args),
+                        comparison_funds=args.comparison_funds)
+    url = server.start()
+    print(f"Test sunucusu: {url}  (Ctrl+C ile durdur)")
+    print(f"  TEFAS_BASE_URL={url} YAHOO_BASE_URL={url} python main.py")
+    try:
+        while True:
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
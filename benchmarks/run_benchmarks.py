@@ -0,0 +1,242 @@
+"""
+TEFAS BES Fon Analizi — Performans Benchmark'ları
+Sıcak yolları sentetik fon evrenleri üzerinde ölçer ve sonucu JSON'a yazar.
+
+Kullanım:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 300,3000 --repeat 5
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/eski.json
+
+Ağ erişimi yoktur: fon sayfaları benchmarks/fixtures altındaki kayıtlı
+FonAnaliz.aspx sayfasından türetilir, önbellek geçici dizine yazılır.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from config import Config  # noqa: E402
+from data_fetcher import DataFetcher  # noqa: E402
+from strategy_engine import StrategyEngine  # noqa: E402
+from main import FundAnalyzer  # noqa: E402
+from risk_metrics import RiskMetrics, daily_returns as nav_returns  # noqa: E402
+from correlation import pairwise_correlation  # noqa: E402
+from backtest import BacktestData, run_backtest  # noqa: E402
+from monte_carlo import MonteCarloSimulator  # noqa: E402
+from leaderboard import Leaderboard  # noqa: E402
+from similarity_index import AllocationSimilarity  # noqa: E402
+import synthetic  # noqa: E402
+
+DEFAULT_SIZES = (300, 3000, 30000)
+PARSE_SAMPLE = 300            # Parse ölçümü için üretilen farklı sayfa sayısı
+REGRESSION_THRESHOLD = 1.10   # Karşılaştırmada %10'dan yavaşsa işaretle
+CORRELATION_MAX_FUNDS = 3000  # N × N matris; daha büyük boyutta ölçülmez
+BACKTEST_MAX_FUNDS = 3000     # Önek toplamları T × N × 5; daha büyük boyutta ölçülmez
+SIMULATION_FUNDS = 10         # Monte Carlo ölçümündeki portföy büyüklüğü
+
+
+def _timeit(fn, repeat):
+    """fn'i repeat kez çalıştır, süreleri (saniye) döndür."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.mean(runs),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+def _headless_analyzer(fetcher):
+    """FundAnalyzer metotlarını Tk penceresi açmadan çağırmak için vekil nesne."""
+    def _raise(error_msg, show_dialog=True):
+        raise RuntimeError(error_msg)
+    return SimpleNamespace(
+        fetcher=fetcher,
+        performance_columns=Config.PERFORMANCE_COLUMNS,
+        handle_error=_raise,
+    )
+
+
+def bench_size(n, repeat, workdir):
+    """Tek evren büyüklüğü için tüm ölçümleri yap."""
+    config = Config()
+    raw_df, allocations, daily_returns, macro = synthetic.make_universe(n, seed=n)
+    csv_path = os.path.join(workdir, f"tefas_{n}.csv")
+    raw_df.to_csv(csv_path, index=False, encoding="utf-8")
+
+    fetcher = DataFetcher(config, cache_path=os.path.join(workdir, f"cache_{n}.json"))
+    analyzer = _headless_analyzer(fetcher)
+    weights = {col: 10 / len(config.PERFORMANCE_COLUMNS) for col in config.PERFORMANCE_COLUMNS}
+    df = FundAnalyzer.load_and_prepare_data(analyzer, csv_path)
+    engine = StrategyEngine()
+
+    codes = df["Fon Kodu"].tolist()
+    portfolio = {c: allocations[c] for c in codes if c in allocations}
+    distribution = {c: 100 / len(portfolio) for c in portfolio}
+
+    results = {}
+    results["load_and_prepare_data"] = _timeit(
+        lambda: FundAnalyzer.load_and_prepare_data(analyzer, csv_path), repeat)
+    results["calculate_scores"] = _timeit(
+        lambda: FundAnalyzer.apply_scores(df.copy(), weights), repeat)
+    results["calculate_all_forecasts"] = _timeit(
+        lambda: engine.calculate_all_forecasts(df, allocations, macro), repeat)
+    forecasts = engine.calculate_all_forecasts(df, allocations, macro)
+    results["forecast_top_funds"] = _timeit(lambda: engine.get_top_funds(forecasts, n=10), repeat)
+    board = Leaderboard(config.LEADERBOARD_SIZE)
+    fund_types = df["Fon Türü"].astype(str).tolist()
+    results["leaderboard_rebuild"] = _timeit(
+        lambda: board.rebuild(forecasts.codes, forecasts.composite, fund_types), repeat)
+    _, *inputs = engine.forecast_inputs(df, allocations)
+    contexts = [ctx for _, ctx in engine.scenario_contexts(macro, config.REGIME_SCENARIOS)]
+    results["scenario_scores"] = _timeit(
+        lambda: engine.scenario_scores(*inputs, contexts), repeat)
+    similar = AllocationSimilarity()
+    results["similarity_build"] = _timeit(lambda: AllocationSimilarity().sync(allocations), repeat)
+    similar.sync(allocations)
+    query_codes = [c for c in codes if c in similar][:100]
+    results["similarity_query_100"] = _timeit(
+        lambda: [similar.query(c, 10) for c in query_codes], repeat)
+    results["save_cache"] = _timeit(
+        lambda: fetcher.save_cache(daily_returns, allocations, macro), repeat)
+    results["load_cache"] = _timeit(fetcher.load_cache, repeat)
+    results["portfolio_aggregation"] = _timeit(
+        lambda: FundAnalyzer.aggregate_allocations(portfolio, distribution), repeat)
+
+    dates, nav_codes, prices = synthetic.make_price_matrix(n, seed=n)
+    results["risk_metrics"] = _timeit(
+        lambda: RiskMetrics(dates, nav_codes, prices, config.PORTFOLIO_PERIODS), repeat)
+    held = min(SIMULATION_FUNDS, prices.shape[1])
+    simulator = MonteCarloSimulator(nav_returns(prices[:, :held])[-config.MONTE_CARLO_LOOKBACK_DAYS:],
+                                    nav_codes[:held], [1.0] * held)
+    results["monte_carlo"] = _timeit(
+        lambda: simulator.simulate(100000.0, paths=config.MONTE_CARLO_PATHS), repeat)
+    if n <= CORRELATION_MAX_FUNDS:
+        window = nav_returns(prices)[-config.CORRELATION_WINDOW_DAYS:]
+        results["correlation_matrix"] = _timeit(lambda: pairwise_correlation(window), repeat)
+    if n <= BACKTEST_MAX_FUNDS:
+        data = BacktestData.build(dates, nav_codes, prices, config.PORTFOLIO_PERIODS,
+                                  allocation_cache=allocations)
+        results["backtest_build"] = _timeit(
+            lambda: BacktestData.build(dates, nav_codes, prices, config.PORTFOLIO_PERIODS,
+                                       allocation_cache=allocations), repeat)
+        results["backtest_run"] = _timeit(lambda: run_backtest(data, top_n=5), repeat)
+
+    cache_bytes = os.path.getsize(fetcher.get_cache_path())
+    results["save_cache"]["bytes"] = cache_bytes
+    return results
+
+
+def bench_parse(repeat):
+    """Kayıtlı sayfadan türetilmiş PARSE_SAMPLE farklı sayfayı parse et."""
+    template = synthetic.load_fixture(synthetic.FONANALIZ_FIXTURE)
+    codes = synthetic.fund_codes(PARSE_SAMPLE)
+    allocations = synthetic.make_allocation_cache(codes, coverage=1.0)
+    daily = synthetic.make_daily_returns(codes)
+    pages = [synthetic.render_fund_page(template, c, allocations[c], daily[c]) for c in codes]
+
+    def _parse_all():
+        for html in pages:
+            DataFetcher.parse_allocation_data(html)
+            DataFetcher.parse_daily_return(html)
+
+    result = _timeit(_parse_all, repeat)
+    result["pages"] = len(pages)
+    result["page_bytes"] = sum(len(p.encode("utf-8")) for p in pages) // len(pages)
+    result["per_page_ms"] = result["median"] / len(pages) * 1000
+    return result
+
+
+def compare(current, baseline_path):
+    """İki sonuç dosyasını medyan süre üzerinden karşılaştır ve yazdır."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nKarşılaştırma: {baseline['meta'].get('commit')} → {current['meta'].get('commit')}")
+    regressions = 0
+    for size, benches in current["results"].items():
+        old_benches = baseline["results"].get(size, {})
+        for name, stats in benches.items():
+            old = old_benches.get(name)
+            if not old:
+                continue
+            ratio = stats["median"] / old["median"] if old["median"] else float("inf")
+            flag = "  ⚠ yavaşladı" if ratio > REGRESSION_THRESHOLD else ""
+            regressions += bool(flag)
+            print(f"  [{size:>6}] {name:<26} {old['median']*1000:10.2f} ms → "
+                  f"{stats['median']*1000:10.2f} ms  (×{ratio:.2f}){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TEFAS BES Fon Analizi benchmark'ları")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Virgülle ayrılmış fon evreni büyüklükleri")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Her ölçümün tekrar sayısı (10k+ fonda 1'e düşer)")
+    parser.add_argument("--output", help="Sonuç JSON yolu (varsayılan: benchmarks/results/)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç JSON'u")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="tefas_bench_") as workdir:
+        report["results"]["parse"] = {"parse_fund_page": bench_parse(args.repeat)}
+        print(f"parse: {report['results']['parse']['parse_fund_page']['per_page_ms']:.3f} ms/sayfa")
+        for n in sizes:
+            repeat = args.repeat if n < 10000 else 1
+            report["results"][str(n)] = bench_size(n, repeat, workdir)
+            for name, stats in report["results"][str(n)].items():
+                print(f"[{n:>6}] {name:<26} {stats['median']*1000:10.2f} ms")
+
+    output = args.output or os.path.join(
+        BENCH_DIR, "results",
+        f"bench_{commit}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nSonuçlar: {output}")
+
+    if args.compare:
+        return 1 if compare(report, args.compare) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+TEFAS BES Fon Analizi — Sentetik Veri Üreticisi
+Benchmark'lar için deterministik fon evrenleri üretir: TEFAS karşılaştırma
+CSV'si, varlık dağılımı / günlük getiri önbellekleri, makro veriler ve
+kayıtlı FonAnaliz.aspx sayfasından türetilmiş fon sayfaları.
+Ağ erişimi gerektirmez.
+"""
+import functools
+import itertools
+import json
+import os
+import random
+import re
+import string
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FONANALIZ_FIXTURE = "fonanaliz_AFT.html"
+COMPARISON_FIXTURE = "tefas_comparison_EMK.json"
+
+PERFORMANCE_COLUMNS = [
+    "1 Ay (%)", "3 Ay (%)", "6 Ay (%)",
+    "1 Yıl (%)", "3 Yıl (%)", "5 Yıl (%)",
+]
+
+FUND_TYPES = [
+    "Hisse Senedi Fonu", "Borçlanma Araçları Fonu", "Kıymetli Madenler Fonu",
+    "Katılım Fonu", "Değişken Fon", "Para Piyasası Fonu", "Standart Fon",
+    "Endeks Fonu", "Karma Fon", "Fon Sepeti Fonu", "Katkı Fonu", "Başlangıç Fonu",
+]
+
+ASSET_NAMES = [
+    "Hisse Senedi", "Yabancı Hisse Senedi", "Devlet Tahvili",
+    "Özel Sektör Tahvili", "Kamu Kira Sertifikaları",
+    "Özel Sektör Kira Sertifikaları", "Kıymetli Madenler", "Ters-Repo",
+    "Vadeli Mevduat", "Katılma Hesabı", "Eurobond",
+    "Yatırım Fonları Katılma Payları", "Borsa Yatırım Fonları Katılma Payları",
+    "Finansman Bonosu", "Döviz Ödemeli Bono",
+    "Girişim Sermayesi Yatırım Fonu Katılma Payları",
+    "Vadeli İşlemler Nakit Teminatları",
+]
+
+# ASSET_NAMES → TEFAS BindHistoryAllocation alan kısaltması
+ALLOCATION_FIELDS = {
+    "Hisse Senedi": "HS", "Yabancı Hisse Senedi": "YHS", "Devlet Tahvili": "DT",
+    "Özel Sektör Tahvili": "OST", "Kamu Kira Sertifikaları": "KKS",
+    "Özel Sektör Kira Sertifikaları": "OSKS", "Kıymetli Madenler": "KM",
+    "Ters-Repo": "TR", "Vadeli Mevduat": "VDM", "Katılma Hesabı": "KH",
+    "Eurobond": "EUT", "Yatırım Fonları Katılma Payları": "FKB",
+    "Borsa Yatırım Fonları Katılma Payları": "BYF", "Finansman Bonosu": "FB",
+    "Döviz Ödemeli Bono": "DÖT",
+    "Girişim Sermayesi Yatırım Fonu Katılma Payları": "GSYKB",
+    "Vadeli İşlemler Nakit Teminatları": "VİNT",
+}
+
+PIE_COLORS = [
+    '#4572A7', '#AA4643', '#89A54E', '#80699B', '#3D96AE',
+    '#DB843D', '#92A8CD', '#A47D7C', '#B5CA92', '#7cb5ec',
+]
+
+# Dönem → (aylık ortalama getiri %, aylık oynaklık %) üretim parametreleri
+_PERIOD_MONTHS = {"1 Ay (%)": 1, "3 Ay (%)": 3, "6 Ay (%)": 6,
+                  "1 Yıl (%)": 12, "3 Yıl (%)": 36, "5 Yıl (%)": 60}
+
+
+def fund_codes(n):
+    """n adet benzersiz fon kodu (AAA, AAB, ... sonra 4 harfli)."""
+    letters = string.ascii_uppercase
+    codes = []
+    for length in (3, 4):
+        for combo in itertools.product(letters, repeat=length):
+            codes.append("".join(combo))
+            if len(codes) == n:
+                return codes
+    return codes
+
+
+def _format_tr(value):
+    """TEFAS CSV biçimi: ondalık ayırıcı virgül."""
+    return f"{value:.4f}".replace(".", ",")
+
+
+def make_fund_frame(n, seed=0):
+    """Ham (metin) TEFAS karşılaştırma tablosu üret.
+
+    Yeni fonları taklit etmek için uzun dönemlerin bir kısmı boş bırakılır.
+    """
+    rnd = random.Random(seed)
+    rows = []
+    for code in fund_codes(n):
+        drift = rnd.gauss(2.5, 1.5)       # aylık ortalama getiri (%)
+        vol = abs(rnd.gauss(4.0, 2.0)) + 0.2
+        age_months = rnd.choice([6, 12, 36, 60, 120, 120, 120])
+        row = {
+            "Fon Kodu": code,
+            "Fon Adı": f"{code} EMEKLİLİK VE HAYAT A.Ş. "
+                       f"{rnd.choice(FUND_TYPES).upper()}",
+            "Fon Türü": rnd.choice(FUND_TYPES),
+        }
+        for col, months in _PERIOD_MONTHS.items():
+            if months > age_months:
+                row[col] = ""
+                continue
+            ret = ((1 + drift / 100) ** months - 1) * 100
+            ret += rnd.gauss(0, vol * months ** 0.5)
+            row[col] = _format_tr(ret)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Fon Kodu", "Fon Adı", "Fon Türü"] + PERFORMANCE_COLUMNS)
+
+
+def write_fund_csv(path, n, seed=0):
+    make_fund_frame(n, seed).to_csv(path, index=False, encoding="utf-8")
+    return path
+
+
+# Karşılaştırma API alanı → make_fund_frame sütunu
+_COMPARISON_FIELDS = {
+    "GETIRI1A": "1 Ay (%)", "GETIRI3A": "3 Ay (%)", "GETIRI6A": "6 Ay (%)",
+    "GETIRI1Y": "1 Yıl (%)", "GETIRI3Y": "3 Yıl (%)", "GETIRI5Y": "5 Yıl (%)",
+}
+
+
+def make_comparison_response(n, seed=0):
+    """TEFAS BindComparisonFundReturns yanıtı biçiminde n fonluk JSON gövdesi."""
+    rnd = random.Random(seed + 4)
+    records = []
+    for row in make_fund_frame(n, seed).to_dict("records"):
+        record = {
+            "FONKODU": row["Fon Kodu"],
+            "FONUNVAN": row["Fon Adı"],
+            "FONTURACIKLAMA": row["Fon Türü"],
+        }
+        for field, col in _COMPARISON_FIELDS.items():
+            record[field] = float(row[col].replace(",", ".")) if row[col] else None
+        record["GETIRIYB"] = round(rnd.gauss(25, 15), 4)
+        records.append(record)
+    return {"draw": 0, "recordsTotal": n, "recordsFiltered": n, "data": records}
+
+
+def make_allocation(rnd):
+    """Tek fon için {varlık: {percentage, color}} dağılımı (toplam ~%100)."""
+    names = rnd.sample(ASSET_NAMES, rnd.randint(2, 7))
+    raw = [rnd.random() ** 2 + 0.01 for _ in names]
+    total = sum(raw)
+    pcts = [round(r / total * 100, 2) for r in raw]
+    pcts.sort(reverse=True)
+    return {
+        name: {"percentage": pct, "color": PIE_COLORS[i % len(PIE_COLORS)]}
+        for i, (name, pct) in enumerate(zip(names, pcts)) if pct > 0
+    }
+
+
+def make_allocation_history_response(codes, start, end):
+    """TEFAS BindHistoryAllocation yanıtı: [start, end] iş günlerinde her fonun dağılımı.
+
+    Fon başına temel dağılım mock sunucunun FonAnaliz sayfalarıyla aynıdır
+    (random.Random(fon_kodu)); günler arasında küçük kaymalar eklenir.
+    """
+    records = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            stamp = _tefas_stamp(day)
+            for code in codes:
+                base = make_allocation(random.Random(code))
+                rnd = random.Random(f"{code}:{day.isoformat()}")
+                record = {"TARIH": stamp, "FONKODU": code,
+                          "FONUNVAN": f"{code} EMEKLİLİK VE HAYAT A.Ş.", "BilFiyat": ""}
+                for field in ALLOCATION_FIELDS.values():
+                    record[field] = None
+                for name, data in base.items():
+                    drift = max(0.0, data["percentage"] + rnd.gauss(0, 0.3))
+                    record[ALLOCATION_FIELDS[name]] = round(drift, 2)
+                records.append(record)
+        day += timedelta(days=1)
+    return {"draw": 0, "recordsTotal": len(records),
+            "recordsFiltered": len(records), "data": records}
+
+
+_PRICE_EPOCH = date(2015, 1, 1)
+_PRICE_DAYS = 6000   # 2015 → ~2031
+
+
+@functools.lru_cache(maxsize=4096)
+def _price_series(code):
+    """Fon için deterministik günlük fiyat yürüyüşü (takvim günü başına bir değer)."""
+    rng = np.random.default_rng(zlib.crc32(code.encode("utf-8")))
+    drift = rng.normal(0.0012, 0.0006)
+    vol = abs(rng.normal(0.012, 0.006)) + 0.001
+    steps = rng.normal(drift, vol, _PRICE_DAYS)
+    return np.round(np.exp(np.cumsum(steps)) * rng.uniform(0.01, 0.2), 6)
+
+
+def _tefas_stamp(day):
+    tz = timezone(timedelta(hours=3))
+    return str(int(datetime.combine(day, time(), tz).timestamp() * 1000))
+
+
+def make_price_history_response(codes, start, end):
+    """TEFAS BindHistoryInfo yanıtı: [start, end] iş günlerinde her fonun birim fiyatı."""
+    records = []
+    day = start
+    while day <= end:
+        offset = (day - _PRICE_EPOCH).days
+        if day.weekday() < 5 and 0 <= offset < _PRICE_DAYS:
+            stamp = _tefas_stamp(day)
+            for code in codes:
+                records.append({
+                    "TARIH": stamp, "FONKODU": code,
+                    "FONUNVAN": f"{code} EMEKLİLİK VE HAYAT A.Ş.",
+                    "FIYAT": float(_price_series(code)[offset]),
+                    "TEDPAYSAYISI": 1.0e9, "KISISAYISI": 10000,
+                    "PORTFOYBUYUKLUK": 1.0e8, "BORSABULTENFIYAT": "-",
+                })
+        day += timedelta(days=1)
+    return {"draw": 0, "recordsTotal": len(records),
+            "recordsFiltered": len(records), "data": records}
+
+
+def make_price_matrix(n, days=1300, seed=0):
+    """NavStore.price_matrix biçiminde (tarihler, kodlar, T × N float32) fiyatlar.
+
+    Fonların ~%10'u sonradan kurulmuş gibi baştan NaN ile başlar.
+    """
+    rng = np.random.default_rng(seed)
+    codes = fund_codes(n)
+    drift = rng.normal(0.0012, 0.0006, n)
+    vol = np.abs(rng.normal(0.012, 0.006, n)) + 0.001
+    prices = np.exp(np.cumsum(rng.normal(drift, vol, (days, n)), axis=0)).astype(np.float32)
+    young = rng.random(n) < 0.1
+    starts = rng.integers(0, days - 30, n)
+    prices[np.arange(days)[:, None] < np.where(young, starts, 0)[None, :]] = np.nan
+    dates = np.arange(np.datetime64("2021-06-01"), np.datetime64("2021-06-01") + days)
+    return dates, codes, prices
+
+
+def make_allocation_cache(codes, seed=0, coverage=0.9):
+    """Fonların ~%90'ı için varlık dağılımı önbelleği."""
+    rnd = random.Random(seed + 1)
+    return {code: make_allocation(rnd) for code in codes if rnd.random() < coverage}
+
+
+def make_daily_returns(codes, seed=0):
+    """daily_return_cache biçiminde ("%0,4512" / "N/A") günlük getiriler."""
+    rnd = random.Random(seed + 2)
+    cache = {}
+    for code in codes:
+        if rnd.random() < 0.05:
+            cache[code] = "N/A"
+        else:
+            cache[code] = "%" + _format_tr(rnd.gauss(0.1, 0.8))
+    return cache
+
+
+def make_macro_data(seed=0):
+    """load_macro_data çıktısı biçiminde makro veriler."""
+    rnd = random.Random(seed + 3)
+    base = {
+        "BIST-100": 9850.0, "Altın": 3950.0, "Gümüş": 44.0,
+        "USD/TRY": 36.4, "EUR/TRY": 39.2, "Brent": 74.5,
+        "BTC": 96500.0, "ETH": 2700.0,
+    }
+    return {
+        name: {
+            "price": price * (1 + rnd.gauss(0, 0.01)),
+            "daily": rnd.gauss(0, 1.2),
+            "monthly": rnd.gauss(1.5, 4),
+            "quarterly": rnd.gauss(4, 8),
+        }
+        for name, price in base.items()
+    }
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def load_json_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_PIE_DATA_RE = re.compile(r'("renderTo":"MainContent_PieChartFonDagilim".*?"data":)\[\[.*?\]\]', re.DOTALL)
+_DAILY_RE = re.compile(r'(Günlük Getiri \(%\)<span>)[^<]*(</span>)')
+
+
+def render_fund_page(template, code, allocation, daily_return):
+    """Kayıtlı FonAnaliz sayfasını başka bir fonun verisiyle yeniden yaz."""
+    pie = json.dumps(
+        [[name, data["percentage"]] for name, data in allocation.items()],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    html = _PIE_DATA_RE.sub(lambda m: m.group(1) + pie, template, count=1)
+    html = _DAILY_RE.sub(lambda m: m.group(1) + daily_return + m.group(2), html, count=1)
+    return html.replace("FonKod=AFT", f"FonKod={code}")
+
+
+def make_universe(n, seed=0):
+    """Tek çağrıda tam sentetik evren: (raw_df, allocations, daily_returns, macro)."""
+    raw_df = make_fund_frame(n, seed)
+    codes = raw_df["Fon Kodu"].tolist()
+    return (raw_df, make_allocation_cache(codes, seed),
+            make_daily_returns(codes, seed), make_macro_data(seed))
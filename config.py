@@ -15,8 +15,52 @@ class Config:
     WEIGHT_TOLERANCE = 0.01
     SAVING_INTERVAL = 300
     CACHE_FILE = "fund_cache.json"
+    COMPARISON_CACHE_FILE = "comparison_cache.json"  # Toplu getiri tablosu (çekim zamanına göre)
+    TEFAS_PUBLISH_HOUR = 10         # TEFAS iş günü verisinin yayımlanmış sayıldığı saat (TR)
+    TEFAS_FUND_KIND = "EMK"     # TEFAS fon tipi: EMK = BES emeklilik fonları
+    SIMILAR_FUNDS_COUNT = 8         # Benzer Fonlar sekmesi: listelenen fon sayısı
+    SIMILARITY_BRUTE_FORCE_MAX = 5000  # Bu fon sayısının üstünde benzer fon araması LSH ile
+    RENDER_CACHE_SIZE = 24          # Fon detayı: çizimi saklanan fon sayısı (dağılım ve öngörü ayrı)
+    ALLOCATION_HISTORY_FILE = "allocation_history.json"  # Toplu varlık dağılımı geçmişi
+    ALLOCATION_HISTORY_DAYS = 120   # Saklanan geçmiş (gün)
+    ALLOCATION_DRIFT_METRIC = "l1"  # Strateji değişikliği: dağılım uzaklığı ("l1" / "cosine")
+    ALLOCATION_DRIFT_THRESHOLD = 15.0  # l1: el değiştiren yüzde puan; cosine: 0-1
+    ALLOCATION_DRIFT_WINDOW_DAYS = 28  # Güncel dağılımın karşılaştırıldığı önceki dönem (gün)
+    TEFAS_HISTORY_CHUNK_DAYS = 28   # TEFAS geçmiş uç noktaları: istek başına tarih aralığı
+    NAV_STORE_DIR = "nav_store"     # Fiyat geçmişi deposu (önbellek dosyasının yanında)
+    NAV_HISTORY_DAYS = 1830         # İlk indirmede geriye gidilecek gün (~5 yıl)
+    MACRO_HISTORY_FILE = "macro_history.json"    # Rejim göstergelerinin kapanış geçmişi
+    REGIME_HISTORY_FILE = "regime_history.npz"   # Günlük rejim çizelgesi
+    MACRO_HISTORY_REFRESH_DAYS = 25 # Son kayıt bu kadar günden yeniyse yalnızca son ay çekilir
+    CORRELATION_WINDOW_DAYS = 252   # Portföy korelasyonu: son N işlem günü (~1 yıl)
+    CORRELATION_HIGH = 0.8          # Bu değerin üstündeki fon çiftleri uyarı ile gösterilir
+    PORTFOLIO_OVERLAP_HIGH = 60.0   # Varlık dağılımı örtüşmesi bu yüzdeyi aşan fon çiftleri uyarılır
+    MONTE_CARLO_PATHS = 100000      # Portföy simülasyonu: yol sayısı
+    MONTE_CARLO_LOOKBACK_DAYS = 756 # Örneklenen fiyat geçmişi (işlem günü, ~3 yıl)
+    MONTE_CARLO_PROCESSES = 0       # Yol parçaları için süreç havuzu (0 = sırayla)
+    LEADERBOARD_SIZE = 10           # En iyi fonlar listesi: tüm fonlarda ve her fon türünde N fon
+    BES_SWITCH_LIMIT_PER_YEAR = 6   # BES: yılda en fazla fon dağılımı değişikliği
+    REBALANCE_HORIZON_MONTHS = 6    # Değişiklik planı: varsayılan ufuk (ay)
+    REBALANCE_DECAY = 0.7           # Kısa vadeli getiri ivmesinin aylık sönme oranı
+    REBALANCE_MIN_GAIN = 0.002      # Bir değişiklik hakkının karşılığı sayılan en düşük kazanç (log)
+    BACKTEST_PROCESSES = 2          # Backtest parametre setleri için süreç havuzu (0 = sırayla)
+    BACKTEST_POOL_MIN_RUNS = 4      # Bundan az parametre setinde süreç havuzu başlatılmaz
+    WEIGHT_SEARCH_CANDIDATES = 4096 # Ağırlık optimizasyonu: denenen aday vektör sayısı
+    WEIGHT_SEARCH_TOP_N = 5         # Başarı ölçüsü: her ay en iyi N fonun ertesi ay getirisi
+    WEIGHT_SEARCH_PROCESSES = 2     # Aday blokları için süreç havuzu (0 = sırayla)
     BATCH_REQUEST_DELAY = 1.5   # Toplu çekme: istekler arası bekleme (saniye)
     SINGLE_REQUEST_DELAY = 3    # Tek fon tıklama: minimum bekleme (saniye)
+    BATCH_FETCH_WORKERS = 1     # Toplu çekme: eşzamanlı indirme thread'i
+    PARSE_PROCESSES = 2         # Toplu çekme: HTML parse süreç havuzu (0 = aynı thread'de)
+    PARSE_POOL_MIN_PAGES = 40   # Bundan az sayfada süreç havuzu başlatılmaz
+
+    # Veri kaynakları — ortam değişkeniyle (TEFAS_BASE_URL, YAHOO_BASE_URL)
+    # yerel test sunucusuna yönlendirilebilir
+    TEFAS_BASE_URL = "https://www.tefas.gov.tr"
+    YAHOO_BASE_URLS = (
+        "https://query2.finance.yahoo.com",
+        "https://query1.finance.yahoo.com",
+    )
 
     # Portföy analizi dönemleri
     PORTFOLIO_PERIODS = [
@@ -44,6 +88,19 @@ class Config:
     MACRO_SYMBOLS = {**MACRO_SYMBOLS_ROW1, **MACRO_SYMBOLS_ROW2}
     MACRO_USD_TO_TL = {"Altın", "Gümüş"}
     MACRO_AUTO_REFRESH = 10  # Otomatik yenileme aralığı (saniye)
+    # Rejim senaryoları: makro göstergelerin aylık değişimine eklenen şoklar (puan)
+    REGIME_SCENARIOS = {
+        "BIST -%10": {"BIST-100": -10},
+        "Kur +%6": {"USD/TRY": 6},
+        "Altın +%8": {"Altın": 8},
+    }
+    NOWCAST_ENABLED = True   # Günlük (%) sütununda makro verisinden gün içi tahmin göster
+    # Gün içi tahmin: varlık sınıfı → makro gösterge ağırlıkları (tahvil/repo/fon ≈ 0)
+    NOWCAST_FACTORS = {
+        "hisse": {"BIST-100": 1.0},
+        "altin": {"Altın": 1.0},
+        "doviz": {"USD/TRY": 0.5, "EUR/TRY": 0.5},
+    }
 
     COLUMN_WIDTHS = {
         "Sıra": 50,
@@ -0,0 +1,186 @@
+"""
+TEFAS BES Fon Analizi — Fonlar Arası Korelasyon Matrisi
+NavStore getiri matrisinden tüm fon çiftleri için son N işlem gününün
+getiri korelasyonunu hesaplar. Gram matrisi (Xᵀ·X) float32 sütun
+bloklarıyla çarpılır; sonuç (pencere, tarih) anahtarıyla önbelleğe alınır.
+Depoya yeni gün eklendiğinde tam hesap yerine pencereye giren/çıkan
+satırlarla rank-1 güncelleme yapılır (O(N²) / gün). GUI'den bağımsızdır.
+"""
+import threading
+
+import numpy as np
+
+from perf_monitor import monitor, CATEGORY_COMPUTE
+from risk_metrics import MIN_COVERAGE
+
+CORRELATION_BLOCK = 1024   # Gram matrisi bu genişlikte bloklarla çarpılır
+MAX_INCREMENTAL_DAYS = 20  # Daha fazla yeni gün varsa baştan hesaplanır
+CACHE_SIZE = 4             # Saklanan (pencere, tarih) sonucu sayısı
+
+
+class CorrelationMatrix:
+    """Bir pencere ve tarih için N × N korelasyon matrisi (float32)."""
+
+    def __init__(self, codes, window, asof, corr):
+        self.codes = codes
+        self.window = window
+        self.asof = asof
+        self.corr = corr
+        self._index = {code: i for i, code in enumerate(codes)}
+
+    def __contains__(self, code):
+        return code in self._index
+
+    def submatrix(self, codes):
+        """(bulunan_kodlar, k × k dizi) — depoda olmayan fonlar atlanır."""
+        found = [c for c in codes if c in self._index]
+        idx = np.fromiter((self._index[c] for c in found), dtype=np.intp, count=len(found))
+        return found, self.corr[np.ix_(idx, idx)]
+
+    def pair(self, a, b):
+        """İki fonun korelasyonu; biri yoksa veya verisi yetersizse NaN."""
+        i, j = self._index.get(a), self._index.get(b)
+        if i is None or j is None:
+            return float("nan")
+        return float(self.corr[i, j])
+
+
+class _WindowState:
+    """Kayan pencere için yeterli istatistikler: satırlar, Σx, Xᵀ·X, gözlem sayısı.
+
+    Eksik getiriler 0 olarak tutulur (ileri doldurulmuş fiyatta "değişim yok");
+    gözlemi MIN_COVERAGE altında kalan fonların korelasyonu NaN olur.
+    """
+
+    def __init__(self, dates, returns, block):
+        valid = ~np.isnan(returns)
+        self.rows = np.where(valid, returns, 0.0).astype(np.float32)
+        self.valid = valid
+        self.dates = list(dates)
+        self.sums = self.rows.sum(axis=0, dtype=np.float64)
+        self.counts = valid.sum(axis=0)
+        self.gram = self._blocked_gram(self.rows, block)
+
+    @staticmethod
+    def _blocked_gram(x, block):
+        n = x.shape[1]
+        gram = np.empty((n, n), dtype=np.float64)
+        for i in range(0, n, block):
+            bi = slice(i, min(i + block, n))
+            for j in range(i, n, block):
+                bj = slice(j, min(j + block, n))
+                g = x[:, bi].T @ x[:, bj]        # float32 çarpım (sgemm)
+                gram[bi, bj] = g
+                if j != i:
+                    gram[bj, bi] = g.T
+        return gram
+
+    def _apply(self, row, sign):
+        self.gram += sign * np.outer(row, row)
+        self.sums += sign * row
+
+    def replace_last(self, day, returns):
+        """Son günü yeniden yayımlanmış değerlerle değiştir."""
+        valid = ~np.isnan(returns)
+        row = np.where(valid, returns, 0.0).astype(np.float32)
+        self._apply(self.rows[-1].astype(np.float64), -1)
+        self._apply(row.astype(np.float64), 1)
+        self.counts += valid.astype(int) - self.valid[-1]
+        self.rows[-1], self.valid[-1], self.dates[-1] = row, valid, day
+
+    def push(self, day, returns):
+        """Yeni günü pencereye ekle, en eski günü çıkar."""
+        valid = ~np.isnan(returns)
+        row = np.where(valid, returns, 0.0).astype(np.float32)
+        self._apply(self.rows[0].astype(np.float64), -1)
+        self._apply(row.astype(np.float64), 1)
+        self.counts += valid.astype(int) - self.valid[0]
+        self.rows = np.roll(self.rows, -1, axis=0)
+        self.valid = np.roll(self.valid, -1, axis=0)
+        self.rows[-1], self.valid[-1] = row, valid
+        self.dates = self.dates[1:] + [day]
+
+    def correlation(self, block):
+        n = self.rows.shape[0]
+        mean = self.sums / n
+        var = np.diag(self.gram) / n - mean * mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_std = 1.0 / np.sqrt(np.maximum(var, 0.0))
+        inv_std[(self.counts < n * MIN_COVERAGE) | ~np.isfinite(inv_std)] = np.nan
+
+        size = len(mean)
+        corr = np.empty((size, size), dtype=np.float32)
+        for i in range(0, size, block):
+            bi = slice(i, min(i + block, size))
+            cov = self.gram[bi] / n - mean[bi, None] * mean[None, :]
+            corr[bi] = np.clip(cov * inv_std[bi, None] * inv_std[None, :], -1.0, 1.0)
+        valid = ~np.isnan(inv_std)
+        corr[np.flatnonzero(valid), np.flatnonzero(valid)] = 1.0
+        return corr
+
+
+def pairwise_correlation(returns, block=CORRELATION_BLOCK):
+    """(T × N) getiri → N × N float32 korelasyon (önbelleksiz tek seferlik hesap)."""
+    return _WindowState(range(returns.shape[0]), returns, block).correlation(block)
+
+
+class CorrelationEngine:
+    """NavStore üzerinde pencere bazlı, önbellekli korelasyon hesaplayıcı."""
+
+    def __init__(self, store, block=CORRELATION_BLOCK):
+        self.store = store
+        self.block = block
+        self._lock = threading.Lock()
+        self._cache = {}    # (pencere, tarih, fon sayısı) → CorrelationMatrix
+        self._states = {}   # pencere → (_WindowState, fon_kodları)
+
+    def _key(self, window):
+        return (window, self.store.last_date, self.store.shape[1])
+
+    def cached(self, window):
+        """Deponun son günü için hazır sonuç; yoksa None (hesaplama yapmaz)."""
+        with self._lock:
+            return self._cache.get(self._key(window))
+
+    @monitor.timed("correlation_matrix", CATEGORY_COMPUTE)
+    def matrix(self, window):
+        """Son `window` işlem gününün korelasyon matrisi; depo yetersizse None."""
+        with self._lock:
+            key = self._key(window)
+            if key in self._cache:
+                return self._cache[key]
+            if self.store.shape[0] < window + 1:
+                return None
+
+            state = self._advance(window)
+            if state is None:
+                dates, codes, returns = self.store.return_matrix()
+                state = _WindowState(dates[-window:], returns[-window:], self.block)
+                self._states[window] = (state, codes)
+            codes = self._states[window][1]
+
+            result = CorrelationMatrix(codes, window, key[1], state.correlation(self.block))
+            self._cache[key] = result
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            return result
+
+    def _advance(self, window):
+        """Önceki pencere durumunu yeni günlerle kaydır; mümkün değilse None."""
+        entry = self._states.get(window)
+        if entry is None:
+            return None
+        state, codes = entry
+        if self.store.codes != codes:
+            return None      # Yeni fon sütunu eklendi → baştan hesapla
+
+        # Son kayıtlı gün yeniden çekildiği için o gün de değişmiş olabilir
+        last = state.dates[-1]
+        dates, _, returns = self.store.return_matrix(start=last - np.timedelta64(30, "D"))
+        newer = np.flatnonzero(dates >= last)
+        if not len(newer) or dates[newer[0]] != last or len(newer) - 1 > MAX_INCREMENTAL_DAYS:
+            return None
+        state.replace_last(dates[newer[0]], returns[newer[0]])
+        for i in newer[1:]:
+            state.push(dates[i], returns[i])
+        return state
@@ -6,13 +6,19 @@ GUI'den bağımsızdır, FundAnalyzer tarafından kullanılır.
 import os
 import json
 import re
+import threading
 import time
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+
+from perf_monitor import monitor, CATEGORY_FETCH, CATEGORY_PARSE, CATEGORY_PERSIST
 
 try:
     import requests
     HAS_REQUESTS = True
 except ImportError:
+    import urllib.parse
     import urllib.request
     import ssl
     HAS_REQUESTS = False
@@ -41,13 +47,131 @@ _PIE_COLORS = [
 ]
 
 
+# TEFAS güvenlik duvarı engellediğinde 200 ile dönen sayfanın imzası
+_REJECTED_MARKER = b'The requested URL was rejected'
+
+
+# TEFAS karşılaştırma API alanı → fon tablosu sütunu (TEFAS CSV dışa aktarımıyla aynı)
+_COMPARISON_COLUMNS = {
+    'FONKODU': 'Fon Kodu',
+    'FONUNVAN': 'Fon Adı',
+    'FONTURACIKLAMA': 'Fon Türü',
+    'GETIRI1A': '1 Ay (%)',
+    'GETIRI3A': '3 Ay (%)',
+    'GETIRI6A': '6 Ay (%)',
+    'GETIRI1Y': '1 Yıl (%)',
+    'GETIRI3Y': '3 Yıl (%)',
+    'GETIRI5Y': '5 Yıl (%)',
+}
+
+
+# TEFAS BindHistoryAllocation kısaltması → FonAnaliz pasta grafiğindeki varlık adı
+_ALLOCATION_ASSETS = {
+    'BB': 'Banka Bonosu',
+    'BYF': 'Borsa Yatırım Fonları Katılma Payları',
+    'D': 'Döviz',
+    'DB': 'Devlet Bonosu',
+    'DT': 'Devlet Tahvili',
+    'DÖT': 'Döviz Ödemeli Bono',
+    'EUT': 'Eurobond',
+    'FB': 'Finansman Bonosu',
+    'FKB': 'Yatırım Fonları Katılma Payları',
+    'GAS': 'Gayrimenkul Sertifikası',
+    'GSYKB': 'Girişim Sermayesi Yatırım Fonu Katılma Payları',
+    'GSYY': 'Girişim Sermayesi Yatırımları',
+    'GYKB': 'Gayrimenkul Yatırım Fonu Katılma Payları',
+    'GYY': 'Gayrimenkul Yatırımları',
+    'HB': 'Hazine Bonosu',
+    'HS': 'Hisse Senedi',
+    'KBA': 'Kamu Borçlanma Araçları',
+    'KH': 'Katılma Hesabı',
+    'KHAU': 'Katılma Hesabı (Altın)',
+    'KHD': 'Katılma Hesabı (Döviz)',
+    'KHTL': 'Katılma Hesabı (TL)',
+    'KKS': 'Kamu Kira Sertifikaları',
+    'KKSD': 'Kamu Kira Sertifikaları (Döviz)',
+    'KKSTL': 'Kamu Kira Sertifikaları (TL)',
+    'KKSYD': 'Kamu Kira Sertifikaları (Yurt Dışı)',
+    'KM': 'Kıymetli Madenler',
+    'KMBYF': 'Kıymetli Madenler Cinsinden BYF',
+    'KMKBA': 'Kıymetli Madenler Cinsinden Kamu Borçlanma Araçları',
+    'KMKKS': 'Kıymetli Madenler Kamu Kira Sertifikaları',
+    'KİBD': 'Kamu İç Borçlanma Araçları (Döviz)',
+    'OSKS': 'Özel Sektör Kira Sertifikaları',
+    'OST': 'Özel Sektör Tahvili',
+    'R': 'Repo',
+    'T': 'Türev Araçları',
+    'TPP': 'Takasbank Para Piyasası',
+    'TR': 'Ters-Repo',
+    'VDM': 'Vadeli Mevduat',
+    'VDMAU': 'Vadeli Mevduat (Altın)',
+    'VDMD': 'Vadeli Mevduat (Döviz)',
+    'VDMTL': 'Vadeli Mevduat (TL)',
+    'VİNT': 'Vadeli İşlemler Nakit Teminatları',
+    'YBA': 'Yabancı Borçlanma Araçları',
+    'YBKB': 'Yabancı Borsa Yatırım Fonları Katılma Payları',
+    'YBOSB': 'Yabancı Özel Sektör Borçlanma Araçları',
+    'YBYF': 'Yabancı Borsa Yatırım Fonları',
+    'YHS': 'Yabancı Hisse Senedi',
+    'YMK': 'Yabancı Menkul Kıymet',
+    'YYF': 'Yabancı Yatırım Fonları Katılma Payları',
+    'ÖKSYD': 'Özel Sektör Kira Sertifikaları (Yurt Dışı)',
+    'ÖSDB': 'Özel Sektör Dış Borçlanma Araçları',
+    'DİĞER': 'Diğer',
+}
+# Kayıtlardaki varlık olmayan alanlar
+_ALLOCATION_META_FIELDS = {'TARIH', 'FONKODU', 'FONUNVAN', 'FONTURACIKLAMA', 'BilFiyat'}
+
+# TEFAS tarihleri (epoch ms) Türkiye saatiyle gün başıdır
+_TR_TZ = timezone(timedelta(hours=3))
+
+
+class RequestRejected(Exception):
+    """TEFAS isteği güvenlik duvarı tarafından reddedildi (rate-limit)."""
+
+
+class _Flight:
+    """Sürmekte olan tek bir çağrı; bekleyenler aynı sonucu veya hatayı alır."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
 class DataFetcher:
     """Tüm veri çekme ve parse işlemlerini yöneten sınıf."""
 
-    def __init__(self, config):
+    def __init__(self, config, cache_path=None, tefas_base_url=None, yahoo_base_urls=None):
         self.config = config
+        self._cache_path = cache_path
         self._http_session = self._create_http_session()
         self._last_request_time = 0
+        self._throttle_lock = threading.Lock()
+        self._inflight = {}             # anahtar (URL / çağrı) → _Flight
+        self._inflight_lock = threading.Lock()
+        self.shared_calls = 0           # Sürmekte olan çağrıya katılarak ağa çıkmayan çağrı sayısı
+        self._macro_closes = {}         # Son tam makro yüklemesinin sembol → kapanışları
+
+        # Kaynak adresleri: parametre > ortam değişkeni > Config
+        self.tefas_base_url = (tefas_base_url or os.environ.get('TEFAS_BASE_URL')
+                               or config.TEFAS_BASE_URL).rstrip('/')
+        yahoo_env = os.environ.get('YAHOO_BASE_URL')
+        if yahoo_base_urls:
+            self.yahoo_base_urls = [u.rstrip('/') for u in yahoo_base_urls]
+        elif yahoo_env:
+            self.yahoo_base_urls = [yahoo_env.rstrip('/')]
+        else:
+            self.yahoo_base_urls = list(config.YAHOO_BASE_URLS)
+        # yfinance kendi adreslerini kullanır; Yahoo yönlendirilmişse devre dışı
+        self._use_yfinance = HAS_YFINANCE and not (yahoo_base_urls or yahoo_env)
 
     # ── HTTP Session ──────────────────────────────
 
@@ -65,30 +189,242 @@ class DataFetcher:
         """İstekler arası minimum bekleme süresini uygula."""
         if min_delay is None:
             min_delay = self.config.SINGLE_REQUEST_DELAY
-        elapsed = time.time() - self._last_request_time
-        if elapsed < min_delay:
-            time.sleep(min_delay - elapsed)
-        self._last_request_time = time.time()
+        # Slot kilit altında ayrılır; eşzamanlı çağıranlar sıraya girer
+        with self._throttle_lock:
+            now = time.time()
+            wait = self._last_request_time + min_delay - now
+            self._last_request_time = max(now, self._last_request_time + min_delay)
+        if wait > 0:
+            time.sleep(wait)
+
+    # ── Eşzamanlı istek birleştirme ───────────────
+
+    def _single_flight(self, key, func):
+        """Aynı anahtarla eşzamanlı çağrılar tek func() çağrısını paylaşır.
+
+        İlk gelen çağrıyı yürütür; diğerleri biter bitmez aynı sonucu alır
+        (hata da herkese iletilir). Çağrı bitince anahtar serbest kalır, sonuç
+        saklanmaz.
+        """
+        flight, leader = self._claim_flight(key)
+        if not leader:
+            return flight.wait()
+        try:
+            result = func()
+        except BaseException as e:
+            self._settle_flight(key, flight, error=e)
+            raise
+        self._settle_flight(key, flight, result)
+        return result
+
+    def _claim_flight(self, key):
+        """(_Flight, leader): anahtarda süren çağrı yoksa yenisi açılır ve leader True olur.
+
+        leader sonucu _settle_flight ile bildirmek zorundadır; diğerleri flight.wait() ile bekler.
+        """
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self.shared_calls += 1
+        return flight, leader
+
+    def _settle_flight(self, key, flight, result=None, error=None):
+        """Uçuşu sonuçlandır: anahtarı serbest bırak, bekleyenleri uyandır."""
+        flight.result = result
+        flight.error = error
+        with self._inflight_lock:
+            del self._inflight[key]
+        flight.done.set()
+
+    def _inflight_call(self, key):
+        """Anahtarla sürmekte olan çağrı (_Flight) veya None."""
+        with self._inflight_lock:
+            return self._inflight.get(key)
 
     # ── HTML Çekme ────────────────────────────────
 
+    def fund_page_url(self, fon_kodu):
+        """Fonun FonAnaliz.aspx adresi."""
+        return f"{self.tefas_base_url}/FonAnaliz.aspx?FonKod={fon_kodu}"
+
+    def fetch_raw(self, url):
+        """Tek bir URL için ham yanıt gövdesini (bytes) çek.
+
+        Aynı URL için sürmekte olan istek varsa ona katılır (tek ağ isteği).
+
+        Raises:
+            RequestRejected: TEFAS güvenlik duvarı isteği reddettiyse
+        """
+        return self._single_flight(("raw", url), lambda: self._fetch_raw_once(url))
+
+    def _fetch_raw_once(self, url):
+        with monitor.span("fetch_html", CATEGORY_FETCH) as span:
+            if HAS_REQUESTS:
+                resp = self._http_session.get(url, timeout=15, verify=False)
+                resp.raise_for_status()
+                raw = resp.content
+            else:
+                ctx = ssl.create_default_context()
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+                req = urllib.request.Request(url, headers=_DEFAULT_HEADERS)
+                with urllib.request.urlopen(req, timeout=15, context=ctx) as resp:
+                    raw = resp.read()
+            span.bytes = len(raw)
+        if _REJECTED_MARKER in raw[:2000]:
+            raise RequestRejected(f"TEFAS request rejected: {url}")
+        return raw
+
     def fetch_html(self, url):
-        """Tek bir URL için HTML içeriğini çek."""
-        if HAS_REQUESTS:
-            resp = self._http_session.get(url, timeout=15, verify=False)
-            resp.encoding = 'utf-8'
-            return resp.text
-        else:
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            req = urllib.request.Request(url, headers=_DEFAULT_HEADERS)
-            with urllib.request.urlopen(req, timeout=15, context=ctx) as resp:
-                return resp.read().decode('utf-8')
+        """Tek bir URL için HTML içeriğini çek (bkz. fetch_raw)."""
+        return self.fetch_raw(url).decode('utf-8', errors='replace')
+
+    def fetch_fund_page_raw(self, fon_kodu):
+        """Fon sayfasını parse etmeden ham bytes olarak çek (toplu çekme hattı için)."""
+        return self.fetch_raw(self.fund_page_url(fon_kodu))
+
+    def fetch_fund_page(self, fon_kodu):
+        """Fon sayfasını çek ve parse et. (allocation_data, daily_return) döndürür.
+
+        Aynı fon için eşzamanlı çağrılar tek indirme ve tek parse'ı paylaşır.
+        """
+        url = self.fund_page_url(fon_kodu)
+        return self._single_flight(("page", url), lambda: parse_fund_page(self.fetch_raw(url)))
+
+    def claim_fund_page(self, fon_kodu):
+        """Toplu çekme hattı için fonun sayfa uçuşu: (flight, leader).
+
+        Hat parse'ı kendi havuzunda yapar; sonucu settle_fund_page ile bildirince
+        aynı anda fetch_fund_page ile bekleyen çağrılar (ör. detay tıklaması) aynı
+        parse sonucunu alır. leader False ise fon başka yerde çekiliyordur;
+        sonuç flight.wait() ile alınır.
+        """
+        return self._claim_flight(("page", self.fund_page_url(fon_kodu)))
+
+    def settle_fund_page(self, fon_kodu, flight, result=None, error=None):
+        """claim_fund_page ile açılan uçuşu (allocation, daily) sonucu veya hatayla kapat."""
+        self._settle_flight(("page", self.fund_page_url(fon_kodu)), flight, result, error)
+
+    def post_json(self, url, form, referer=None):
+        """TEFAS API'sine form POST et, JSON yanıtı döndür.
+
+        Raises:
+            RequestRejected: TEFAS güvenlik duvarı isteği reddettiyse
+        """
+        headers = {
+            'Accept': 'application/json, text/javascript, */*; q=0.01',
+            'X-Requested-With': 'XMLHttpRequest',
+        }
+        if referer:
+            headers['Referer'] = referer
+        with monitor.span("post_json", CATEGORY_FETCH) as span:
+            if HAS_REQUESTS:
+                resp = self._http_session.post(url, data=form, headers=headers,
+                                               timeout=30, verify=False)
+                resp.raise_for_status()
+                raw = resp.content
+            else:
+                ctx = ssl.create_default_context()
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+                body = urllib.parse.urlencode(form).encode('utf-8')
+                req = urllib.request.Request(url, data=body,
+                                             headers={**_DEFAULT_HEADERS, **headers})
+                with urllib.request.urlopen(req, timeout=30, context=ctx) as resp:
+                    raw = resp.read()
+            span.bytes = len(raw)
+        if _REJECTED_MARKER in raw[:2000]:
+            raise RequestRejected(f"TEFAS request rejected: {url}")
+        return json.loads(raw.decode('utf-8'))
+
+    # ── TEFAS Toplu Getiri Tablosu ────────────────
+
+    def publication_cutoff(self, now=None):
+        """Son yayın sınırı: şu ana kadarki en yakın iş günü TEFAS_PUBLISH_HOUR (TR saati).
+
+        Bu andan önce çekilmiş getiri tablosu eski sayılır.
+        """
+        now = now or datetime.now(_TR_TZ)
+        cutoff = now.replace(hour=self.config.TEFAS_PUBLISH_HOUR, minute=0, second=0, microsecond=0)
+        if cutoff > now:
+            cutoff -= timedelta(days=1)
+        while cutoff.weekday() >= 5:
+            cutoff -= timedelta(days=1)
+        return cutoff
+
+    def get_comparison_cache_path(self):
+        return os.path.join(os.path.dirname(self.get_cache_path()),
+                            self.config.COMPARISON_CACHE_FILE)
+
+    def fetch_comparison_records(self):
+        """Tüm BES evreninin 1A/3A/6A/1Y/3Y/5Y getirilerini tek istekte çek (ham kayıtlar)."""
+        form = {
+            'calismatipi': '2',            # Dönemsel getiri
+            'fontip': self.config.TEFAS_FUND_KIND,
+            'sfontur': '', 'kurucukod': '', 'fongrup': '',
+            'bastarih': 'Başlangıç', 'bittarih': 'Bitiş',
+            'fonturkod': '', 'fonunvantip': '',
+            'strperiod': '1,1,1,1,1,1,1',  # 1A, 3A, 6A, YB, 1Y, 3Y, 5Y
+            'islemdurum': '1',             # Yalnızca işlem gören fonlar
+        }
+        data = self.post_json(f"{self.tefas_base_url}/api/DB/BindComparisonFundReturns",
+                              form, referer=f"{self.tefas_base_url}/FonKarsilastirma.aspx")
+        records = data.get('data') if isinstance(data, dict) else None
+        if not isinstance(records, list):
+            raise ValueError("TEFAS karşılaştırma yanıtında 'data' listesi yok")
+        return records
+
+    @staticmethod
+    def comparison_records_to_frame(records, performance_columns):
+        """Ham API kayıtlarını load_and_prepare_data ile aynı tabloya dönüştür."""
+        df = pd.DataFrame.from_records(records)
+        df = df.rename(columns=_COMPARISON_COLUMNS)
+        columns = [c for c in _COMPARISON_COLUMNS.values() if c in df.columns]
+        return DataFetcher.prepare_fund_frame(df[columns].copy(), performance_columns)
+
+    def fetch_comparison_returns(self, force=False):
+        """Toplu getiri tablosunu döndür; son yayın sınırından sonra çekilmişse disk önbelleğinden.
+
+        Yanıtta yayın tarihi olmadığından kayıt çekim zamanıyla saklanır; yayından
+        önce (veya tatilde) çekilen tablo sonraki yayın sınırı geçince yenilenir.
+        force=True önbelleği atlar. (df, çekim_zamanı "YYYY-AA-GG SS:DD", önbellekten_mi)
+        döndürür.
+        """
+        cache_path = self.get_comparison_cache_path()
+        columns = self.config.PERFORMANCE_COLUMNS
+
+        if not force and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                fetched_at = datetime.fromisoformat(cached["fetched_at"])
+                if fetched_at >= self.publication_cutoff() and cached.get("records"):
+                    return (self.comparison_records_to_frame(cached["records"], columns),
+                            fetched_at.strftime("%Y-%m-%d %H:%M"), True)
+            except Exception:
+                pass
+
+        fetched_at = datetime.now(_TR_TZ)
+        records = self.fetch_comparison_records()
+        df = self.comparison_records_to_frame(records, columns)
+        try:
+            with monitor.span("save_comparison_cache", CATEGORY_PERSIST) as span:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump({"fetched_at": fetched_at.isoformat(), "records": records},
+                              f, ensure_ascii=False, separators=(',', ':'))
+                    span.bytes = f.tell()
+        except Exception as e:
+            print(f"Getiri tablosu önbelleğe yazılamadı: {e}")
+        return df, fetched_at.strftime("%Y-%m-%d %H:%M"), False
 
     # ── TEFAS Parse ───────────────────────────────
 
     @staticmethod
+    @monitor.timed("parse_allocation_data", CATEGORY_PARSE)
     def parse_allocation_data(html_content):
         """HTML içeriğinden varlık dağılımı verilerini çıkar (Highcharts)."""
         allocation_data = {}
@@ -127,22 +463,193 @@ class DataFetcher:
         return allocation_data
 
     @staticmethod
+    @monitor.timed("parse_daily_return", CATEGORY_PARSE)
     def parse_daily_return(html_content):
         """HTML içeriğinden günlük getiri bilgisini çıkar."""
         pattern = r'Günlük Getiri \(%\).*?<span>([^<]+)</span>'
         match = re.search(pattern, html_content, re.DOTALL | re.IGNORECASE)
         return match.group(1).strip() if match else None
 
+    # ── TEFAS Geçmiş Veriler ──────────────────────
+
+    @staticmethod
+    def _date_chunks(start, end, chunk_days):
+        """[start, end] aralığını en fazla chunk_days günlük parçalara böl."""
+        while start <= end:
+            chunk_end = min(end, start + timedelta(days=chunk_days - 1))
+            yield start, chunk_end
+            start = chunk_end + timedelta(days=1)
+
+    @staticmethod
+    def _tefas_date(value):
+        """TEFAS TARIH alanı (epoch ms, str/int) → ISO tarih."""
+        return datetime.fromtimestamp(int(value) / 1000, tz=_TR_TZ).date().isoformat()
+
+    def _fetch_history_records(self, endpoint, start, end):
+        """TEFAS geçmiş uç noktasından [start, end] kayıtlarını parça parça üret.
+
+        Aralık TEFAS_HISTORY_CHUNK_DAYS günlük isteklere bölünür; istekler arasında
+        BATCH_REQUEST_DELAY beklenir. (tarih_iso, fon_kodu, kayıt) üretir.
+        """
+        url = f"{self.tefas_base_url}/api/DB/{endpoint}"
+        referer = f"{self.tefas_base_url}/TarihselVeriler.aspx"
+        for chunk_start, chunk_end in self._date_chunks(start, end,
+                                                        self.config.TEFAS_HISTORY_CHUNK_DAYS):
+            self.throttle_request(self.config.BATCH_REQUEST_DELAY)
+            form = {
+                'fontip': self.config.TEFAS_FUND_KIND,
+                'sfontur': '', 'fonkod': '', 'fongrup': '',
+                'bastarih': chunk_start.strftime('%d.%m.%Y'),
+                'bittarih': chunk_end.strftime('%d.%m.%Y'),
+                'fonturkod': '', 'fonunvantip': '', 'kurucukod': '',
+            }
+            data = self.post_json(url, form, referer=referer)
+            for record in (data.get('data') or []) if isinstance(data, dict) else []:
+                try:
+                    day = self._tefas_date(record['TARIH'])
+                    code = str(record['FONKODU']).strip()
+                except (KeyError, TypeError, ValueError):
+                    continue
+                yield day, code, record
+
+    def fetch_price_history(self, start, end):
+        """Tüm BES fonlarının [start, end] arası günlük birim fiyatları.
+
+        {tarih_iso: {fon_kodu: fiyat}} döndürür.
+        """
+        prices = {}
+        for day, code, record in self._fetch_history_records('BindHistoryInfo', start, end):
+            try:
+                price = float(record.get('FIYAT'))
+            except (TypeError, ValueError):
+                continue
+            if price > 0:
+                prices.setdefault(day, {})[code] = price
+        return prices
+
+    def fetch_allocation_history(self, start, end):
+        """Tüm BES fonlarının [start, end] arası varlık dağılımlarını toplu çek.
+
+        {tarih_iso: {fon_kodu: {varlık_adı: yüzde}}} döndürür.
+        """
+        history = {}
+        for day, code, record in self._fetch_history_records('BindHistoryAllocation',
+                                                             start, end):
+            assets = {}
+            for field, value in record.items():
+                if field in _ALLOCATION_META_FIELDS or not value:
+                    continue
+                try:
+                    pct = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if pct > 0:
+                    name = _ALLOCATION_ASSETS.get(field, field)
+                    assets[name] = assets.get(name, 0.0) + pct
+            if assets:
+                history.setdefault(day, {})[code] = assets
+        return history
+
+    @staticmethod
+    def latest_allocations(history):
+        """Geçmişten her fonun en güncel dağılımını allocation_cache biçiminde çıkar.
+
+        Renkler FonAnaliz grafiğindeki gibi büyükten küçüğe palet sırasıyla verilir.
+        """
+        latest = {}
+        for day in sorted(history):
+            latest.update(history[day])
+        result = {}
+        for code, assets in latest.items():
+            ordered = sorted(assets.items(), key=lambda kv: kv[1], reverse=True)
+            result[code] = {
+                name: {'percentage': round(pct, 2),
+                       'color': _PIE_COLORS[i % len(_PIE_COLORS)]}
+                for i, (name, pct) in enumerate(ordered)
+            }
+        return result
+
+    def get_allocation_history_path(self):
+        return os.path.join(os.path.dirname(self.get_cache_path()),
+                            self.config.ALLOCATION_HISTORY_FILE)
+
+    def load_allocation_history(self):
+        try:
+            with open(self.get_allocation_history_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_allocation_history(self, history):
+        """Geçmişi ALLOCATION_HISTORY_DAYS günle sınırlayıp diske yaz."""
+        cutoff = (date.today() - timedelta(days=self.config.ALLOCATION_HISTORY_DAYS)).isoformat()
+        trimmed = {day: funds for day, funds in history.items() if day >= cutoff}
+        try:
+            with monitor.span("save_allocation_history", CATEGORY_PERSIST) as span:
+                with open(self.get_allocation_history_path(), 'w', encoding='utf-8') as f:
+                    json.dump(trimmed, f, ensure_ascii=False, separators=(',', ':'))
+                    span.bytes = f.tell()
+        except Exception as e:
+            print(f"Dağılım geçmişi kaydedilemedi: {e}")
+        return trimmed
+
+    def fetch_bulk_allocations(self, days=7):
+        """Son `days` günün dağılımlarını toplu çekip kayıtlı geçmişe ekle.
+
+        Yalnızca kayıtlı geçmişte olmayan günler istenir (bugün her zaman yenilenir).
+        (allocation_cache biçiminde güncel dağılımlar, tüm geçmiş) döndürür.
+        """
+        history = self.load_allocation_history()
+        end = date.today()
+        start = end - timedelta(days=days - 1)
+        known = {day for day in history if day < end.isoformat()}
+        while start < end and start.isoformat() in known:
+            start += timedelta(days=1)
+        history.update(self.fetch_allocation_history(start, end))
+        history = self.save_allocation_history(history)
+        return self.latest_allocations(history), history
+
+    # ── Fon Tablosu ───────────────────────────────
+
+    @staticmethod
+    def prepare_fund_frame(df, performance_columns):
+        """Ham fon karşılaştırma tablosunu analiz formatına getir.
+
+        Metin sütunları str'ye, getiri sütunları ("12,34" / "%5") float'a
+        çevrilir; eksik değerler 0 olur (0 = veri yok).
+        """
+        required_columns = {"Fon Kodu", "Fon Adı", "Fon Türü"}.union(performance_columns)
+        missing_columns = required_columns - set(df.columns)
+
+        if missing_columns:
+            raise ValueError(f"Eksik sütunlar: {', '.join(missing_columns)}")
+
+        for col in ['Fon Türü', 'Fon Kodu', 'Fon Adı']:
+            df[col] = df[col].astype(str)
+
+        for col in performance_columns:
+            df[col] = pd.to_numeric(
+                df[col].astype(str)
+                .str.replace(',', '.')
+                .str.replace('%', '')
+                .str.strip(),
+                errors='coerce'
+            )
+
+        return df.fillna(0)
+
     # ── Yahoo Finance ─────────────────────────────
 
     def fetch_yahoo_quote(self, symbol):
-        """Yahoo'dan ~3 aylık kapanış fiyatlarını çek."""
+        """Yahoo'dan ~3 aylık kapanış fiyatlarını çek (eşzamanlı çağrılar birleştirilir)."""
+        return self._single_flight(("yahoo_3mo", symbol), lambda: self._fetch_yahoo_quote_once(symbol))
+
+    def _fetch_yahoo_quote_once(self, symbol):
         _ua = {'User-Agent': _USER_AGENT}
 
-        for host in ['query2', 'query1']:
+        for base in self.yahoo_base_urls:
             try:
-                url = (f"https://{host}.finance.yahoo.com"
-                       f"/v8/finance/chart/{symbol}?range=3mo&interval=1d")
+                url = f"{base}/v8/finance/chart/{symbol}?range=3mo&interval=1d"
                 if HAS_REQUESTS:
                     resp = self._http_session.get(url, timeout=10, verify=False)
                     if resp.status_code != 200:
@@ -168,7 +675,7 @@ class DataFetcher:
 
         # Spark API fallback
         try:
-            url = (f"https://query2.finance.yahoo.com"
+            url = (f"{self.yahoo_base_urls[0]}"
                    f"/v7/finance/spark?symbols={symbol}&range=3mo&interval=1d")
             if HAS_REQUESTS:
                 resp = self._http_session.get(url, timeout=10, verify=False)
@@ -186,12 +693,14 @@ class DataFetcher:
         return None
 
     def fetch_yahoo_quote_short(self, symbol):
-        """Son 5 günlük kapanış fiyatlarını çek (hafif istek)."""
+        """Son 5 günlük kapanış fiyatlarını çek (hafif istek, eşzamanlı çağrılar birleştirilir)."""
+        return self._single_flight(("yahoo_5d", symbol), lambda: self._fetch_yahoo_quote_short_once(symbol))
+
+    def _fetch_yahoo_quote_short_once(self, symbol):
         _ua = {'User-Agent': _USER_AGENT}
-        for host in ['query2', 'query1']:
+        for base in self.yahoo_base_urls:
             try:
-                url = (f"https://{host}.finance.yahoo.com"
-                       f"/v8/finance/chart/{symbol}?range=5d&interval=1d")
+                url = f"{base}/v8/finance/chart/{symbol}?range=5d&interval=1d"
                 if HAS_REQUESTS:
                     resp = self._http_session.get(url, timeout=8, verify=False)
                     if resp.status_code != 200:
@@ -217,10 +726,28 @@ class DataFetcher:
         return None
 
     def fetch_yahoo_batch(self, symbols_list):
-        """Birden fazla sembolü toplu çek."""
+        """Birden fazla sembolü toplu çek.
+
+        Tam makro yüklemesi sürüyorsa onun bitmesi beklenir ve kapanışları
+        kullanılır; yalnızca onda olmayan semboller ayrıca çekilir.
+        """
+        return self._single_flight(("yahoo_batch", tuple(symbols_list)),
+                                   lambda: self._fetch_yahoo_batch_once(symbols_list))
+
+    def _fetch_yahoo_batch_once(self, symbols_list):
         result = {}
+        full = self._inflight_call(("macro_full",))
+        if full is not None:
+            try:
+                full.wait()
+                result = {sym: closes for sym, closes in self._macro_closes.items()
+                          if sym in symbols_list}
+            except Exception:
+                pass
+            if len(result) == len(symbols_list):
+                return result
 
-        if HAS_YFINANCE:
+        if self._use_yfinance and not result:
             import logging
             logging.getLogger('yfinance').setLevel(logging.CRITICAL)
             try:
@@ -250,10 +777,143 @@ class DataFetcher:
 
         return result
 
+    def fetch_yahoo_history(self, symbol, range_="5y"):
+        """Yahoo'dan tarihli günlük kapanışlar: ([ISO tarih], [kapanış]); alınamazsa None."""
+        _ua = {'User-Agent': _USER_AGENT}
+        for base in self.yahoo_base_urls:
+            try:
+                url = f"{base}/v8/finance/chart/{symbol}?range={range_}&interval=1d"
+                if HAS_REQUESTS:
+                    resp = self._http_session.get(url, timeout=15, verify=False)
+                    if resp.status_code != 200:
+                        continue
+                    data = resp.json()
+                else:
+                    ctx = ssl.create_default_context()
+                    ctx.check_hostname = False
+                    ctx.verify_mode = ssl.CERT_NONE
+                    req = urllib.request.Request(url, headers=_ua)
+                    with urllib.request.urlopen(req, timeout=15, context=ctx) as r:
+                        data = json.loads(r.read().decode('utf-8'))
+
+                chart = data.get('chart', {}).get('result', [])
+                if chart:
+                    stamps = chart[0].get('timestamp', []) or []
+                    closes = (chart[0].get('indicators', {})
+                              .get('quote', [{}])[0].get('close', []) or [])
+                    pairs = [(datetime.fromtimestamp(ts, tz=_TR_TZ).date().isoformat(), float(c))
+                             for ts, c in zip(stamps, closes) if c is not None]
+                    if len(pairs) >= 2:
+                        return [d for d, _ in pairs], [c for _, c in pairs]
+            except Exception:
+                continue
+        return None
+
+    def fetch_macro_history(self, names=("BIST-100", "Altın", "USD/TRY"), range_="5y"):
+        """Rejim göstergelerinin kapanış geçmişi: {ad: ([ISO tarih], [kapanış])}.
+
+        MACRO_USD_TO_TL göstergeleri aynı (veya önceki) günün USD/TRY kapanışıyla
+        TL'ye çevrilir — load_macro_data ile aynı. Alınamayan gösterge atlanır.
+        """
+        symbols = self.config.MACRO_SYMBOLS
+        wanted = [n for n in names if n in symbols]
+        if any(n in self.config.MACRO_USD_TO_TL for n in wanted) and "USD/TRY" not in wanted:
+            wanted.append("USD/TRY")
+
+        history = {}
+        for name in wanted:
+            series = self.fetch_yahoo_history(symbols[name], range_)
+            if series:
+                history[name] = series
+
+        usd = history.get("USD/TRY")
+        for name in list(history):
+            if name not in self.config.MACRO_USD_TO_TL:
+                continue
+            if not usd:
+                del history[name]
+                continue
+            usd_dates, usd_closes = usd
+            dates, closes = history[name]
+            converted_dates, converted = [], []
+            j = -1
+            for day, close in zip(dates, closes):
+                while j + 1 < len(usd_dates) and usd_dates[j + 1] <= day:
+                    j += 1
+                if j >= 0:
+                    converted_dates.append(day)
+                    converted.append(close * usd_closes[j])
+            history[name] = (converted_dates, converted)
+        return {n: history[n] for n in names if n in history}
+
+    def get_macro_history_path(self):
+        return os.path.join(os.path.dirname(self.get_cache_path()),
+                            self.config.MACRO_HISTORY_FILE)
+
+    def load_macro_history(self):
+        """Kayıtlı makro geçmiş: ({ad: ([ISO tarih], [kapanış])}, son çekim günü ISO); yoksa ({}, None)."""
+        try:
+            with open(self.get_macro_history_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            history = {name: (list(dates), list(closes))
+                       for name, (dates, closes) in data["history"].items()}
+            return history, data.get("fetched")
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}, None
+
+    def save_macro_history(self, history, fetched):
+        try:
+            with monitor.span("save_macro_history", CATEGORY_PERSIST) as span:
+                with open(self.get_macro_history_path(), 'w', encoding='utf-8') as f:
+                    json.dump({"fetched": fetched, "history": history}, f,
+                              ensure_ascii=False, separators=(',', ':'))
+                    span.bytes = f.tell()
+        except Exception as e:
+            print(f"Makro geçmiş kaydedilemedi: {e}")
+
+    def update_macro_history(self, history=None, fetched=None):
+        """Kayıtlı makro geçmişe eksik günleri ekle; (geçmiş, son çekim günü) döndürür.
+
+        history boşsa diskten okunur. Bugün zaten çekildiyse istek yapılmaz.
+        Son kayıt MACRO_HISTORY_REFRESH_DAYS günden yeniyse yalnızca son ay çekilir,
+        aksi halde tüm geçmiş; aynı günün kapanışı yenisiyle değiştirilir.
+        """
+        if not history:
+            history, fetched = self.load_macro_history()
+        today = date.today()
+        if history and fetched == today.isoformat():
+            return history, fetched
+
+        last = min((dates[-1] for dates, _ in history.values() if dates), default=None)
+        recent = (last is not None and (today - date.fromisoformat(last)).days
+                  <= self.config.MACRO_HISTORY_REFRESH_DAYS)
+        fresh = self.fetch_macro_history(range_="1mo" if recent else "5y")
+        if not fresh:
+            return history, fetched
+
+        merged = dict(history)
+        for name, (dates, closes) in fresh.items():
+            series = dict(zip(*merged.get(name, ([], []))))
+            series.update(zip(dates, closes))
+            days = sorted(series)
+            merged[name] = (days, [series[d] for d in days])
+        # Eksik gösterge varsa sonraki çağrıda yeniden denenir
+        if set(history) <= set(fresh):
+            fetched = today.isoformat()
+        self.save_macro_history(merged, fetched)
+        return merged, fetched
+
     # ── Makro Veri Yükleme ────────────────────────
 
+    @monitor.timed("macro_refresh_full", CATEGORY_FETCH)
     def load_macro_data(self):
-        """Piyasa verilerini çek, hesapla ve dict olarak döndür."""
+        """Piyasa verilerini çek, hesapla ve dict olarak döndür.
+
+        Eşzamanlı çağrılar (ör. açılış yüklemesi ve elle yenileme) tek yüklemeyi paylaşır.
+        """
+        return self._single_flight(("macro_full",), self._load_macro_data_once)
+
+    def _load_macro_data_once(self):
         import logging
         logging.getLogger('yfinance').setLevel(logging.CRITICAL)
 
@@ -263,7 +923,7 @@ class DataFetcher:
         errors = []
         all_closes = {}
 
-        if HAS_YFINANCE:
+        if self._use_yfinance:
             try:
                 all_symbols = list(symbols.values())
                 joined = ' '.join(all_symbols)
@@ -299,6 +959,7 @@ class DataFetcher:
             except Exception:
                 errors.append(name)
 
+        self._macro_closes = {symbols[name]: closes for name, closes in all_closes.items()}
         usdtry_closes = all_closes.get("USD/TRY")
 
         for name, closes in all_closes.items():
@@ -333,6 +994,8 @@ class DataFetcher:
     # ── Disk Önbellek ─────────────────────────────
 
     def get_cache_path(self):
+        if self._cache_path:
+            return self._cache_path
         return os.path.join(os.path.dirname(os.path.abspath(__file__)),
                             self.config.CACHE_FILE)
 
@@ -361,8 +1024,10 @@ class DataFetcher:
                 "allocations": allocations,
                 "macro_data": macro_data,
             }
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            with monitor.span("save_cache", CATEGORY_PERSIST) as span:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                    span.bytes = f.tell()
         except Exception as e:
             print(f"Önbellek kaydedilemedi: {e}")
 
@@ -372,3 +1037,11 @@ class DataFetcher:
         if os.path.exists(cache_path):
             os.remove(cache_path)
 
+
+def parse_fund_page(raw):
+    """Ham fon sayfasından (allocation_data, daily_return) çıkar.
+
+    Modül seviyesindedir; toplu çekmede ayrı süreçlerde çalıştırılabilir.
+    """
+    html = raw.decode('utf-8', errors='replace') if isinstance(raw, bytes) else raw
+    return DataFetcher.parse_allocation_data(html), DataFetcher.parse_daily_return(html)
@@ -0,0 +1,155 @@
+"""
+TEFAS BES Fon Analizi — Tanılama (cProfile + tracemalloc) Modülü
+"Uygulama yavaş / çok bellek kullanıyor" şikayetleri için seçili bir işlemi
+veya bir zaman penceresini profiller. Çıktılar önbellek dosyasının yanına yazılır:
+    diag_<ad>_<zaman>.prof          → snakeviz / pstats ile açılır
+    diag_<ad>_<zaman>_cpu.txt       → kümülatif süreye göre ilk 40 fonksiyon
+    diag_<ad>_<zaman>_alloc.txt     → en çok bellek ayıran satırlar
+    diag_<ad>_<zaman>.tracemalloc   → tracemalloc.Snapshot.load ile açılır
+GUI'den bağımsızdır. TEFAS_DIAG=1 ile açık başlar; Görünüm → Tanılama menüsünden
+çalışırken açılıp kapatılabilir.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 30
+TRACEMALLOC_FRAMES = 10
+
+
+class DiagnosticCapture:
+    """İşlem veya zaman penceresi bazında profil / bellek yakalama."""
+
+    def __init__(self, output_dir=None, enabled=None):
+        self.output_dir = output_dir
+        self.enabled = (os.environ.get("TEFAS_DIAG") == "1") if enabled is None else enabled
+        # Aynı anda tek profiler çalışabilir (cProfile kısıtı)
+        self._busy = threading.Lock()
+        self._window = None  # (ad, profiler, tracemalloc'u biz mi başlattık)
+
+    @property
+    def window_active(self):
+        return self._window is not None
+
+    # ── İşlem Bazlı ───────────────────────────────
+
+    @contextmanager
+    def capture(self, name):
+        """`with diag.capture("forecast"):` — kapalıysa veya başka kayıt sürüyorsa şeffaf.
+
+        cProfile yalnızca çağıran thread'i izler; işlem kendi thread'inde sarılmalı.
+        """
+        if not self.enabled or not self._busy.acquire(blocking=False):
+            yield None
+            return
+        try:
+            started_tm = self._start_tracemalloc()
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield profiler
+            finally:
+                profiler.disable()
+                self._write(name, profiler, started_tm)
+        finally:
+            self._busy.release()
+
+    def profiled(self, name):
+        """Fonksiyon/metot dekoratörü — capture(name) ile sarar."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.capture(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ── Zaman Penceresi ───────────────────────────
+
+    def start_window(self, name="pencere"):
+        """Çağıran (ana) thread'de profil kaydını başlat. Başlatılamazsa False."""
+        if self._window is not None or not self._busy.acquire(blocking=False):
+            return False
+        started_tm = self._start_tracemalloc()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        self._window = (name, profiler, started_tm)
+        return True
+
+    def stop_window(self):
+        """Pencereyi kapat ve çıktıları yaz. Yazılan .prof yolunu döndürür."""
+        if self._window is None:
+            return None
+        name, profiler, started_tm = self._window
+        self._window = None
+        try:
+            profiler.disable()
+            return self._write(name, profiler, started_tm)
+        finally:
+            self._busy.release()
+
+    # ── Çıktı ─────────────────────────────────────
+
+    @staticmethod
+    def _start_tracemalloc():
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        return True
+
+    def _write(self, name, profiler, started_tm):
+        """Çıktıları yaz; .prof yolu veya hata olursa None.
+
+        Yazma hatası yalnızca yazdırılır; sarılan işlemin sonucunu veya hatasını değiştirmez.
+        """
+        try:
+            return self._write_outputs(name, profiler, started_tm)
+        except Exception as e:
+            print(f"[Tanılama] Çıktı yazılamadı: {e}")
+            return None
+        finally:
+            if started_tm and tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    def _write_outputs(self, name, profiler, started_tm):
+        output_dir = self.output_dir or os.path.dirname(os.path.abspath(__file__))
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(output_dir, f"diag_{name}_{stamp}")
+
+        profiler.dump_stats(base + ".prof")
+
+        cpu = io.StringIO()
+        pstats.Stats(profiler, stream=cpu).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        with open(base + "_cpu.txt", "w", encoding="utf-8") as f:
+            f.write(cpu.getvalue())
+
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tm:
+                tracemalloc.stop()
+            snapshot.dump(base + ".tracemalloc")
+            with open(base + "_alloc.txt", "w", encoding="utf-8") as f:
+                f.write(f"İzlenen bellek: şu an {current / 1e6:.1f} MB, tepe {peak / 1e6:.1f} MB\n\n")
+                for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                    f.write(f"{stat.size / 1024:10.1f} KB  {stat.count:8d} blok  {stat.traceback[0]}\n")
+
+        print(f"[Tanılama] {base}.prof kaydedildi")
+        return base + ".prof"
+
+
+# Uygulama genelinde tek örnek; çıktı dizinini main.py önbellek yoluna göre ayarlar
+diag = DiagnosticCapture()
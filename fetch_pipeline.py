@@ -0,0 +1,171 @@
+"""
+TEFAS BES Fon Analizi — Toplu Çekme Hattı
+İndirme (I/O thread'leri) ile HTML parse'ı (süreç havuzu) birbirinden ayırır.
+Regex parse GIL'i Tk ana döngüsüne karşı tutmaz; parse verimi çekirdek
+sayısıyla ölçeklenir. Sonuçlar kuyruk üzerinden tek bir tüketiciye akar,
+önbelleğe yazma yalnızca run() çağıran thread'de yapılır.
+GUI'den bağımsızdır.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from data_fetcher import parse_fund_page
+from perf_monitor import monitor, CATEGORY_PARSE
+
+_IN_FLIGHT_PER_PROCESS = 4  # Havuzda bekleyen ham sayfa sınırı (bellek için)
+
+
+def _timed_parse(raw):
+    """Alt süreçte parse et; süreyi ana süreçteki ölçüme taşımak için döndür."""
+    start = time.perf_counter()
+    allocation, daily = parse_fund_page(raw)
+    return allocation, daily, time.perf_counter() - start
+
+
+class FundPagePipeline:
+    """Fon sayfalarını N thread'le indirip süreç havuzunda parse eden hat."""
+
+    def __init__(self, fetcher, io_workers=None, parse_processes=None, delay=None):
+        config = fetcher.config
+        self.fetcher = fetcher
+        self.io_workers = max(1, io_workers or config.BATCH_FETCH_WORKERS)
+        self.parse_processes = (config.PARSE_PROCESSES if parse_processes is None
+                                else parse_processes)
+        self.delay = config.BATCH_REQUEST_DELAY if delay is None else delay
+        self.min_pool_pages = config.PARSE_POOL_MIN_PAGES
+        self.pool_used = False
+
+    def _start_pool(self, n_pages):
+        """Süreç havuzunu başlat; gereksizse veya başlatılamazsa None (aynı thread'de parse)."""
+        processes = min(self.parse_processes, os.cpu_count() or 1)
+        if processes < 1 or n_pages < self.min_pool_pages:
+            return None
+        try:
+            # fork, Tk ve açık HTTP oturumu olan çok thread'li süreçte güvenli değil
+            return ProcessPoolExecutor(max_workers=processes,
+                                       mp_context=multiprocessing.get_context("spawn"))
+        except Exception as e:
+            print(f"Parse havuzu başlatılamadı, aynı thread'de parse edilecek: {e}")
+            return None
+
+    def run(self, codes, on_result, cancel=None):
+        """codes listesindeki fonları çek/parse et.
+
+        on_result(fon_kodu, allocation, daily, error) her fon için run()'ı çağıran
+        thread'de çağrılır; error None değilse allocation/daily None'dır.
+        cancel() True döndüğünde yeni indirme başlatılmaz, süren işler tamamlanır.
+        Teslim edilen sonuç sayısını döndürür.
+        """
+        cancel = cancel or (lambda: False)
+        results = queue.Queue()
+        work = queue.Queue()
+        for code in codes:
+            work.put(code)
+
+        pool = self._start_pool(len(codes))
+        self.pool_used = pool is not None
+        pool_state = {"pool": pool}
+        in_flight = threading.BoundedSemaphore(
+            max(1, self.parse_processes) * _IN_FLIGHT_PER_PROCESS)
+        taken = [0]
+        taken_lock = threading.Lock()
+
+        def _deliver(code, flight, allocation, daily, error):
+            # Aynı fonu bekleyen fetch_fund_page çağrıları da bu sonucu alır
+            if error is None:
+                self.fetcher.settle_fund_page(code, flight, (allocation, daily))
+            else:
+                self.fetcher.settle_fund_page(code, flight, error=error)
+            results.put((code, allocation, daily, error))
+
+        def _parse_inline(code, raw, flight):
+            try:
+                allocation, daily = parse_fund_page(raw)
+            except Exception as e:
+                _deliver(code, flight, None, None, e)
+                return
+            _deliver(code, flight, allocation, daily, None)
+
+        def _submit(code, raw, flight):
+            pool = pool_state["pool"]
+            if pool is None:
+                _parse_inline(code, raw, flight)
+                return
+            in_flight.acquire()
+            try:
+                future = pool.submit(_timed_parse, raw)
+            except (BrokenProcessPool, RuntimeError):
+                in_flight.release()
+                pool_state["pool"] = None
+                _parse_inline(code, raw, flight)
+                return
+
+            def _done(f):
+                in_flight.release()
+                try:
+                    allocation, daily, seconds = f.result()
+                except BrokenProcessPool:
+                    pool_state["pool"] = None
+                    _parse_inline(code, raw, flight)
+                    return
+                except Exception as e:
+                    _deliver(code, flight, None, None, e)
+                    return
+                monitor.record("parse_fund_page", CATEGORY_PARSE, seconds)
+                _deliver(code, flight, allocation, daily, None)
+            future.add_done_callback(_done)
+
+        def _io_worker():
+            while not cancel():
+                try:
+                    code = work.get_nowait()
+                except queue.Empty:
+                    return
+                with taken_lock:
+                    taken[0] += 1
+                flight, leader = self.fetcher.claim_fund_page(code)
+                if not leader:
+                    # Fon başka yerde (ör. detay tıklaması) çekiliyor; onun sonucunu paylaş
+                    try:
+                        allocation, daily = flight.wait()
+                    except Exception as e:
+                        results.put((code, None, None, e))
+                        continue
+                    results.put((code, allocation, daily, None))
+                    continue
+                if self.delay > 0:
+                    self.fetcher.throttle_request(self.delay)
+                try:
+                    raw = self.fetcher.fetch_fund_page_raw(code)
+                except Exception as e:
+                    _deliver(code, flight, None, None, e)
+                    continue
+                _submit(code, raw, flight)
+
+        threads = [threading.Thread(target=_io_worker, daemon=True)
+                   for _ in range(min(self.io_workers, max(1, len(codes))))]
+        for t in threads:
+            t.start()
+
+        delivered = 0
+        try:
+            while True:
+                try:
+                    code, allocation, daily, error = results.get(timeout=0.1)
+                except queue.Empty:
+                    if not any(t.is_alive() for t in threads):
+                        with taken_lock:
+                            if delivered >= taken[0]:
+                                break
+                    continue
+                delivered += 1
+                on_result(code, allocation, daily, error)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        return delivered
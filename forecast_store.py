@@ -0,0 +1,98 @@
+"""
+TEFAS BES Fon Analizi — Öngörü Sonuç Deposu
+calculate_all_forecasts sonucu: composite skor ve normalize bileşenler fon
+sırasıyla hizalı dizilerde tutulur. Momentum / rotasyon / risk ayrıntılarını
+içeren açıklama sözlüğü yalnızca bir fon için istendiğinde üretilir ve saklanır.
+Öngörü sütunu, sıralama ve en iyi N fon doğrudan dizilerden okunur.
+{fon_kodu: öngörü} sözlüğü gibi kullanılabilir. GUI'den bağımsızdır.
+"""
+from collections.abc import Mapping
+
+import numpy as np
+
+COMPONENTS = ("momentum", "rotation", "risk_return", "consistency")
+
+
+class ForecastStore(Mapping):
+    """Fon kodu → öngörü; skorlar dizi, ayrıntı istendiğinde."""
+
+    def __init__(self, codes=(), composite=(), components=None, detail=None):
+        """
+        Args:
+            codes: Fon kodları (N, tekrarsız)
+            composite: (N,) composite skor
+            components: (N × 4) COMPONENTS sırasıyla normalize bileşenler
+            detail: satır_no → calculate_forecast sözlüğü (ilk istendiğinde çağrılır)
+        """
+        self.codes = list(codes)
+        self._index = {code: i for i, code in enumerate(self.codes)}
+        self.composite = np.asarray(composite, dtype=np.float64).reshape(len(self.codes))
+        self.components = (np.zeros((len(self.codes), len(COMPONENTS)))
+                           if components is None else np.asarray(components, dtype=np.float64))
+        self._detail = detail
+        self._details = {}           # satır_no → üretilmiş öngörü sözlüğü
+
+    # ── Sözlük arayüzü ────────────────────────────
+
+    def __getitem__(self, code):
+        i = self._index[code]
+        fc = self._details.get(i)
+        if fc is None:
+            fc = self._detail(i)
+            self._details[i] = fc
+        return fc
+
+    def __setitem__(self, code, forecast):
+        """Tek fonun öngörüsünü ekle veya değiştir (calculate_forecast sözlüğü)."""
+        row = [forecast["normalized"][name] for name in COMPONENTS]
+        i = self._index.get(code)
+        if i is None:
+            i = len(self.codes)
+            self._index[code] = i
+            self.codes.append(code)
+            self.composite = np.append(self.composite, 0.0)
+            self.components = np.vstack([self.components, np.zeros((1, len(COMPONENTS)))])
+        self.composite[i] = forecast["composite"]
+        self.components[i] = row
+        self._details[i] = forecast
+
+    def __contains__(self, code):
+        return code in self._index
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
+    # ── Dizi okuma ────────────────────────────────
+
+    def composite_of(self, code):
+        """Fonun composite skoru; öngörüsü yoksa None."""
+        i = self._index.get(code)
+        return None if i is None else float(self.composite[i])
+
+    def composites_for(self, codes, missing=-np.inf):
+        """Verilen fon kodlarının (N,) composite skoru; öngörüsü olmayan `missing`."""
+        index = self._index
+        rows = np.array([index.get(c, -1) for c in codes], dtype=np.intp)
+        if not len(self.codes):
+            return np.full(len(rows), missing, dtype=np.float64)
+        return np.where(rows >= 0, self.composite[np.maximum(rows, 0)], missing)
+
+    def top(self, n=10):
+        """En yüksek skorlu n fon: [(fon_kodu, composite)]; eşitlikte önceki fon önde."""
+        n = min(n, len(self.codes))
+        if n <= 0:
+            return []
+        scores = self.composite
+        # argpartition eşitlikleri keyfi böler: n. skora eşit tüm fonlar adaydır
+        kth = scores[np.argpartition(-scores, n - 1)[n - 1]]
+        candidates = np.flatnonzero(scores >= kth)
+        order = candidates[np.argsort(-scores[candidates], kind="stable")[:n]]
+        return [(self.codes[i], float(scores[i])) for i in order]
+
+    @property
+    def materialized(self):
+        """Ayrıntı sözlüğü üretilmiş fon sayısı."""
+        return len(self._details)
@@ -0,0 +1,154 @@
+"""
+TEFAS BES Fon Analizi — Öngörü Lider Tablosu
+Tüm fonlar ve her fon türü için en yüksek skorlu N fonu tutar. Her tablo
+sıralı bir aday listesi (N + yedek) saklar: listede olmayan her fon listedeki
+son fondan geridedir. Tek fonun skoru değiştiğinde yalnızca fonun kendi
+listesi ve türünün listesi güncellenir; liste N'in altına düşerse aday listesi
+argpartition ile yeniden seçilir. Sıra değişiklikleri abonelere
+(tablo, fon, eski_sıra, yeni_sıra) olayları olarak bildirilir. GUI'den bağımsızdır.
+"""
+from bisect import bisect_left, insort
+
+import numpy as np
+
+ALL = None                  # Tüm fonların tablosu
+DEFAULT_SIZE = 10
+SPARE_FACTOR = 2            # Aday listesi N × SPARE_FACTOR fon tutar
+
+
+class Leaderboard:
+    """Tüm fonlar ve fon türleri için artımlı en iyi N listesi."""
+
+    def __init__(self, size=DEFAULT_SIZE):
+        self.size = size
+        self.codes = []
+        self._index = {}
+        self.scores = np.zeros(0)
+        self.groups = []                  # Fon başına tür (yoksa None)
+        self._members = {ALL: []}         # tablo → fon satırları
+        self._boards = {}                 # tablo → sıralı aday anahtarları [(-skor, satır)]
+        self._listeners = []
+
+    # ── Abonelik ──────────────────────────────────
+
+    def subscribe(self, callback):
+        """callback(olaylar) — olaylar [(tablo, fon, eski_sıra, yeni_sıra)], sıra 1'den; listede yoksa None."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _publish(self, before):
+        events = []
+        for board, old in before.items():
+            old_ranks = {code: r for r, (code, _) in enumerate(old, 1)}
+            new_ranks = {code: r for r, (code, _) in enumerate(self.top(board), 1)}
+            for code in list(old_ranks) + [c for c in new_ranks if c not in old_ranks]:
+                if old_ranks.get(code) != new_ranks.get(code):
+                    events.append((board, code, old_ranks.get(code), new_ranks.get(code)))
+        if events:
+            for callback in list(self._listeners):
+                try:
+                    callback(events)
+                except Exception as e:
+                    print(f"Lider tablosu bildirimi hatası: {e}")
+        return events
+
+    # ── Güncelleme ────────────────────────────────
+
+    def rebuild(self, codes, scores, groups=None):
+        """Tüm skorları değiştir; sıra değişikliği olaylarını döndür.
+
+        Args:
+            codes: Fon kodları (N, tekrarsız)
+            scores: (N,) skor; NaN en sona konur
+            groups: Fon türleri (N) veya None
+        """
+        before = {board: self.top(board) for board in self._members}
+        self.codes = list(codes)
+        self._index = {code: i for i, code in enumerate(self.codes)}
+        self.scores = np.asarray(scores, dtype=np.float64).copy()
+        self.groups = list(groups) if groups is not None else [None] * len(self.codes)
+        self._members = {ALL: list(range(len(self.codes)))}
+        for i, group in enumerate(self.groups):
+            if group is not None:
+                self._members.setdefault(group, []).append(i)
+        self._boards = {board: self._select(board) for board in self._members}
+        for board in self._members:
+            before.setdefault(board, [])
+        return self._publish(before)
+
+    def update(self, code, score, group=None):
+        """Tek fonun skorunu değiştir (yoksa ekle); sıra değişikliği olaylarını döndür."""
+        i = self._index.get(code)
+        if i is None:
+            i = len(self.codes)
+            self._index[code] = i
+            self.codes.append(code)
+            self.scores = np.append(self.scores, score)
+            self.groups.append(group)
+            self._members[ALL].append(i)
+            if group is not None:
+                self._members.setdefault(group, []).append(i)
+            old_key = None
+        else:
+            old_key = self._key(i)
+            self.scores[i] = score
+        boards = [ALL] + ([self.groups[i]] if self.groups[i] is not None else [])
+        before = {board: self.top(board) for board in boards}
+        for board in boards:
+            self._move(board, i, old_key)
+        return self._publish(before)
+
+    def _key(self, i):
+        score = self.scores[i]
+        return (-score if score == score else np.inf, i)
+
+    def _select(self, board):
+        """Tablonun aday listesini baştan seç (argpartition)."""
+        members = np.asarray(self._members[board], dtype=np.intp)
+        k = min(self.size * SPARE_FACTOR, len(members))
+        if k == 0:
+            return []
+        values = np.nan_to_num(-self.scores[members], nan=np.inf)
+        picked = members[np.argpartition(values, k - 1)[:k]]
+        # k. anahtara eşit skorlu fonlar arasından satır sırası korunur
+        kth = np.max(np.nan_to_num(-self.scores[picked], nan=np.inf))
+        candidates = members[values <= kth]
+        return sorted(self._key(i) for i in candidates)[:k]
+
+    def _move(self, board, i, old_key):
+        keys = self._boards.setdefault(board, [])
+        if old_key is not None:
+            pos = bisect_left(keys, old_key)
+            if pos < len(keys) and keys[pos] == old_key:
+                del keys[pos]
+        new_key = self._key(i)
+        # Listede olmayan fonlar son adaydan geride; yeni anahtar ancak ondan öndeyse eklenir
+        outside = len(self._members[board]) - 1 - len(keys)
+        if not outside or (keys and new_key < keys[-1]):
+            insort(keys, new_key)
+            if len(keys) > self.size * SPARE_FACTOR:
+                keys.pop()
+        if len(keys) < min(self.size, len(self._members[board])):
+            self._boards[board] = self._select(board)
+
+    # ── Okuma ─────────────────────────────────────
+
+    def top(self, board=ALL, n=None):
+        """[(fon_kodu, skor)] en iyi n fon (varsayılan: size); board bir fon türü olabilir."""
+        n = self.size if n is None else min(n, self.size)
+        return [(self.codes[i], float(self.scores[i])) for _, i in self._boards.get(board, [])[:n]]
+
+    def rank(self, code, board=ALL):
+        """Fonun tablodaki sırası (1'den); ilk N'de değilse None."""
+        for r, (c, _) in enumerate(self.top(board), 1):
+            if c == code:
+                return r
+        return None
+
+    @property
+    def boards(self):
+        """Fon türü tabloları (ALL hariç), sıralı."""
+        return sorted(b for b in self._members if b is not ALL)
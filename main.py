@@ -6,11 +6,30 @@ import warnings
 import webbrowser
 import re
 import threading
-import time
 from datetime import date, datetime
 
 from config import Config
 from data_fetcher import DataFetcher, HAS_REQUESTS, HAS_YFINANCE
+from perf_monitor import (monitor, CATEGORY_FETCH, CATEGORY_RENDER,
+                          CATEGORY_LABELS)
+from diagnostics import diag
+from fetch_pipeline import FundPagePipeline
+from nav_store import NavStore
+from risk_metrics import RiskMetrics
+from correlation import CorrelationEngine
+from backtest import BacktestData, ALLOCATION_CURRENT, run_grid, default_param_grid
+from weight_optimizer import optimize_score_weights, optimize_composite_weights
+from rebalance_planner import RebalancePlanner
+from monte_carlo import MonteCarloSimulator
+from nowcast import NowcastEngine
+from regime_history import RegimeHistory
+from forecast_store import ForecastStore
+from leaderboard import Leaderboard, ALL
+from allocation_drift import AllocationDrift
+from similarity_index import SimilarityIndex, AllocationSimilarity, return_profiles
+from portfolio_exposure import ExposureEngine
+from portfolio_view import PortfolioView, WHEEL_TAG, add_wheel
+from render_cache import RenderCache, content_digest
 
 try:
     from strategy_engine import StrategyEngine
@@ -57,7 +76,28 @@ class FundAnalyzer:
         self._macro_label_refs = {}  # {name: {price: Label, daily: Label}}
         self._fetch_in_progress = False
         self._fetch_cancel = False
-        self.forecast_cache = {}     # fon_kodu → forecast_result
+        self._nav_update_busy = False
+        self._risk_metrics = None       # RiskMetrics (fiyat geçmişi varsa)
+        self._risk_metrics_key = None
+        self._correlation_busy = False
+        self._simulation_busy = False
+        self._simulation_cache = {}     # (dağılım, değer, tarih) → SimulationResult
+        self._backtest_busy = False
+        self._macro_history = None      # Backtest/optimizasyon için makro kapanış geçmişi
+        self._macro_history_day = None  # Makro geçmişin son çekildiği gün (ISO)
+        self._macro_history_lock = threading.Lock()
+        self._regime_history_busy = False
+        self.forecast_cache = ForecastStore()  # fon_kodu → forecast_result (skorlar dizi)
+        self.leaderboard = Leaderboard(self.config.LEADERBOARD_SIZE)  # Öngörü: en iyi N (tüm / tür)
+        self.leaderboard.subscribe(self._on_rank_change)
+        self._leaderboard_note = ""    # Son sıra değişikliği özeti (durum çubuğu)
+        # Benzer fonlar: dağılım indeksi artımlı, getiri profili indeksi tablo değişince kurulur
+        self.similar_allocations = AllocationSimilarity(
+            brute_force_max=self.config.SIMILARITY_BRUTE_FORCE_MAX)
+        self.similar_returns = SimilarityIndex(brute_force_max=self.config.SIMILARITY_BRUTE_FORCE_MAX)
+        self._similar_returns_source = None
+        # Portföy maruziyeti: dağılım veya fon verisi değişmedikçe önbellekten
+        self.portfolio_exposure = ExposureEngine(self.PORTFOLIO_GROUP_KEYWORDS)
         self._fund_type_filter = set()  # Seçili fon türleri (boş = hepsi)
         self._fund_type_popup = None    # Açık dropdown penceresi
         self._status_var = None         # Durum çubuğu text değişkeni
@@ -65,18 +105,42 @@ class FundAnalyzer:
         self.portfolio_total_value = 0.0  # Toplam portföy değeri (TL)
         self.fund_distribution = {}       # {fon_kodu: yüzde} dağılım
         self._pv_entry_var = None         # Portföy değeri Entry StringVar (UI)
+        self._pv_shown = None             # Girişe son yazılan portföy değeri
+        self._portfolio_views = None      # {mod: PortfolioView} ilk gösterimde kurulur
         self._dist_entries = {}           # {fon_kodu: StringVar} dağılım Entry'leri (UI)
         self._dist_tl_labels = {}         # {fon_kodu: Label} TL değer etiketleri (UI)
         self.strategy = StrategyEngine() if HAS_STRATEGY else None
+        self.nowcast = (NowcastEngine(self.strategy.classify_assets,
+                                      StrategyEngine.ASSET_CLASS_KEYWORDS,
+                                      self.config.NOWCAST_FACTORS)
+                        if HAS_STRATEGY and self.config.NOWCAST_ENABLED else None)
+        self._nowcast_label = None        # (Label, fonlar) Portföy Özeti anlık tahmin etiketi
+        # Fon detayı çizimleri: fon başına hazır Frame, içerik özeti değişmedikçe yeniden kullanılır
+        self._alloc_renders = RenderCache(self.config.RENDER_CACHE_SIZE, on_evict=lambda f: f.destroy())
+        self._forecast_renders = RenderCache(self.config.RENDER_CACHE_SIZE, on_evict=lambda f: f.destroy())
 
         # Veri çekme modülü
         self.fetcher = DataFetcher(self.config)
+        diag.output_dir = os.path.dirname(self.fetcher.get_cache_path())
+        # Makro geçmişten günlük rejim çizelgesi (önbellek dosyasının yanında saklanır)
+        self._regime_history_path = os.path.join(os.path.dirname(self.fetcher.get_cache_path()),
+                                                 self.config.REGIME_HISTORY_FILE)
+        self.regime_history = RegimeHistory.load(self._regime_history_path)
 
         # Disk önbelleğini yükle
         dr, al, md = self.fetcher.load_cache()
         self.daily_return_cache = dr
         self.allocation_cache = al
         self.macro_data = md
+        # {tarih: {fon_kodu: {varlık: yüzde}}} — toplu dağılım geçmişi
+        self.allocation_history = self.fetcher.load_allocation_history()
+        self.allocation_drift = AllocationDrift(self.config.ALLOCATION_DRIFT_METRIC,
+                                                self.config.ALLOCATION_DRIFT_THRESHOLD,
+                                                self.config.ALLOCATION_DRIFT_WINDOW_DAYS)
+        # Tarih × fon birim fiyat geçmişi (mmap)
+        self.nav_store = NavStore(os.path.join(os.path.dirname(self.fetcher.get_cache_path()),
+                                               self.config.NAV_STORE_DIR))
+        self.correlation = CorrelationEngine(self.nav_store)
 
         self.create_menu()
         self.setup_ui()
@@ -144,6 +208,7 @@ class FundAnalyzer:
         self._macro_refresh_busy = True
         threading.Thread(target=self._load_macro_quick, daemon=True).start()
 
+    @monitor.timed("macro_refresh_quick", CATEGORY_FETCH)
     def _load_macro_quick(self):
         """Hafif yenileme: toplu çek"""
         try:
@@ -198,9 +263,46 @@ class FundAnalyzer:
                     self._flash_label(refs['daily'])
                 refs['_old_price'] = price_text
             self._update_macro_title()
+            self._apply_nowcast()
         else:
             self._display_macro_data()
 
+    def _apply_nowcast(self):
+        """Makro değişimlerinden gün içi fon tahminini güncelle; yalnızca değişen hücreleri yaz"""
+        if self.nowcast is None or not self.macro_data:
+            return
+        self.nowcast.sync(self.allocation_cache)
+        changed = self.nowcast.update(self.macro_data)
+        iid_map = getattr(self, '_fon_iid_map', {})
+        for fon_kodu in changed:
+            iid = iid_map.get(fon_kodu)
+            if iid and self.tree.exists(iid):
+                self.tree.set(iid, "Günlük (%)", self._daily_cell_text(fon_kodu))
+
+        if self._nowcast_label is not None:
+            label, funds = self._nowcast_label
+            if label.winfo_exists():
+                label.config(**self._nowcast_portfolio_style(funds))
+
+    def _daily_cell_text(self, fon_kodu, daily=None):
+        """Günlük (%) hücresi: yayımlanan getiri ve varsa gün içi tahmin"""
+        if daily is None:
+            daily = self.daily_return_cache.get(fon_kodu, "")
+        if self.nowcast is None:
+            return daily
+        return f"{daily}  {self.nowcast.text(fon_kodu)}".strip()
+
+    def _nowcast_portfolio_style(self, funds):
+        """Portföyün anlık TL tahmini etiketi için text/fg"""
+        dist = {f: self.fund_distribution.get(f, 0) for f in funds}
+        change, covered = self.nowcast.portfolio(dist, self.portfolio_total_value)
+        if covered <= 0:
+            return {"text": "", "fg": "#999"}
+        text = f"Anlık Tahmin: ≈{change:+,.0f} ₺"
+        if covered < 0.995:
+            text += f" (portföyün %{covered * 100:.0f}'i)"
+        return {"text": text, "fg": "#4CAF50" if change >= 0 else "#f44336"}
+
     def _flash_label(self, label, times=3):
         flash_colors = ["#FFFF00", "#FFA500"]
         def _do_flash(count):
@@ -232,6 +334,7 @@ class FundAnalyzer:
         row2.pack(fill=tk.X, pady=(2, 0))
         self._build_indicator_row(row2, self.config.MACRO_SYMBOLS_ROW2)
         self.macro_labels['loaded'] = True
+        self._apply_nowcast()
 
     def _build_indicator_row(self, parent, symbols_dict):
         names = list(symbols_dict.keys())
@@ -281,6 +384,9 @@ class FundAnalyzer:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Dosya", menu=file_menu)
         file_menu.add_command(label="CSV Yükle          ⌘O", command=self.load_file)
+        file_menu.add_command(label="TEFAS'tan Yükle", command=self.load_from_tefas)
+        file_menu.add_command(label="TEFAS'tan Yenile (önbelleği atla)",
+                              command=lambda: self.load_from_tefas(force=True))
         file_menu.add_command(label="Ayarları Kaydet     ⌘S", command=self.save_settings)
         file_menu.add_command(label="Dışa Aktar (Excel)  ⌘E", command=self._export_to_excel)
         file_menu.add_separator()
@@ -297,16 +403,41 @@ class FundAnalyzer:
         view_menu.add_separator()
         view_menu.add_command(label="Sütunları Sıfırla",
                               command=self.reset_columns)
+        view_menu.add_separator()
+        view_menu.add_command(label="Performans",
+                              command=self._show_performance_window)
+
+        diag_menu = tk.Menu(view_menu, tearoff=0)
+        view_menu.add_cascade(label="Tanılama", menu=diag_menu)
+        self._diag_var = tk.BooleanVar(value=diag.enabled)
+        diag_menu.add_checkbutton(label="İşlemleri Profille (toplu çekme, öngörü, portföy)",
+                                  variable=self._diag_var,
+                                  command=lambda: setattr(diag, "enabled", self._diag_var.get()))
+        diag_menu.add_separator()
+        diag_menu.add_command(label="Zaman Penceresi Başlat",
+                              command=self._start_diag_window)
+        diag_menu.add_command(label="Zaman Penceresi Durdur",
+                              command=self._stop_diag_window)
 
         analysis_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Analiz", menu=analysis_menu)
+        analysis_menu.add_command(label="Varlık Dağılımlarını Toplu Güncelle",
+                                  command=self._start_bulk_allocation_fetch)
+        analysis_menu.add_command(label="Fiyat Geçmişini Güncelle",
+                                  command=self._update_nav_history)
         analysis_menu.add_command(label="Öngörü Hesapla",
                                   command=self._calculate_forecasts)
         analysis_menu.add_command(label="En İyi 10 Fon",
                                   command=self._show_top_funds_dialog)
+        analysis_menu.add_command(label="Strateji Backtest",
+                                  command=self._run_backtest)
+        analysis_menu.add_command(label="Ağırlıkları Optimize Et",
+                                  command=self._run_weight_optimizer)
         analysis_menu.add_separator()
         analysis_menu.add_command(label="Piyasa Rejimi",
                                   command=self._show_regime_dialog)
+        analysis_menu.add_command(label="Strateji Değişiklikleri",
+                                  command=self._show_allocation_drift_dialog)
 
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Yardım", menu=help_menu)
@@ -417,6 +548,9 @@ class FundAnalyzer:
 
         try:
             export_df = pd.DataFrame(rows, columns=self.table_columns)
+            # Gün içi tahmin geçicidir; dışa aktarımda yalnızca yayımlanan getiri
+            export_df["Günlük (%)"] = [self.daily_return_cache.get(str(c).strip(), "")
+                                       for c in export_df["Fon Kodu"]]
 
             if file_path.endswith('.xlsx'):
                 try:
@@ -825,6 +959,12 @@ class FundAnalyzer:
         if cached > 0:
             parts.append(f"💾 Önbellek: {cached} fon")
 
+        if self._leaderboard_note:
+            parts.append(self._leaderboard_note)
+
+        if diag.window_active:
+            parts.append("● Tanılama kaydı")
+
         # Saat
         parts.append(f"⏱ {datetime.now().strftime('%H:%M')}")
 
@@ -870,6 +1010,11 @@ class FundAnalyzer:
         self.detail_notebook.add(self._portfolio_tab, text="  Portföy Özeti  ")
         self._create_scrollable_tab(self._portfolio_tab, "_portfolio")
 
+        # ── Sekme 4: Benzer Fonlar ──
+        self._similar_tab = ttk.Frame(self.detail_notebook)
+        self.detail_notebook.add(self._similar_tab, text="  Benzer Fonlar  ")
+        self._create_scrollable_tab(self._similar_tab, "_similar")
+
         # Başlangıç mesajı
         self.detail_message = tk.Label(
             self._alloc_content,
@@ -948,336 +1093,203 @@ class FundAnalyzer:
         except Exception:
             pass
 
-    def _display_portfolio_summary(self):
-        """Mevcut/Planlanan fonların portföy değer takibi ve birleşik varlık dağılımını göster"""
-        content = self._portfolio_content
-        mw_handler = self._portfolio_mousewheel_handler
+    # Portföy Özeti modları: (değer, etiket, renk)
+    PORTFOLIO_MODES = (("mevcut", "Mevcut", "red"), ("planlanan", "Planlanan", "blue"))
 
-        # İçeriği temizle
+    def _portfolio_funds(self, mode):
+        return self.highlight_funds if mode == "mevcut" else self.planned_funds
+
+    def _build_portfolio_views(self):
+        """Portföy Özeti widget'larını bir kez kur: mod seçimi ve her mod için bir görünüm"""
+        content = self._portfolio_content
         for widget in content.winfo_children():
             widget.destroy()
+        self.root.bind_class(WHEEL_TAG, "<MouseWheel>", self._portfolio_mousewheel_handler)
 
         # ── Radio butonlar: Mevcut / Planlanan ──
         radio_frame = ttk.Frame(content)
         radio_frame.pack(fill=tk.X, padx=10, pady=(8, 4))
-
         if not hasattr(self, '_portfolio_mode'):
             self._portfolio_mode = tk.StringVar(value="mevcut")
+        for (mode, label, color), pad in zip(self.PORTFOLIO_MODES, ((0, 15), 0)):
+            tk.Radiobutton(
+                radio_frame, text=f"{label} Fonlar", variable=self._portfolio_mode,
+                value=mode, font=("Arial", 12, "bold"), fg=color,
+                command=self._display_portfolio_summary
+            ).pack(side=tk.LEFT, padx=pad)
+        add_wheel(radio_frame)
+
+        self._pv_entry_var = tk.StringVar()
+        self._pv_shown = None
+        self._portfolio_views = {
+            mode: PortfolioView(
+                content, label, color, self.config.PORTFOLIO_PERIODS, self._pv_entry_var,
+                self._apply_portfolio_values,
+                lambda m=mode: self._equalize_fund_distribution(self._portfolio_funds(m)))
+            for mode, label, color in self.PORTFOLIO_MODES
+        }
 
-        tk.Radiobutton(
-            radio_frame, text="Mevcut Fonlar", variable=self._portfolio_mode,
-            value="mevcut", font=("Arial", 12, "bold"), fg="red",
-            command=self._display_portfolio_summary
-        ).pack(side=tk.LEFT, padx=(0, 15))
+    @monitor.timed("_display_portfolio_summary", CATEGORY_RENDER)
+    @diag.profiled("portfolio_redraw")
+    def _display_portfolio_summary(self, reformat=False):
+        """Mevcut/Planlanan fonların portföy değer takibi ve birleşik varlık dağılımını göster.
 
-        tk.Radiobutton(
-            radio_frame, text="Planlanan Fonlar", variable=self._portfolio_mode,
-            value="planlanan", font=("Arial", 12, "bold"), fg="blue",
-            command=self._display_portfolio_summary
-        ).pack(side=tk.LEFT)
+        Widget'lar yeniden kurulmaz: seçili modun görünümü yerinde güncellenir,
+        bölümler yalnızca girdileri değişince yeniden çizilir. reformat=True
+        (kaydetme sonrası) girişleri kayıtlı değerlerle yeniden yazar.
+        """
+        if self._portfolio_views is None:
+            self._build_portfolio_views()
 
-        # Hangi grup seçili?
         mode = self._portfolio_mode.get()
-        if mode == "mevcut":
-            target_funds = self.highlight_funds
-            mode_label = "Mevcut"
-            mode_color = "red"
-        else:
-            target_funds = self.planned_funds
-            mode_label = "Planlanan"
-            mode_color = "blue"
-
-        # Fonları kontrol et
-        if not target_funds:
-            tk.Label(content, text=f"{mode_label} fonlarınız tanımlı değil.\n\n"
-                     "Fon Yönetimi kutusuna\nfon kodlarını girin ve kaydedin.",
-                     font=("Arial", 13), fg="gray", justify="center").pack(pady=40)
+        view = self._portfolio_views[mode]
+        for other in self._portfolio_views.values():
+            if other is not view:
+                other.frame.pack_forget()
+        if not view.frame.winfo_manager():
+            view.frame.pack(fill=tk.BOTH, expand=True)
+
+        if reformat:
+            self._pv_shown = None
+            view.reset_inputs()
+        sorted_funds = sorted(self._portfolio_funds(mode))
+        self._nowcast_label = None
+        if not view.show_funds(sorted_funds):
+            self._dist_entries, self._dist_tl_labels = {}, {}
             return
+        self._dist_entries = view.entries
+        self._dist_tl_labels = view.tl_labels
 
-        # ── Fon kodları listesi ──
-        codes_frame = ttk.Frame(content)
-        codes_frame.pack(fill=tk.X, padx=10, pady=(2, 6))
-
-        tk.Label(codes_frame, text=f"{mode_label} Fonlar:",
-                 font=("Arial", 11, "bold"), fg=mode_color).pack(side=tk.LEFT, padx=(0, 5))
-        codes_text = ", ".join(sorted(target_funds))
-        tk.Label(codes_frame, text=codes_text,
-                 font=("Arial", 11), fg="#555", wraplength=280,
-                 justify="left").pack(side=tk.LEFT, fill=tk.X)
-
-        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=5, pady=4)
-
-        # ══════════════════════════════════════════
-        # PORTFÖY DEĞER TAKİBİ BÖLÜMÜ
-        # ══════════════════════════════════════════
-
-        pv_header = ttk.Frame(content)
-        pv_header.pack(fill=tk.X, padx=10, pady=(6, 2))
-        tk.Label(pv_header, text="💰 Portföy Değer Takibi",
-                 font=("Arial", 14, "bold"), fg="#4CAF50").pack(anchor="w")
-
-        # Toplam portföy değeri girişi
-        pv_input_frame = ttk.Frame(content)
-        pv_input_frame.pack(fill=tk.X, padx=10, pady=(4, 6))
-
-        tk.Label(pv_input_frame, text="Toplam Değer (TL):",
-                 font=("Arial", 12, "bold"), fg="#555").pack(side=tk.LEFT, padx=(0, 5))
-
-        self._pv_entry_var = tk.StringVar(
-            value=f"{self.portfolio_total_value:,.0f}" if self.portfolio_total_value > 0 else ""
-        )
-        pv_entry = ttk.Entry(pv_input_frame, textvariable=self._pv_entry_var, width=18,
-                             font=("Arial", 13))
-        pv_entry.pack(side=tk.LEFT, padx=(0, 5))
-        pv_entry.bind("<Return>", lambda e: self._apply_portfolio_values())
-
-        ttk.Button(pv_input_frame, text="Uygula",
-                   command=self._apply_portfolio_values).pack(side=tk.LEFT, padx=2)
-        ttk.Button(pv_input_frame, text="Eşitle",
-                   command=lambda: self._equalize_fund_distribution(target_funds)
-                   ).pack(side=tk.LEFT, padx=2)
-
-        # ── Fon dağılımı girişleri ──
-        dist_header = ttk.Frame(content)
-        dist_header.pack(fill=tk.X, padx=10, pady=(4, 2))
-
-        tk.Label(dist_header, text="Fon", font=("Arial", 11, "bold"),
-                 fg="#555", width=8, anchor="w").pack(side=tk.LEFT)
-        tk.Label(dist_header, text="Dağılım %", font=("Arial", 11, "bold"),
-                 fg="#555", width=8, anchor="center").pack(side=tk.LEFT, padx=(0, 5))
-        tk.Label(dist_header, text="TL Değer", font=("Arial", 11, "bold"),
-                 fg="#555", width=14, anchor="e").pack(side=tk.LEFT)
-
-        self._dist_entries = {}  # {fon_kodu: StringVar}
-        self._dist_tl_labels = {}  # {fon_kodu: Label}
-
-        sorted_funds = sorted(target_funds)
-        for fon_kodu in sorted_funds:
-            row_f = ttk.Frame(content)
-            row_f.pack(fill=tk.X, padx=10, pady=2)
-
-            # Fon kodu etiketi
-            tk.Label(row_f, text=fon_kodu, font=("Arial", 12, "bold"),
-                     fg=mode_color, width=8, anchor="w").pack(side=tk.LEFT)
-
-            # Yüzde girişi
-            saved_pct = self.fund_distribution.get(fon_kodu, 0)
-            pct_var = tk.StringVar(value=f"{saved_pct:.1f}" if saved_pct > 0 else "")
-            pct_entry = ttk.Entry(row_f, textvariable=pct_var, width=8,
-                                  font=("Arial", 12), justify="center")
-            pct_entry.pack(side=tk.LEFT, padx=(0, 5))
-            pct_entry.bind("<Return>", lambda e: self._apply_portfolio_values())
-            self._dist_entries[fon_kodu] = pct_var
-
-            # TL değer etiketi
-            tl_val = self.portfolio_total_value * (saved_pct / 100) if saved_pct > 0 else 0
-            tl_text = f"{tl_val:,.0f} ₺" if tl_val > 0 else "—"
-            tl_lbl = tk.Label(row_f, text=tl_text, font=("Arial", 12),
-                              fg="#333", width=14, anchor="e")
-            tl_lbl.pack(side=tk.LEFT)
-            self._dist_tl_labels[fon_kodu] = tl_lbl
-
-            for w in row_f.winfo_children():
-                w.bind("<MouseWheel>", mw_handler)
-
-        # Toplam yüzde göstergesi
-        total_pct_frame = ttk.Frame(content)
-        total_pct_frame.pack(fill=tk.X, padx=10, pady=(4, 2))
-
-        total_pct = sum(
-            self.fund_distribution.get(f, 0) for f in sorted_funds
-        )
-        pct_color = "#4CAF50" if abs(total_pct - 100) < 0.5 else "#f44336"
-        self._total_pct_label = tk.Label(
-            total_pct_frame,
-            text=f"Toplam Dağılım: %{total_pct:.1f}" + (" ✓" if abs(total_pct - 100) < 0.5 else " ⚠"),
-            font=("Arial", 12, "bold"), fg=pct_color
-        )
-        self._total_pct_label.pack(side=tk.LEFT)
-
-        if self.portfolio_total_value > 0:
-            tk.Label(total_pct_frame, text=f"  |  Portföy: {self.portfolio_total_value:,.0f} ₺",
-                     font=("Arial", 12), fg="#555").pack(side=tk.LEFT, padx=(10, 0))
+        # Toplam değer girişi yalnızca kayıtlı değer değişince yazılır
+        if self._pv_shown != self.portfolio_total_value:
+            self._pv_entry_var.set(
+                f"{self.portfolio_total_value:,.0f}" if self.portfolio_total_value > 0 else "")
+            self._pv_shown = self.portfolio_total_value
+        total_pct = view.set_distribution(self.fund_distribution, self.portfolio_total_value)
 
         # ── Dönemsel TL Getiri Tablosu ──
         if self.portfolio_total_value > 0 and self.df is not None and total_pct > 0:
-            ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=5, pady=6)
-
-            tk.Label(content, text="📊 Dönemsel Getiri (TL)",
-                     font=("Arial", 13, "bold"), fg="#4CAF50").pack(anchor="w", padx=10, pady=(2, 4))
-
-            # Tablo başlığı
-            ret_header = ttk.Frame(content)
-            ret_header.pack(fill=tk.X, padx=10, pady=(0, 2))
-
-            tk.Label(ret_header, text="Fon", font=("Arial", 11, "bold"),
-                     fg="#555", width=7, anchor="w").pack(side=tk.LEFT)
-            for col_name, label, _ in self.config.PORTFOLIO_PERIODS:
-                tk.Label(ret_header, text=label, font=("Arial", 10, "bold"),
-                         fg="#555", width=10, anchor="center").pack(side=tk.LEFT)
-
-            ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=10)
-
-            # Her fon için getiri satırı
-            period_totals = {col_name: 0.0 for col_name, _, _ in self.config.PORTFOLIO_PERIODS}
-
-            for fon_kodu in sorted_funds:
-                pct = self.fund_distribution.get(fon_kodu, 0)
-                if pct <= 0:
-                    continue
-
-                fon_tl = self.portfolio_total_value * (pct / 100)
-
-                row_f = ttk.Frame(content)
-                row_f.pack(fill=tk.X, padx=10, pady=1)
-
-                tk.Label(row_f, text=fon_kodu, font=("Arial", 11, "bold"),
-                         fg=mode_color, width=7, anchor="w").pack(side=tk.LEFT)
-
-                # DataFrame'den fon verilerini al
-                fon_row = None
-                if self.df is not None:
-                    fon_data = self.df[self.df['Fon Kodu'].str.strip() == fon_kodu]
-                    if not fon_data.empty:
-                        fon_row = fon_data.iloc[0]
-
-                for col_name, label, months in self.config.PORTFOLIO_PERIODS:
-                    if fon_row is not None:
-                        pct_val = fon_row.get(col_name, 0)
-                        if isinstance(pct_val, (int, float)) and pct_val != 0:
-                            tl_getiri = fon_tl * (pct_val / 100)
-                            period_totals[col_name] += tl_getiri
-                            color = "#4CAF50" if tl_getiri >= 0 else "#f44336"
-                            sign = "+" if tl_getiri >= 0 else ""
-                            text = f"{sign}{tl_getiri:,.0f}"
-                        else:
-                            text = "—"
-                            color = "#999"
-                    else:
-                        text = "—"
-                        color = "#999"
-
-                    lbl = tk.Label(row_f, text=text, font=("Arial", 10),
-                                   fg=color, width=10, anchor="center")
-                    lbl.pack(side=tk.LEFT)
-
-                for w in row_f.winfo_children():
-                    w.bind("<MouseWheel>", mw_handler)
-
-            # Toplam satırı
-            ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=10)
-            total_row = ttk.Frame(content)
-            total_row.pack(fill=tk.X, padx=10, pady=2)
-
-            tk.Label(total_row, text="TOPLAM", font=("Arial", 11, "bold"),
-                     fg="#333", width=7, anchor="w").pack(side=tk.LEFT)
-
-            for col_name, label, _ in self.config.PORTFOLIO_PERIODS:
-                total_tl = period_totals[col_name]
-                if total_tl != 0:
-                    color = "#4CAF50" if total_tl >= 0 else "#f44336"
-                    sign = "+" if total_tl >= 0 else ""
-                    text = f"{sign}{total_tl:,.0f}"
+            view.set_returns(*self._portfolio_return_cells(sorted_funds))
+            if self.nowcast is not None:
+                view.nowcast_label.config(**self._nowcast_portfolio_style(sorted_funds))
+                self._nowcast_label = (view.nowcast_label, sorted_funds)
+            else:
+                view.nowcast_label.config(text="")
+        else:
+            view.set_returns(None)
+
+        self._refresh_simulation_section(view.simulation, sorted_funds)
+        self._refresh_correlation_section(view.correlation, sorted_funds, view.mode_color)
+        self._refresh_allocation_section(view.allocation, sorted_funds, view.mode_label)
+
+    def _portfolio_return_cells(self, funds):
+        """Dönemsel getiri tablosu hücreleri: ({fon: [(metin, renk)]}, toplam satırı, bugünkü değişim)"""
+        periods = self.config.PORTFOLIO_PERIODS
+        fund_rows = self.df[self.df['Fon Kodu'].str.strip().isin(funds)]
+        fund_rows = fund_rows.assign(_kod=fund_rows['Fon Kodu'].str.strip()).drop_duplicates('_kod')
+        fund_rows = {row['_kod']: row for _, row in fund_rows.iterrows()}
+
+        def _cell(tl_value):
+            if tl_value == 0:
+                return "—", "#999"
+            sign = "+" if tl_value >= 0 else ""
+            return f"{sign}{tl_value:,.0f}", "#4CAF50" if tl_value >= 0 else "#f44336"
+
+        cells = {}
+        period_totals = {col_name: 0.0 for col_name, _, _ in periods}
+        total_daily_tl, has_daily = 0.0, False
+        for fon_kodu in funds:
+            pct = self.fund_distribution.get(fon_kodu, 0)
+            if pct <= 0:
+                continue
+            fon_tl = self.portfolio_total_value * (pct / 100)
+            fon_row = fund_rows.get(fon_kodu)
+            row_cells = []
+            for col_name, _, _ in periods:
+                pct_val = fon_row.get(col_name, 0) if fon_row is not None else 0
+                if isinstance(pct_val, (int, float)) and pct_val != 0:
+                    tl_getiri = fon_tl * (pct_val / 100)
+                    period_totals[col_name] += tl_getiri
+                    row_cells.append(_cell(tl_getiri))
                 else:
-                    text = "—"
-                    color = "#999"
-
-                tk.Label(total_row, text=text, font=("Arial", 10, "bold"),
-                         fg=color, width=10, anchor="center").pack(side=tk.LEFT)
-
-            for w in total_row.winfo_children():
-                w.bind("<MouseWheel>", mw_handler)
-
-            # Günlük getiri varsa ekle
-            daily_frame = ttk.Frame(content)
-            daily_frame.pack(fill=tk.X, padx=10, pady=(6, 2))
-
-            has_daily = False
-            total_daily_tl = 0.0
-            for fon_kodu in sorted_funds:
-                pct = self.fund_distribution.get(fon_kodu, 0)
-                daily = self.daily_return_cache.get(fon_kodu, "")
-                if pct > 0 and daily and daily not in ("N/A", "Hata", ""):
-                    try:
-                        daily_val = float(daily.replace('%', '').replace(',', '.').strip())
-                        fon_tl = self.portfolio_total_value * (pct / 100)
-                        daily_tl = fon_tl * (daily_val / 100)
-                        total_daily_tl += daily_tl
-                        has_daily = True
-                    except (ValueError, AttributeError):
-                        pass
-
-            if has_daily:
-                d_color = "#4CAF50" if total_daily_tl >= 0 else "#f44336"
-                d_sign = "+" if total_daily_tl >= 0 else ""
-                tk.Label(daily_frame, text="Bugünkü Değişim:",
-                         font=("Arial", 12, "bold"), fg="#555").pack(side=tk.LEFT)
-                tk.Label(daily_frame, text=f"{d_sign}{total_daily_tl:,.0f} ₺",
-                         font=("Arial", 14, "bold"), fg=d_color).pack(side=tk.LEFT, padx=8)
-
-        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=5, pady=8)
+                    row_cells.append(("—", "#999"))
+            cells[fon_kodu] = row_cells
 
-        # ══════════════════════════════════════════
-        # VARLIK DAĞILIMI ANALİZİ (mevcut özellik korunuyor)
-        # ══════════════════════════════════════════
+            daily = self.daily_return_cache.get(fon_kodu, "")
+            if daily and daily not in ("N/A", "Hata", ""):
+                try:
+                    daily_val = float(daily.replace('%', '').replace(',', '.').strip())
+                    total_daily_tl += fon_tl * (daily_val / 100)
+                    has_daily = True
+                except (ValueError, AttributeError):
+                    pass
 
-        # Cache'te kaç fonun varlık verisi var?
-        available = {f: self.allocation_cache[f] for f in target_funds
+        totals = [_cell(period_totals[col_name]) for col_name, _, _ in periods]
+        daily = None
+        if has_daily:
+            d_sign = "+" if total_daily_tl >= 0 else ""
+            daily = (f"{d_sign}{total_daily_tl:,.0f} ₺",
+                     "#4CAF50" if total_daily_tl >= 0 else "#f44336")
+        return cells, totals, daily
+
+    def _refresh_simulation_section(self, section, funds):
+        """Monte Carlo bölümü; sonuç yoksa arka planda başlatılır"""
+        if not self.nav_store.shape[0]:
+            section.render(None, lambda frame: None)
+            return
+        dist = {f: self.fund_distribution.get(f, 0) for f in funds}
+        if sum(dist.values()) <= 0:
+            dist = {f: 1.0 for f in funds}
+        dist = {f: p for f, p in dist.items() if p > 0}
+        value = self.portfolio_total_value
+        key = (tuple(sorted(dist.items())), value, self.nav_store.last_date)
+        result = self._simulation_cache.get(key)
+        if result is None:
+            self._start_simulation(key, dist, value if value > 0 else 100.0)
+        section.render((key, result),
+                       lambda frame: self._render_simulation_section(frame, dist, value, result))
+
+    def _refresh_correlation_section(self, section, funds, mode_color):
+        """Korelasyon bölümü; matris yoksa arka planda hesaplanır"""
+        if len(funds) < 2 or not self.nav_store.shape[0]:
+            section.render(None, lambda frame: None)
+            return
+        window = self.config.CORRELATION_WINDOW_DAYS
+        matrix = self.correlation.cached(window)
+        short = self.nav_store.shape[0] <= window
+        if matrix is None and not short:
+            self._start_correlation_compute(window)
+        section.render((tuple(funds), matrix, short),
+                       lambda frame: self._render_correlation_section(frame, funds, mode_color, matrix, short))
+
+    def _refresh_allocation_section(self, section, funds, mode_label):
+        """Varlık dağılımı bölümü; maruziyet sonucu değişmedikçe yeniden çizilmez"""
+        available = {f: self.allocation_cache[f] for f in funds
                      if f in self.allocation_cache and self.allocation_cache[f]}
-        missing = target_funds - set(available.keys())
-
-        if not available:
+        missing = tuple(f for f in funds if f not in available)
+        exposure = self.portfolio_exposure.exposure(available, self.fund_distribution) if available else None
+        weighted = any(self.fund_distribution.get(f, 0) > 0 for f in funds)
+        section.render((exposure, missing, weighted),
+                       lambda frame: self._render_allocation_section(frame, exposure, missing, mode_label, weighted))
+
+    def _render_allocation_section(self, content, exposure, missing, mode_label, weighted):
+        """Birleşik varlık dağılımı, yoğunlaşma / örtüşme ve değerlendirme"""
+        if exposure is None:
             tk.Label(content, text=f"{mode_label} fonların varlık verileri\nhenüz çekilmemiş.\n\n"
                      "Her fona tıklayarak veya\n'Günlük Getiri Çek' ile verileri alın.",
                      font=("Arial", 13), fg="gray", justify="center").pack(pady=40)
             return
 
-        # ── Birleşik varlık dağılımını hesapla ──
-        combined = {}  # varlık_adı → toplam yüzde
-        fund_count = len(available)
+        fund_count = len(exposure.codes)
+        sorted_assets, sorted_groups = exposure.assets, exposure.groups
 
-        for fon_kodu, alloc in available.items():
-            # Fon dağılımında ağırlık varsa onu kullan, yoksa eşit ağırlık
-            weight = self.fund_distribution.get(fon_kodu, 0) / 100 if self.fund_distribution.get(fon_kodu, 0) > 0 else 1 / fund_count
-            for asset_name, data in alloc.items():
-                pct = data.get('percentage', 0) if isinstance(data, dict) else float(data)
-                if pct > 0:
-                    weighted_pct = pct * weight
-                    combined[asset_name] = combined.get(asset_name, 0) + weighted_pct
-
-        if not combined:
+        if not sorted_assets:
             tk.Label(content, text="Varlık dağılımı verisi bulunamadı.",
                      font=("Arial", 13), fg="orange").pack(pady=30)
             return
 
-        # Büyükten küçüğe sırala
-        sorted_assets = sorted(combined.items(), key=lambda x: x[1], reverse=True)
-
-        # Varlık sınıflarına grupla
-        groups = {}
-        GROUP_KEYWORDS = {
-            "Altın / Kıymetli Maden": ["altın", "kıymetli maden", "gold", "madenler cinsinden"],
-            "Hisse Senedi": ["hisse", "pay senedi"],
-            "Tahvil / Borçlanma": ["tahvil", "borçlanma", "bono", "kira sertifika"],
-            "Döviz / Mevduat": ["döviz", "mevduat", "katılma hesabı", "repo"],
-            "Yatırım Fonları": ["yatırım fon", "borsa yatırım", "byf", "girişim sermayesi"],
-        }
-
-        for asset_name, pct in sorted_assets:
-            grouped = False
-            name_lower = asset_name.lower()
-            for group_name, keywords in GROUP_KEYWORDS.items():
-                if any(kw in name_lower for kw in keywords):
-                    groups[group_name] = groups.get(group_name, 0) + pct
-                    grouped = True
-                    break
-            if not grouped:
-                groups["Diğer"] = groups.get("Diğer", 0) + pct
-
-        sorted_groups = sorted(groups.items(), key=lambda x: x[1], reverse=True)
-
         # ── Başlık ──
-        weight_method = "fon dağılımı ağırlıklı" if any(self.fund_distribution.get(f, 0) > 0 for f in target_funds) else "eşit ağırlıklı"
+        weight_method = "fon dağılımı ağırlıklı" if weighted else "eşit ağırlıklı"
         tk.Label(content, text="Toplam Varlık Dağılımı",
                  font=("Arial", 14, "bold"), fg="#4CAF50").pack(pady=(6, 2))
         tk.Label(content, text=f"{fund_count} fonun birleşik dağılımı ({weight_method})",
@@ -1328,9 +1340,6 @@ class FundAnalyzer:
             tk.Label(row_f, text=f"%{pct:.1f}",
                      font=("Arial", 12, "bold"), fg=color).pack(side=tk.LEFT, padx=5)
 
-            for w in row_f.winfo_children():
-                w.bind("<MouseWheel>", mw_handler)
-
         ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=10, pady=10)
 
         # ── Detaylı liste ──
@@ -1348,9 +1357,32 @@ class FundAnalyzer:
             tk.Label(row_f, text=f"%{pct:.2f}",
                      font=("Arial", 12, "bold"), fg="#555").pack(side=tk.RIGHT, padx=5)
 
-            for w in row_f.winfo_children():
-                w.bind("<MouseWheel>", mw_handler)
+        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=10, pady=10)
 
+        # ── Yoğunlaşma ve fon örtüşmesi ──
+        tk.Label(content, text="Yoğunlaşma ve Örtüşme",
+                 font=("Arial", 13, "bold"), fg="#555").pack(anchor="w", padx=10, pady=(0, 5))
+        concentration = [
+            ("Etkin varlık sayısı", exposure.asset_hhi),
+            ("Etkin varlık sınıfı sayısı", exposure.group_hhi),
+            ("Etkin fon sayısı", exposure.fund_hhi),
+        ]
+        for label, hhi in concentration:
+            row_f = ttk.Frame(content)
+            row_f.pack(fill=tk.X, padx=15, pady=1)
+            tk.Label(row_f, text=label, font=("Arial", 12), anchor="w").pack(side=tk.LEFT)
+            tk.Label(row_f, text=f"{1 / hhi:.1f}  (HHI {hhi:.2f})" if hhi > 0 else "—",
+                     font=("Arial", 12, "bold"), fg="#555").pack(side=tk.RIGHT, padx=5)
+        overlap_pairs = exposure.pairs()
+        for code_a, code_b, pct in overlap_pairs[:5]:
+            high = pct >= self.config.PORTFOLIO_OVERLAP_HIGH
+            row_f = ttk.Frame(content)
+            row_f.pack(fill=tk.X, padx=15, pady=1)
+            tk.Label(row_f, text=f"{code_a} ↔ {code_b}", font=("Arial", 12),
+                     anchor="w").pack(side=tk.LEFT)
+            tk.Label(row_f, text=f"%{pct:.1f} örtüşme",
+                     font=("Arial", 12, "bold"),
+                     fg="#F44336" if high else "#555").pack(side=tk.RIGHT, padx=5)
         ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=10, pady=10)
 
         # ── Basit uyarılar / öneriler ──
@@ -1371,14 +1403,187 @@ class FundAnalyzer:
                 "Daha fazla çeşitlendirme düşünebilirsiniz."
             )
 
+        for code_a, code_b, pct in overlap_pairs:
+            if pct < self.config.PORTFOLIO_OVERLAP_HIGH:
+                break
+            warnings_list.append(
+                f"⚠️ {code_a} ve {code_b} varlık dağılımı %{pct:.0f} örtüşüyor. "
+                f"İki fon birbirine benzer; çeşitlendirmeye katkısı sınırlı."
+            )
+
         if not warnings_list:
             warnings_list.append("✅ Portföyünüz birden fazla varlık sınıfına dağılmış görünüyor.")
 
         for w_text in warnings_list:
-            lbl = tk.Label(content, text=w_text, font=("Arial", 12),
-                           fg="#555", wraplength=320, justify="left")
-            lbl.pack(anchor="w", padx=15, pady=3)
-            lbl.bind("<MouseWheel>", mw_handler)
+            tk.Label(content, text=w_text, font=("Arial", 12),
+                     fg="#555", wraplength=320, justify="left").pack(anchor="w", padx=15, pady=3)
+
+
+    # Portföy özeti varlık grupları (anahtar kelime → grup)
+    PORTFOLIO_GROUP_KEYWORDS = {
+        "Altın / Kıymetli Maden": ["altın", "kıymetli maden", "gold", "madenler cinsinden"],
+        "Hisse Senedi": ["hisse", "pay senedi"],
+        "Tahvil / Borçlanma": ["tahvil", "borçlanma", "bono", "kira sertifika"],
+        "Döviz / Mevduat": ["döviz", "mevduat", "katılma hesabı", "repo"],
+        "Yatırım Fonları": ["yatırım fon", "borsa yatırım", "byf", "girişim sermayesi"],
+    }
+
+    def _render_simulation_section(self, content, dist, value, result):
+        """Portföyün 1/3/6/12 ay sonraki değer dağılımı (Monte Carlo, önbellekten)"""
+        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=5, pady=6)
+        tk.Label(content, text="🎲 Olasılıksal Projeksiyon (Monte Carlo)",
+                 font=("Arial", 13, "bold"), fg="#4CAF50").pack(anchor="w", padx=10, pady=(2, 4))
+
+        if result is None:
+            tk.Label(content, text="Simülasyon çalışıyor...",
+                     font=("Arial", 11), fg="gray").pack(anchor="w", padx=10)
+            return
+        if isinstance(result, str):   # Hata mesajı
+            tk.Label(content, text=result, font=("Arial", 11), fg="gray").pack(anchor="w", padx=10)
+            return
+
+        def _fmt(v):
+            if value > 0:
+                return f"{v:,.0f}"
+            return f"%{v - 100:+.1f}"
+
+        grid = ttk.Frame(content)
+        grid.pack(anchor="w", padx=10, pady=(0, 2))
+        headers = ["Ufuk", "%5", "%25", "Medyan", "%75", "%95", "Zarar Olas."]
+        for j, text in enumerate(headers):
+            tk.Label(grid, text=text, font=("Arial", 10, "bold"), fg="#555",
+                     width=10 if j else 6).grid(row=0, column=j)
+        for i, (months, stats) in enumerate(result.horizons.items()):
+            label = f"{months // 12} Yıl" if months % 12 == 0 else f"{months} Ay"
+            tk.Label(grid, text=label, font=("Arial", 10, "bold"), fg="#333",
+                     width=6, anchor="w").grid(row=i + 1, column=0)
+            for j, v in enumerate(stats["percentiles"].values()):
+                color = "#4CAF50" if v >= result.start_value else "#f44336"
+                tk.Label(grid, text=_fmt(v), font=("Arial", 10), fg=color,
+                         width=10).grid(row=i + 1, column=j + 1)
+            loss = stats["loss_prob"]
+            tk.Label(grid, text=f"%{loss * 100:.1f}", font=("Arial", 10, "bold"),
+                     fg="#f44336" if loss >= 0.25 else "#555",
+                     width=10).grid(row=i + 1, column=len(headers) - 1)
+
+        note = (f"{result.paths:,} yol, son {result.history_days} işlem gününden "
+                f"aylık blok örnekleme; dağılım dönem boyunca korunur.")
+        missing = sorted(set(dist) - set(result.codes))
+        if missing:
+            note += f" Fiyat geçmişi yok: {', '.join(missing)}"
+        tk.Label(content, text=note, font=("Arial", 10), fg="#999",
+                 wraplength=420, justify="left").pack(anchor="w", padx=10)
+
+    def _start_simulation(self, key, distribution, start_value):
+        """Monte Carlo simülasyonunu arka planda çalıştır, bitince sekmeyi yenile"""
+        if self._simulation_busy:
+            return
+        self._simulation_busy = True
+
+        def _worker():
+            result = "Simülasyon çalıştırılamadı."
+            try:
+                simulator, _ = MonteCarloSimulator.from_store(
+                    self.nav_store, distribution, self.config.MONTE_CARLO_LOOKBACK_DAYS)
+                result = simulator.simulate(start_value, paths=self.config.MONTE_CARLO_PATHS,
+                                            processes=self.config.MONTE_CARLO_PROCESSES)
+            except ValueError as e:
+                result = str(e)
+            except Exception as e:
+                print(f"Monte Carlo simülasyonu çalıştırılamadı: {e}")
+                result = f"Simülasyon çalıştırılamadı: {e}"
+            finally:
+                # Her çıkışta sonuç (veya hata) saklanıp bölüm yenilenir; "çalışıyor" takılı kalmaz
+                self._simulation_cache[key] = result
+                while len(self._simulation_cache) > 8:
+                    self._simulation_cache.pop(next(iter(self._simulation_cache)))
+                self._simulation_busy = False
+                self.root.after(0, self._on_tab_changed)
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _render_correlation_section(self, content, funds, mode_color, matrix, short):
+        """Seçili fonların ikili getiri korelasyonu tablosu (önbellekteki matristen)"""
+        window = self.config.CORRELATION_WINDOW_DAYS
+
+        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=5, pady=6)
+        tk.Label(content, text=f"🔗 Fon Korelasyonu (son {window} işlem günü)",
+                 font=("Arial", 13, "bold"), fg="#4CAF50").pack(anchor="w", padx=10, pady=(2, 4))
+
+        if matrix is None:
+            text = "Fiyat geçmişi bu pencere için yetersiz." if short else "Korelasyon hesaplanıyor..."
+            tk.Label(content, text=text, font=("Arial", 11), fg="gray").pack(anchor="w", padx=10)
+            return
+
+        codes, sub = matrix.submatrix(funds)
+        if len(codes) < 2:
+            tk.Label(content, text="Fiyat geçmişinde bu fonlardan en az ikisi yok.",
+                     font=("Arial", 11), fg="gray").pack(anchor="w", padx=10)
+            return
+
+        def _color(value):
+            if value != value:  # NaN: pencerede yeterli gözlem yok
+                return "#999"
+            if value >= self.config.CORRELATION_HIGH:
+                return "#f44336"
+            return "#FF9800" if value >= 0.5 else "#4CAF50"
+
+        grid = ttk.Frame(content)
+        grid.pack(anchor="w", padx=10, pady=(0, 2))
+        tk.Label(grid, text="", width=7).grid(row=0, column=0)
+        for j, code in enumerate(codes):
+            tk.Label(grid, text=code, font=("Arial", 10, "bold"), fg=mode_color,
+                     width=6).grid(row=0, column=j + 1)
+        for i, code in enumerate(codes):
+            tk.Label(grid, text=code, font=("Arial", 10, "bold"), fg=mode_color,
+                     width=7, anchor="w").grid(row=i + 1, column=0)
+            for j in range(len(codes)):
+                value = float(sub[i, j])
+                text = "—" if value != value else f"{value:.2f}"
+                tk.Label(grid, text=text, font=("Arial", 10), fg=_color(value),
+                         width=6).grid(row=i + 1, column=j + 1)
+
+        high = [(codes[i], codes[j], float(sub[i, j]))
+                for i in range(len(codes)) for j in range(i + 1, len(codes))
+                if sub[i, j] >= self.config.CORRELATION_HIGH]
+        for a, b, value in sorted(high, key=lambda x: -x[2]):
+            tk.Label(content, text=f"⚠ {a} – {b} birlikte hareket ediyor ({value:.2f})",
+                     font=("Arial", 11), fg="#f44336").pack(anchor="w", padx=10)
+
+        missing = sorted(f for f in funds if f not in matrix)
+        if missing:
+            tk.Label(content, text=f"Fiyat geçmişi yok: {', '.join(missing)}",
+                     font=("Arial", 10), fg="#999").pack(anchor="w", padx=10)
+
+    def _start_correlation_compute(self, window):
+        """Tüm fonların korelasyon matrisini arka planda hesapla, bitince sekmeyi yenile"""
+        if self._correlation_busy:
+            return
+        self._correlation_busy = True
+
+        def _worker():
+            try:
+                self.correlation.matrix(window)
+            except Exception as e:
+                print(f"Korelasyon hesaplanamadı: {e}")
+                return
+            finally:
+                self._correlation_busy = False
+            self.root.after(0, self._on_tab_changed)
+        threading.Thread(target=_worker, daemon=True).start()
+
+    @classmethod
+    def aggregate_allocations(cls, available, fund_distribution):
+        """Fonların varlık dağılımlarını portföy ağırlığıyla birleştir.
+
+        Args:
+            available: {fon_kodu: allocation_data} — boş olmayan dağılımlar
+            fund_distribution: {fon_kodu: yüzde}; ağırlığı olmayan fona eşit ağırlık
+
+        Returns:
+            (sorted_assets, sorted_groups): büyükten küçüğe [(ad, yüzde), ...] listeleri
+        """
+        exposure = ExposureEngine(cls.PORTFOLIO_GROUP_KEYWORDS).exposure(available, fund_distribution)
+        return exposure.assets, exposure.groups
 
     def _sync_portfolio_from_ui(self):
         """Portföy sekmesindeki Entry widget'larından güncel değerleri oku.
@@ -1470,7 +1675,7 @@ class FundAnalyzer:
             return
 
         # Görünümü güncelle
-        self._display_portfolio_summary()
+        self._display_portfolio_summary(reformat=True)
 
     def _save_portfolio_to_md(self):
         """Portföy dahil tüm ayarları Fon.md'ye kaydet — direkt, _sync gerektirmez"""
@@ -1525,7 +1730,7 @@ class FundAnalyzer:
                 pass
 
         self._save_portfolio_to_md()
-        self._display_portfolio_summary()
+        self._display_portfolio_summary(reformat=True)
 
     def _on_main_paned_configure(self, event=None):
         """Pencere boyutu değiştiğinde sash'ı yeniden ayarla (sadece ilk 2 kez)"""
@@ -1576,25 +1781,24 @@ class FundAnalyzer:
         self._tefas_btn.config(text=f"TEFAS'ta Aç ({fon_kodu})")
         self._tefas_btn.pack(side=tk.RIGHT, padx=5)
 
-        # Her iki sekmenin içeriğini temizle
-        for widget in self._alloc_content.winfo_children():
-            widget.destroy()
-        for widget in self._forecast_content.winfo_children():
-            widget.destroy()
+        # Her iki sekmenin içeriğini temizle (önbellekteki çizimler gizlenir)
+        self._clear_detail_tab(self._alloc_content, self._alloc_renders)
+        self._clear_detail_tab(self._forecast_content, self._forecast_renders)
 
         # Scroll'u en üste al
         self._alloc_canvas.yview_moveto(0)
         self._forecast_canvas.yview_moveto(0)
 
-        # Öngörü sekmesini her zaman doldur
+        # Öngörü ve benzer fon sekmelerini her zaman doldur
         self._display_forecast_in_tab(fon_kodu)
+        self._display_similar_funds(fon_kodu)
 
         # Önbellekte var mı kontrol et
         cached_alloc = self.allocation_cache.get(fon_kodu)
         cached_daily = self.daily_return_cache.get(fon_kodu)
 
         if cached_alloc:
-            self._display_allocation(cached_alloc, cached_daily)
+            self._display_allocation(fon_kodu, cached_alloc, cached_daily)
             return
 
         # Yükleniyor göster
@@ -1609,11 +1813,7 @@ class FundAnalyzer:
         try:
             self._throttle_request()
 
-            url = f"https://www.tefas.gov.tr/FonAnaliz.aspx?FonKod={fon_kodu}"
-            html_content = self._fetch_html(url)
-
-            allocation_data = self._parse_allocation_data(html_content)
-            daily_return = self._parse_daily_return(html_content)
+            allocation_data, daily_return = self.fetcher.fetch_fund_page(fon_kodu)
 
             if allocation_data:
                 self.allocation_cache[fon_kodu] = allocation_data
@@ -1624,22 +1824,20 @@ class FundAnalyzer:
             self._save_cache_to_disk()
 
             # İçeriği temizle ve göster
-            for widget in self._alloc_content.winfo_children():
-                widget.destroy()
+            self._clear_detail_tab(self._alloc_content, self._alloc_renders)
 
             if allocation_data:
-                self._display_allocation(allocation_data, daily_return)
+                self._display_allocation(fon_kodu, allocation_data, daily_return)
             else:
                 self._show_no_data_message(fon_kodu)
 
             # Öngörü sekmesini yeniden doldur (allocation güncellenmiş olabilir)
-            for widget in self._forecast_content.winfo_children():
-                widget.destroy()
+            self._clear_detail_tab(self._forecast_content, self._forecast_renders)
             self._display_forecast_in_tab(fon_kodu)
+            self._display_similar_funds(fon_kodu)
 
         except Exception as e:
-            for widget in self._alloc_content.winfo_children():
-                widget.destroy()
+            self._clear_detail_tab(self._alloc_content, self._alloc_renders)
 
             error_msg = str(e)
             if "rejected" in error_msg.lower() or "403" in error_msg:
@@ -1662,7 +1860,6 @@ class FundAnalyzer:
     def _display_forecast_in_tab(self, fon_kodu):
         """Öngörü sekmesine öngörü detaylarını yerleştir"""
         content = self._forecast_content
-        mw_handler = self._forecast_mousewheel_handler
 
         if not HAS_STRATEGY or self.strategy is None:
             tk.Label(content, text="Strateji motoru yüklenmedi.",
@@ -1679,6 +1876,8 @@ class FundAnalyzer:
                     alloc = self.allocation_cache.get(fon_kodu, {})
                     fc = self.strategy.calculate_forecast(row, alloc, self.macro_data)
                     self.forecast_cache[fon_kodu] = fc
+                    self.leaderboard.update(fon_kodu, fc['composite'],
+                                            str(row.get('Fon Türü', '')).strip() or None)
             except Exception:
                 pass
 
@@ -1687,6 +1886,19 @@ class FundAnalyzer:
                      font=("Arial", 13), fg="gray", justify="center").pack(pady=30)
             return
 
+        # Aynı öngörü daha önce çizildiyse hazır çizimi göster
+        digest = content_digest(fc)
+        frame = self._forecast_renders.get(fon_kodu, digest)
+        if frame is None:
+            frame = ttk.Frame(content)
+            self._draw_forecast(frame, fc)
+            self._forecast_renders.put(fon_kodu, digest, frame)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+    def _draw_forecast(self, content, fc):
+        """Öngörü ayrıntılarını (skor, rejim, bileşenler, metrikler) content içine çiz"""
+        mw_handler = self._forecast_mousewheel_handler
+
         # ── Tooltip açıklamaları ──
         TOOLTIPS = {
             "Momentum": (
@@ -1848,22 +2060,44 @@ class FundAnalyzer:
 
         # Sharpe detayı
         rr = fc["risk_return"]
-        sharpe_lbl = tk.Label(detail_f,
-                              text=f"ℹ Sharpe: {rr['sharpe']:.2f}  Volatilite: {rr['volatility']:.2f}",
+        if rr.get("source") == "nav":
+            sortino = "—" if rr['sortino'] is None else f"{rr['sortino']:.2f}"
+            sharpe_text = (f"ℹ Sharpe: {rr['sharpe']:.2f}  Sortino: {sortino}  "
+                           f"Volatilite: %{rr['volatility']:.1f}  "
+                           f"Maks. Düşüş: %{rr['max_drawdown'] * 100:.1f} ({rr['window']})")
+            sharpe_tip = ("Fiyat geçmişinden (günlük birim fiyat):\n"
+                          "Sharpe = yıllık getiri / yıllık volatilite.\n"
+                          "Sortino = yalnızca aşağı yönlü oynaklığa göre.\n"
+                          "Maks. Düşüş = dönem içindeki en büyük tepe-dip kaybı.\n\n"
+                          "Volatilite: günlük getirilerin yıllık standart sapması.")
+        else:
+            sharpe_text = f"ℹ Sharpe: {rr['sharpe']:.2f}  Volatilite: {rr['volatility']:.2f}"
+            sharpe_tip = ("Sharpe Oranı (Pseudo):\n"
+                          "Ortalama getiri / Getiri volatilitesi.\n"
+                          "Yüksek Sharpe = az riskle çok getiri.\n"
+                          "Düşük Sharpe = çok riskle az getiri.\n\n"
+                          "Volatilite: Dönemler arası getiri standart sapması.\n"
+                          "Düşük = istikrarlı, Yüksek = dalgalı.\n\n"
+                          "Gerçek değerler için: Analiz → Fiyat Geçmişini Güncelle")
+        sharpe_lbl = tk.Label(detail_f, text=sharpe_text,
                               font=("Arial", 12), fg="#555", cursor="hand2")
         sharpe_lbl.pack(anchor="w", pady=(4, 0))
-        self._bind_tooltip(sharpe_lbl,
-            "Sharpe Oranı (Pseudo):\n"
-            "Ortalama getiri / Getiri volatilitesi.\n"
-            "Yüksek Sharpe = az riskle çok getiri.\n"
-            "Düşük Sharpe = çok riskle az getiri.\n\n"
-            "Volatilite: Dönemler arası getiri standart sapması.\n"
-            "Düşük = istikrarlı, Yüksek = dalgalı.")
+        self._bind_tooltip(sharpe_lbl, sharpe_tip)
 
 
 
-    def _display_allocation(self, allocation_data, daily_return=None):
+    def _display_allocation(self, fon_kodu, allocation_data, daily_return=None):
         """Varlık dağılımını panelde göster - pasta grafik + sıralı liste + günlük getiri"""
+        digest = content_digest(allocation_data, daily_return)
+        frame = self._alloc_renders.get(fon_kodu, digest)
+        if frame is None:
+            frame = ttk.Frame(self._alloc_content)
+            self._draw_allocation(frame, allocation_data, daily_return)
+            self._alloc_renders.put(fon_kodu, digest, frame)
+        frame.pack(fill=tk.BOTH, expand=True)
+
+    def _draw_allocation(self, content, allocation_data, daily_return=None):
+        """Pasta grafik, sıralı varlık listesi ve günlük getiriyi content içine çiz"""
 
         # Verileri yüzdeye göre büyükten küçüğe sırala
         sorted_data = sorted(
@@ -1872,7 +2106,6 @@ class FundAnalyzer:
             reverse=True
         )
 
-        content = self._alloc_content
         mw_handler = self._alloc_mousewheel_handler
 
         # Pasta Grafik Canvas
@@ -1975,6 +2208,81 @@ class FundAnalyzer:
                      font=("Arial", 14, "bold"), fg=d_color,
                      anchor="e").pack(side=tk.RIGHT)
 
+    def _display_similar_funds(self, fon_kodu):
+        """Benzer Fonlar sekmesi: dağılımı ve getiri profili en benzer fonlar"""
+        content = self._similar_content
+        for widget in content.winfo_children():
+            widget.destroy()
+        self._similar_canvas.yview_moveto(0)
+        if self.df is None:
+            return
+
+        codes = self.df['Fon Kodu'].astype(str).str.strip()
+        self.similar_allocations.sync(self.allocation_cache)
+        if self._similar_returns_source is not self.df:
+            columns = self.performance_columns
+            returns = self.df[columns].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy()
+            months = [self._PERIOD_DIVISORS.get(col, 1) for col in columns]
+            self.similar_returns.rebuild(codes.tolist(), return_profiles(returns, months))
+            self._similar_returns_source = self.df
+
+        names = dict(zip(codes, self.df['Fon Adı'].astype(str).str.strip()))
+        year = dict(zip(codes, self.df['1 Yıl (%)'])) if '1 Yıl (%)' in self.df else {}
+        count = self.config.SIMILAR_FUNDS_COUNT
+
+        sections = (
+            ("Varlık Dağılımı Benzer", self.similar_allocations,
+             "Varlık dağılımı verisi yok — fonun dağılımını çekin."),
+            ("Getiri Profili Benzer", self.similar_returns,
+             "Getiri verisi yok."),
+        )
+        for title, index, empty_text in sections:
+            tk.Label(content, text=title, font=("Arial", 13, "bold"),
+                     fg="#444").pack(anchor="w", padx=10, pady=(10, 3))
+            similar = [(code, sim) for code, sim in index.query(fon_kodu, count)
+                       if code in names]
+            if not similar:
+                tk.Label(content, text=empty_text, font=("Arial", 12),
+                         fg="gray").pack(anchor="w", padx=15)
+                continue
+
+            cols = ("Fon Kodu", "Fon Adı", "Benzerlik", "1 Yıl (%)", "Öngörü")
+            tree = ttk.Treeview(content, columns=cols, show='headings', height=len(similar))
+            for col, w in zip(cols, [65, 200, 70, 70, 60]):
+                tree.column(col, width=w, anchor="w" if col == "Fon Adı" else "center")
+                tree.heading(col, text=col)
+            for code, sim in similar:
+                value = year.get(code)
+                composite = self.forecast_cache.composite_of(code)
+                tree.insert('', 'end', values=(
+                    code, names[code], f"%{sim * 100:.0f}",
+                    f"{value:.2f}" if isinstance(value, (int, float)) else "",
+                    f"{composite:.1f}" if composite is not None else ""))
+            tree.pack(fill=tk.X, padx=10)
+            tree.bind("<Double-1>", lambda e, t=tree: self._select_fund_row(t.item(t.focus())['values'][0])
+                      if t.focus() else None)
+
+        tk.Label(content, text="Çift tık: fonu tabloda seç", font=("Arial", 11),
+                 fg="#888").pack(anchor="w", padx=10, pady=8)
+
+    def _select_fund_row(self, fon_kodu):
+        """Fonu ana tabloda seç (görünürse); seçim detay panelini günceller"""
+        iid = self._fon_iid_map.get(str(fon_kodu).strip())
+        if iid is None:
+            messagebox.showinfo("Bilgi", f"{fon_kodu} mevcut filtrede görünmüyor.")
+            return
+        self.tree.selection_set(iid)
+        self.tree.see(iid)
+
+    @staticmethod
+    def _clear_detail_tab(content, renders):
+        """Detay sekmesini temizle; önbellekteki fon çizimleri silinmez, gizlenir"""
+        for widget in content.winfo_children():
+            if widget in renders:
+                widget.pack_forget()
+            else:
+                widget.destroy()
+
     def _show_no_data_message(self, fon_kodu):
         """Veri bulunamadı mesajı göster"""
         msg = tk.Label(
@@ -1990,6 +2298,42 @@ class FundAnalyzer:
     # Öngörü Hesaplama ve Gösterimi
     # ──────────────────────────────────────────────
 
+    def _get_risk_metrics(self):
+        """Fiyat geçmişinden risk metrikleri; depo değişmedikçe yeniden hesaplanmaz"""
+        key = (self.nav_store.last_date, self.nav_store.shape)
+        if self._risk_metrics_key != key:
+            self._risk_metrics = RiskMetrics.from_store(self.nav_store,
+                                                        self.config.PORTFOLIO_PERIODS)
+            self._risk_metrics_key = key
+        return self._risk_metrics
+
+    def _rebuild_leaderboard(self):
+        """Lider tablosunu öngörü deposunun skor dizisinden yeniden kur"""
+        store = self.forecast_cache
+        types = {}
+        if self.df is not None and 'Fon Türü' in self.df:
+            types = dict(zip(self.df['Fon Kodu'].astype(str).str.strip(),
+                             self.df['Fon Türü'].astype(str).str.strip()))
+        self.leaderboard.rebuild(store.codes, store.composite,
+                                 [types.get(code) or None for code in store.codes])
+
+    def _top_forecasts(self, board=ALL):
+        """Lider tablosundan [(fon_kodu, skor, öngörü_detayı)]"""
+        return [(code, score, self.forecast_cache[code])
+                for code, score in self.leaderboard.top(board)]
+
+    def _on_rank_change(self, events):
+        """Lider tablosu olayları: giren/çıkan fonları durum çubuğuna yaz"""
+        entered = [code for board, code, old, new in events if board is ALL and old is None]
+        left = [code for board, code, old, new in events if board is ALL and new is None]
+        ranked_before = any(old is not None for board, _, old, _ in events if board is ALL)
+        if left or (entered and ranked_before):
+            parts = [f"+{c}" for c in entered] + [f"−{c}" for c in left]
+            if len(parts) > 6:
+                parts = parts[:6] + [f"(+{len(parts) - 6})"]
+            self._leaderboard_note = f"🏆 Top {self.leaderboard.size}: {' '.join(parts)}"
+            self._update_status_bar()
+
     def _calculate_forecasts(self):
         """Tüm fonlar için öngörü skorunu hesapla"""
         if self.df is None:
@@ -2006,15 +2350,18 @@ class FundAnalyzer:
             regime_label, regime_desc = self.strategy.get_regime_label()
 
             # Tüm fonlar için öngörü hesapla
-            self.forecast_cache = self.strategy.calculate_all_forecasts(
-                self.df, self.allocation_cache, self.macro_data
-            )
+            with diag.capture("forecast"):
+                self.forecast_cache = self.strategy.calculate_all_forecasts(
+                    self.df, self.allocation_cache, self.macro_data,
+                    risk_metrics=self._get_risk_metrics()
+                )
+            self._rebuild_leaderboard()
 
             # Tabloyu güncelle
             self.update_table(self.filter_entry.get() if self.filter_entry else None)
 
             # En iyi 10 fon
-            top_funds = self.strategy.get_top_funds(self.forecast_cache, n=10)
+            top_funds = self._top_forecasts()
             top_list = "\n".join(
                 f"  {i+1}. {code} ({score:.1f})"
                 for i, (code, score, _) in enumerate(top_funds)
@@ -2102,10 +2449,7 @@ class FundAnalyzer:
         try:
             iid = getattr(self, '_fon_iid_map', {}).get(fon_kodu)
             if iid and self.tree.exists(iid):
-                values = list(self.tree.item(iid)['values'])
-                # Günlük (%) sütunu: sondan 2. (son = Öngörü)
-                values[-2] = daily_return
-                self.tree.item(iid, values=values)
+                self.tree.set(iid, "Günlük (%)", self._daily_cell_text(fon_kodu, daily_return))
         except Exception:
             pass
 
@@ -2114,7 +2458,7 @@ class FundAnalyzer:
     # ──────────────────────────────────────────────
 
 
-    def _start_batch_fetch(self):
+    def _start_batch_fetch(self, worker=None):
         """Tüm fonların günlük getirisini çekmeye başla"""
         if self.df is None:
             messagebox.showwarning("Uyarı", "Önce CSV dosyası yükleyin.")
@@ -2133,55 +2477,101 @@ class FundAnalyzer:
         self.progress_frame.pack(side=tk.LEFT, padx=5)
 
         # Arka plan thread'i başlat
-        thread = threading.Thread(target=self._batch_fetch_worker, daemon=True)
+        thread = threading.Thread(target=worker or self._batch_fetch_worker, daemon=True)
         thread.start()
 
+    def _update_nav_history(self):
+        """Fiyat geçmişi deposunu arka planda güncelle (yalnızca eksik son günler)"""
+        if self._nav_update_busy:
+            return
+        self._nav_update_busy = True
+        if self._status_var is not None:
+            self._status_var.set("Fiyat geçmişi güncelleniyor...")
+
+        def _worker():
+            try:
+                written = self.nav_store.update(self.fetcher, self.config.NAV_HISTORY_DAYS)
+                days, funds = self.nav_store.shape
+                msg = (f"{written} yeni fiyat kaydı eklendi.\n"
+                       f"Depo: {funds} fon × {days} gün (son: {self.nav_store.last_date}).")
+                self.root.after(0, messagebox.showinfo, "Fiyat Geçmişi", msg)
+            except Exception as e:
+                self.root.after(0, self.handle_error,
+                                f"Fiyat geçmişi güncellenemedi (çekilen kısım kaydedildi): {str(e)}")
+            finally:
+                self._nav_update_busy = False
+                self.root.after(0, self._update_status_bar)
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _start_bulk_allocation_fetch(self):
+        """Varlık dağılımlarını TEFAS geçmiş uç noktasından toplu güncelle"""
+        self._start_batch_fetch(self._bulk_allocation_worker)
+
+    @diag.profiled("bulk_allocations")
+    def _bulk_allocation_worker(self):
+        """Tüm dağılımları birkaç toplu istekle çek; eksik kalan fonları sayfadan tamamla"""
+        fon_kodlari = self.df['Fon Kodu'].str.strip().tolist()
+        try:
+            allocations, self.allocation_history = self.fetcher.fetch_bulk_allocations()
+            self.allocation_cache.update(allocations)
+            self.allocation_drift.update(self.allocation_history)
+        except Exception as e:
+            print(f"Toplu dağılım çekilemedi, fon sayfalarına dönülüyor: {e}")
+
+        missing = [k for k in fon_kodlari if not self.allocation_cache.get(k)]
+        self._fetch_fund_pages(missing, len(fon_kodlari))
+
+        status = "İptal edildi." if self._fetch_cancel else "Tamamlandı!"
+        self.root.after(0, self._batch_fetch_done, status, "Varlık dağılımı güncelleme")
+
     def _cancel_batch_fetch(self):
         """Toplu fetch işlemini iptal et"""
         self._fetch_cancel = True
 
+    @diag.profiled("batch_fetch")
     def _batch_fetch_worker(self):
         """Arka planda tüm fonların günlük getirilerini çek"""
         fon_kodlari = self.df['Fon Kodu'].str.strip().tolist()
         total = len(fon_kodlari)
 
-        for i, fon_kodu in enumerate(fon_kodlari):
-            if self._fetch_cancel:
-                # İptal edilse bile şimdiye kadar çekilenleri kaydet
-                self._save_cache_to_disk()
-                self.root.after(0, self._batch_fetch_done, "İptal edildi.")
-                return
+        # Zaten cache'te olanları atla
+        pending = [k for k in fon_kodlari if k not in self.daily_return_cache]
+        self._fetch_fund_pages(pending, total)
 
-            # Zaten cache'te varsa atla
-            if fon_kodu in self.daily_return_cache:
-                self.root.after(0, self._update_progress, i + 1, total, fon_kodu)
-                continue
+        if self._fetch_cancel:
+            # İptal edilse bile şimdiye kadar çekilenleri kaydet
+            self._save_cache_to_disk()
+            self.root.after(0, self._batch_fetch_done, "İptal edildi.")
+            return
 
-            try:
-                url = f"https://www.tefas.gov.tr/FonAnaliz.aspx?FonKod={fon_kodu}"
-                html = self._fetch_html(url)
+        self.root.after(0, self._batch_fetch_done, "Tamamlandı!")
 
-                daily = self._parse_daily_return(html)
-                self.daily_return_cache[fon_kodu] = daily if daily else "N/A"
+    def _fetch_fund_pages(self, fon_kodlari, total):
+        """Fon sayfalarını çekme hattından geçirip önbelleğe yaz (arka plan thread'i)"""
+        done = total - len(fon_kodlari)
+        if done:
+            self.root.after(0, self._update_progress, done, total, "önbellek")
 
-                allocation = self._parse_allocation_data(html)
+        def _on_result(fon_kodu, allocation, daily, error):
+            nonlocal done
+            done += 1
+            if error is None:
+                self.daily_return_cache[fon_kodu] = daily if daily else "N/A"
                 if allocation:
                     self.allocation_cache[fon_kodu] = allocation
-
-            except Exception:
+            else:
                 self.daily_return_cache[fon_kodu] = "Hata"
 
             # İlerlemeyi güncelle
-            self.root.after(0, self._update_progress, i + 1, total, fon_kodu)
+            self.root.after(0, self._update_progress, done, total, fon_kodu)
 
             # Her 20 fonda bir disk'e kaydet (veri kaybını önle)
-            if (i + 1) % 20 == 0:
+            if done % 20 == 0:
                 self._save_cache_to_disk()
 
-            # Sunucuyu yormamak için bekleme (engellenmemek için)
-            time.sleep(self.config.BATCH_REQUEST_DELAY)
-
-        self.root.after(0, self._batch_fetch_done, "Tamamlandı!")
+        # İndirme thread'de, parse süreç havuzunda; bekleme süresi engellenmemek için
+        FundPagePipeline(self.fetcher).run(fon_kodlari, _on_result,
+                                           cancel=lambda: self._fetch_cancel)
 
     def _update_progress(self, current, total, fon_kodu):
         """İlerleme çubuğu ve etiketi güncelle"""
@@ -2193,7 +2583,7 @@ class FundAnalyzer:
         if current % 25 == 0 or current == total:
             self.update_table(self.filter_entry.get() if self.filter_entry else None)
 
-    def _batch_fetch_done(self, message):
+    def _batch_fetch_done(self, message, title="Günlük getiri çekme"):
         """Toplu fetch tamamlandığında çağrılır"""
         self._fetch_in_progress = False
         self._fetch_cancel = False
@@ -2211,7 +2601,7 @@ class FundAnalyzer:
 
         cached_count = len(self.daily_return_cache)
         messagebox.showinfo("Bilgi",
-                            f"Günlük getiri çekme: {message}\n"
+                            f"{title}: {message}\n"
                             f"Önbellekte {cached_count} fon verisi mevcut.")
 
 
@@ -2245,11 +2635,8 @@ class FundAnalyzer:
                 self.df.drop(columns=['_daily_sort'], inplace=True)
                 self.df.reset_index(drop=True, inplace=True)
             elif col == "Öngörü":
-                def parse_forecast(fon_kodu):
-                    fc = self.forecast_cache.get(fon_kodu.strip())
-                    return fc['composite'] if fc else float('-inf')
-
-                self.df['_forecast_sort'] = self.df['Fon Kodu'].apply(parse_forecast)
+                self.df['_forecast_sort'] = self.forecast_cache.composites_for(
+                    self.df['Fon Kodu'].astype(str).str.strip())
                 self.df.sort_values('_forecast_sort', ascending=not self._sort_reverse, inplace=True)
                 self.df.drop(columns=['_forecast_sort'], inplace=True)
                 self.df.reset_index(drop=True, inplace=True)
@@ -2444,8 +2831,7 @@ class FundAnalyzer:
         if not HAS_STRATEGY or self.strategy is None:
             return
 
-        top_funds = self.strategy.get_top_funds(self.forecast_cache, n=10)
-        fund_codes = [code for code, _, _ in top_funds]
+        fund_codes = [code for code, _ in self.leaderboard.top()]
 
         if fund_codes:
             self.add_to_filter(fund_codes)
@@ -2522,10 +2908,10 @@ class FundAnalyzer:
         menu.add_separator()
 
         # Öngörü bilgisi
-        fc = self.forecast_cache.get(fon_kodu)
-        if fc:
+        composite = self.forecast_cache.composite_of(fon_kodu)
+        if composite is not None:
             menu.add_command(
-                label=f"📊  Öngörü: {fc['composite']:.1f} puan",
+                label=f"📊  Öngörü: {composite:.1f} puan",
                 command=lambda: self.detail_notebook.select(self._forecast_tab)
             )
         else:
@@ -2604,6 +2990,7 @@ class FundAnalyzer:
 
         self._render_table(df_view)
 
+    @monitor.timed("_render_table", CATEGORY_RENDER)
     def _render_table(self, df_view):
         """DataFrame'i Treeview'a render et (ortak metot)"""
         self.tree.delete(*self.tree.get_children())
@@ -2612,8 +2999,8 @@ class FundAnalyzer:
         perf_cols = self.performance_columns
         highlight = self.highlight_funds
         planned = self.planned_funds
-        daily_cache = self.daily_return_cache
-        forecast_cache = self.forecast_cache
+        daily_cell = self._daily_cell_text
+        composite_of = self.forecast_cache.composite_of
 
         for idx, row in df_view.iterrows():
             fon_kodu = str(row['Fon Kodu']).strip()
@@ -2642,11 +3029,11 @@ class FundAnalyzer:
             tur_sirasi = row.get('Tür Sırası', '')
             values.append(str(tur_sirasi) if tur_sirasi else "")
 
-            values.append(daily_cache.get(fon_kodu, ""))
+            values.append(daily_cell(fon_kodu))
 
             # Öngörü skoru
-            fc = forecast_cache.get(fon_kodu)
-            values.append(f"{fc['composite']:.1f}" if fc else "")
+            composite = composite_of(fon_kodu)
+            values.append(f"{composite:.1f}" if composite is not None else "")
 
             # Fon tipi tag'i (foreground renk)
             type_tag = "highlight" if fon_kodu in highlight else \
@@ -2702,38 +3089,42 @@ class FundAnalyzer:
         file_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
         if file_path:
             self.root.title(f"TEFAS BES Fon Analizi - {file_path}")
-            self.df = self.load_and_prepare_data(file_path)
-            if self.df is None:
-                return
+            self._apply_fund_frame(self.load_and_prepare_data(file_path))
 
-            self.enable_filter_widgets()
-            self.calculate_scores()
-            self.update_table(self.filter_entry.get() if self.filter_entry else None)
-
-    def load_and_prepare_data(self, file_path):
-        try:
-            df = pd.read_csv(file_path, encoding='utf-8')
+    def _apply_fund_frame(self, df):
+        """Hazırlanmış fon tablosunu yükle, skorla ve tabloyu çiz"""
+        self.df = df
+        if self.df is None:
+            return
 
-            required_columns = {"Fon Kodu", "Fon Adı", "Fon Türü"}.union(self.performance_columns)
-            missing_columns = required_columns - set(df.columns)
+        self.enable_filter_widgets()
+        self.calculate_scores()
+        self.update_table(self.filter_entry.get() if self.filter_entry else None)
 
-            if missing_columns:
-                raise ValueError(f"Eksik sütunlar: {', '.join(missing_columns)}")
+    def load_from_tefas(self, force=False):
+        """CSV dışa aktarımı yerine tüm BES getirilerini TEFAS'tan tek istekte çek (force: önbelleği atla)"""
+        if self._status_var is not None:
+            self._status_var.set("TEFAS getirileri çekiliyor...")
+        threading.Thread(target=self._load_from_tefas_worker, args=(force,), daemon=True).start()
 
-            for col in ['Fon Türü', 'Fon Kodu', 'Fon Adı']:
-                df[col] = df[col].astype(str)
+    def _load_from_tefas_worker(self, force=False):
+        try:
+            df, fetched_at, from_cache = self.fetcher.fetch_comparison_returns(force=force)
+        except Exception as e:
+            self.root.after(0, self.handle_error, f"TEFAS getiri çekme hatası: {str(e)}")
+            self.root.after(0, self._update_status_bar)
+            return
 
-            for col in self.performance_columns:
-                df[col] = pd.to_numeric(
-                    df[col].astype(str)
-                    .str.replace(',', '.')
-                    .str.replace('%', '')
-                    .str.strip(),
-                    errors='coerce'
-                )
+        def _apply():
+            source = "önbellek" if from_cache else "TEFAS"
+            self.root.title(f"TEFAS BES Fon Analizi - TEFAS, alındı: {fetched_at} ({source})")
+            self._apply_fund_frame(df)
+        self.root.after(0, _apply)
 
-            df = df.fillna(0)
-            return df
+    def load_and_prepare_data(self, file_path):
+        try:
+            df = pd.read_csv(file_path, encoding='utf-8')
+            return self.fetcher.prepare_fund_frame(df, self.performance_columns)
 
         except Exception as e:
             self.handle_error(f"CSV yükleme hatası: {str(e)}")
@@ -2784,6 +3175,34 @@ class FundAnalyzer:
         "5 Yıl (%)": 60,
     }
 
+    @classmethod
+    def apply_scores(cls, df, weights):
+        """Skor ve Tür Sırası sütunlarını hesapla, df'i skora göre sırala (yerinde).
+
+        Args:
+            df: load_and_prepare_data çıktısı
+            weights: {dönem_sütunu: ağırlık} — toplamı 10
+        """
+        # Aylık normalize + ağırlıklı skor hesaplama
+        # Her dönem aylık getiriye çevrilir, böylece ölçek farkı ortadan kalkar
+        skor = sum(
+            (df[col] / cls._PERIOD_DIVISORS.get(col, 1)) * (w / 10.0)
+            for col, w in weights.items()
+        )
+        df['Skor'] = skor
+
+        # Tür içi sıralama hesapla (her fon kendi türünde kaçıncı?)
+        df['_tur_sira'] = df.groupby('Fon Türü')['Skor'].rank(
+            ascending=False, method='min'
+        ).astype(int)
+        tur_counts = df['Fon Türü'].map(df.groupby('Fon Türü')['Skor'].count())
+        df['Tür Sırası'] = df['_tur_sira'].astype(str) + '/' + tur_counts.astype(str)
+        df.drop(columns=['_tur_sira'], inplace=True)
+
+        df.sort_values('Skor', ascending=False, inplace=True)
+        df.reset_index(drop=True, inplace=True)
+        return df
+
     def calculate_scores(self):
         if self.df is None:
             messagebox.showwarning("Uyarı", "Önce bir CSV dosyası yükleyin.")
@@ -2805,25 +3224,7 @@ class FundAnalyzer:
             return
 
         try:
-            # Aylık normalize + ağırlıklı skor hesaplama
-            # Her dönem aylık getiriye çevrilir, böylece ölçek farkı ortadan kalkar
-            skor = sum(
-                (self.df[col] / self._PERIOD_DIVISORS.get(col, 1)) * (w / 10.0)
-                for col, w in weights.items()
-            )
-            self.df['Skor'] = skor
-
-            # Tür içi sıralama hesapla (her fon kendi türünde kaçıncı?)
-            self.df['_tur_sira'] = self.df.groupby('Fon Türü')['Skor'].rank(
-                ascending=False, method='min'
-            ).astype(int)
-            tur_counts = self.df['Fon Türü'].map(self.df.groupby('Fon Türü')['Skor'].count())
-            self.df['Tür Sırası'] = self.df['_tur_sira'].astype(str) + '/' + tur_counts.astype(str)
-            self.df.drop(columns=['_tur_sira'], inplace=True)
-
-            self.df.sort_values('Skor', ascending=False, inplace=True)
-            self.df.reset_index(drop=True, inplace=True)
-
+            self.apply_scores(self.df, weights)
             self.update_table(self.filter_entry.get() if self.filter_entry else None)
 
         except Exception as e:
@@ -3064,8 +3465,101 @@ class FundAnalyzer:
         help_text.config(state=tk.DISABLED)
         help_text.pack(expand=True, fill=tk.BOTH)
 
+    def _start_diag_window(self):
+        """Ana thread'de cProfile + tracemalloc zaman penceresi başlat"""
+        if not diag.start_window():
+            messagebox.showwarning("Tanılama", "Başka bir tanılama kaydı zaten sürüyor.")
+            return
+        self._update_status_bar()
+
+    def _stop_diag_window(self):
+        if not diag.window_active:
+            messagebox.showinfo("Tanılama", "Çalışan bir zaman penceresi yok.")
+            return
+        path = diag.stop_window()
+        self._update_status_bar()
+        if path is None:
+            messagebox.showwarning("Tanılama", "Profil çıktıları yazılamadı (ayrıntı konsolda).")
+            return
+        messagebox.showinfo("Tanılama",
+                            f"Profil kaydedildi:\n{path}\n\n"
+                            "snakeviz veya 'python -m pstats' ile açılabilir.")
+
+    def _show_performance_window(self):
+        """Sıcak yol ölçümleri: adet, p50/p95/max süre, bayt ve kategori özeti"""
+        if getattr(self, '_perf_window', None) and self._perf_window.winfo_exists():
+            self._perf_window.lift()
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Performans")
+        win.geometry("820x460")
+        self._perf_window = win
+
+        top = ttk.Frame(win)
+        top.pack(fill=tk.X, padx=10, pady=(10, 4))
+
+        enabled_var = tk.BooleanVar(value=monitor.enabled)
+
+        def _toggle():
+            monitor.enabled = enabled_var.get()
+
+        ttk.Checkbutton(top, text="Ölçüm açık", variable=enabled_var,
+                        command=_toggle).pack(side=tk.LEFT)
+        ttk.Button(top, text="Sıfırla",
+                   command=lambda: (monitor.reset(), _refresh(False))).pack(side=tk.LEFT, padx=6)
+
+        def _export():
+            path = filedialog.asksaveasfilename(
+                parent=win, defaultextension=".json",
+                filetypes=[("JSON", "*.json")],
+                initialfile=f"performans_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            )
+            if path:
+                monitor.export_json(path)
+                messagebox.showinfo("Başarılı", f"Ölçümler dışa aktarıldı:\n{path}", parent=win)
+
+        ttk.Button(top, text="JSON Dışa Aktar", command=_export).pack(side=tk.LEFT)
+
+        summary_lbl = tk.Label(win, text="", font=("Arial", 12), fg="#555",
+                               anchor="w", justify="left")
+        summary_lbl.pack(fill=tk.X, padx=10, pady=(2, 4))
+
+        cols = ("İşlem", "Kategori", "Adet", "Toplam ms", "p50 ms", "p95 ms", "max ms", "KB")
+        tree = ttk.Treeview(win, columns=cols, show='headings', height=14)
+        for col, w in zip(cols, (200, 90, 60, 90, 80, 80, 80, 80)):
+            tree.column(col, width=w, anchor="w" if col == "İşlem" else "center")
+            tree.heading(col, text=col)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        def _refresh(reschedule=True):
+            if not win.winfo_exists():
+                return
+            rows = monitor.snapshot()
+            tree.delete(*tree.get_children())
+            for r in rows:
+                tree.insert('', 'end', values=(
+                    r["name"], CATEGORY_LABELS.get(r["category"], r["category"]),
+                    r["count"], f"{r['total_ms']:.1f}", f"{r['p50_ms']:.2f}",
+                    f"{r['p95_ms']:.2f}", f"{r['max_ms']:.2f}",
+                    f"{r['bytes'] / 1024:.0f}" if r["bytes"] else "",
+                ))
+            totals = monitor.category_totals(rows)
+            if any(totals.values()):
+                bottleneck = max(totals, key=totals.get)
+                parts = [f"{CATEGORY_LABELS[c]}: {t:.0f} ms" for c, t in totals.items()]
+                summary_lbl.config(text="  •  ".join(parts)
+                                   + f"\nDarboğaz: {CATEGORY_LABELS[bottleneck]}")
+            else:
+                summary_lbl.config(text="Henüz ölçüm yok." if monitor.enabled
+                                   else "Ölçüm kapalı — 'Ölçüm açık' kutusunu işaretleyin.")
+            if reschedule:
+                win.after(2000, _refresh)
+
+        _refresh()
+
     def _show_top_funds_dialog(self):
-        """En iyi 10 fon önerisi penceresi"""
+        """En iyi 10 fon önerisi penceresi (tüm fonlar veya seçilen fon türü)"""
         if not self.forecast_cache:
             messagebox.showinfo("Bilgi", "Önce 'Öngörü Hesapla' butonuna tıklayın.")
             return
@@ -3073,12 +3567,12 @@ class FundAnalyzer:
         if not HAS_STRATEGY or self.strategy is None:
             return
 
-        top_funds = self.strategy.get_top_funds(self.forecast_cache, n=10)
         regime_label, regime_desc = self.strategy.get_regime_label()
+        size = self.leaderboard.size
 
         win = tk.Toplevel(self.root)
-        win.title("En İyi 10 Fon Önerisi")
-        win.geometry("750x580")
+        win.title(f"En İyi {size} Fon Önerisi")
+        win.geometry("750x620")
 
         # Başlık
         tk.Label(win, text=f"Piyasa Rejimi: {regime_label}",
@@ -3088,6 +3582,16 @@ class FundAnalyzer:
         tk.Label(win, text="(Bu sıralama mevcut piyasa koşullarına göre otomatik hesaplanmıştır)",
                  font=("Arial", 12, "italic"), fg="#aaa").pack(pady=(0, 10))
 
+        # Fon türü seçimi
+        all_label = "Tüm Fonlar"
+        type_frame = tk.Frame(win)
+        type_frame.pack(fill=tk.X, padx=10)
+        tk.Label(type_frame, text="Fon Türü:", font=("Arial", 12)).pack(side=tk.LEFT)
+        type_var = tk.StringVar(value=all_label)
+        type_box = ttk.Combobox(type_frame, textvariable=type_var, state="readonly", width=40,
+                                values=[all_label] + self.leaderboard.boards)
+        type_box.pack(side=tk.LEFT, padx=5)
+
         # Tablo
         cols = ("Sıra", "Fon Kodu", "Öngörü", "Momentum", "Rotasyon", "Risk/Getiri", "Tutarlılık")
         tree = ttk.Treeview(win, columns=cols, show='headings', height=12)
@@ -3096,40 +3600,473 @@ class FundAnalyzer:
         for col, w in zip(cols, widths):
             tree.column(col, width=w, anchor="center")
             tree.heading(col, text=col)
+        tree.tag_configure("moved", background="#fff3cd")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        for i, (code, score, detail) in enumerate(top_funds):
-            n = detail["normalized"]
-            tree.insert('', 'end', values=(
-                i + 1, code,
-                f"{score:.1f}",
-                f"{n['momentum']:.0f}",
-                f"{n['rotation']:.0f}",
-                f"{n['risk_return']:.0f}",
-                f"{n['consistency']:.0f}",
-            ))
+        info_lbl = tk.Label(win, text="", font=("Arial", 12),
+                            justify="left", wraplength=650, fg="#333")
+        info_lbl.pack(padx=10, pady=5)
+
+        def _board():
+            return ALL if type_var.get() == all_label else type_var.get()
+
+        def _fill(moved=()):
+            tree.delete(*tree.get_children())
+            top_funds = self._top_forecasts(_board())
+            for i, (code, score, detail) in enumerate(top_funds):
+                n = detail["normalized"]
+                tree.insert('', 'end', values=(
+                    i + 1, code,
+                    f"{score:.1f}",
+                    f"{n['momentum']:.0f}",
+                    f"{n['rotation']:.0f}",
+                    f"{n['risk_return']:.0f}",
+                    f"{n['consistency']:.0f}",
+                ), tags=("moved",) if code in moved else ())
+
+            # Mevcut fonlarla karşılaştırma
+            info_text = ""
+            if self.highlight_funds:
+                top_codes = [c for c, _, _ in top_funds]
+                mevcut_in_top = [c for c in top_codes if c in self.highlight_funds]
+                mevcut_not_top = self.highlight_funds - set(top_codes)
+                top_not_mevcut = [c for c in top_codes if c not in self.highlight_funds]
+                if mevcut_in_top:
+                    info_text += f"✅ Mevcut fonlarınızdan Top {size}'da: {', '.join(mevcut_in_top)}\n"
+                if mevcut_not_top:
+                    info_text += f"⚠️ Top {size}'da olmayan mevcut fonlar: {', '.join(mevcut_not_top)}\n"
+                if top_not_mevcut:
+                    info_text += f"💡 Değerlendirebileceğiniz fonlar: {', '.join(top_not_mevcut)}"
+            info_lbl.config(text=info_text)
+
+        def _on_rank_change(events):
+            # Sıra değişince açık pencere yenilenir; yeri değişen fonlar işaretlenir
+            board = _board()
+            moved = {code for b, code, _, _ in events if b == board}
+            if moved and win.winfo_exists():
+                type_box.config(values=[all_label] + self.leaderboard.boards)
+                _fill(moved)
+
+        def _close():
+            self.leaderboard.unsubscribe(_on_rank_change)
+            win.destroy()
+
+        type_box.bind("<<ComboboxSelected>>", lambda e: _fill())
+        self.leaderboard.subscribe(_on_rank_change)
+        win.protocol("WM_DELETE_WINDOW", _close)
+        _fill()
+
+        btn_frame = tk.Frame(win)
+        btn_frame.pack(pady=10)
+        if self.highlight_funds:
+            ttk.Button(btn_frame, text="Değişiklik Planı",
+                       command=self._show_rebalance_planner).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Kapat", command=_close).pack(side=tk.LEFT, padx=5)
+
+    def _current_distribution(self):
+        """Mevcut fonların dağılımı {fon: yüzde}; dağılım girilmemişse eşit ağırlık"""
+        funds = sorted(self.highlight_funds)
+        if not funds:
+            return {}
+        dist = {f: self.fund_distribution.get(f, 0) for f in funds}
+        if sum(dist.values()) <= 0:
+            dist = {f: 100.0 / len(funds) for f in funds}
+        return dist
+
+    def _show_rebalance_planner(self):
+        """Kalan BES değişiklik hakkıyla ay ay fon dağılımı planı penceresi"""
+        if self.df is None or not self.highlight_funds:
+            messagebox.showinfo("Bilgi", "Önce mevcut fonlarınızı ekleyin.")
+            return
+
+        planner = RebalancePlanner.from_frame(
+            self.df, self.forecast_cache,
+            decay=self.config.REBALANCE_DECAY, min_gain=self.config.REBALANCE_MIN_GAIN)
+        limit = self.config.BES_SWITCH_LIMIT_PER_YEAR
 
+        win = tk.Toplevel(self.root)
+        win.title("Fon Değişikliği Planı")
+        win.geometry("820x520")
+
+        params = tk.Frame(win)
+        params.pack(fill=tk.X, padx=10, pady=(10, 5))
+        tk.Label(params, text="Ufuk (ay):", font=("Arial", 12)).pack(side=tk.LEFT)
+        horizon_var = tk.IntVar(value=self.config.REBALANCE_HORIZON_MONTHS)
+        tk.Spinbox(params, from_=1, to=12, width=4, textvariable=horizon_var).pack(side=tk.LEFT, padx=(2, 12))
+        tk.Label(params, text="Bu yıl kullanılan değişiklik:", font=("Arial", 12)).pack(side=tk.LEFT)
+        used_var = tk.IntVar(value=0)
+        tk.Spinbox(params, from_=0, to=limit, width=4, textvariable=used_var).pack(side=tk.LEFT, padx=(2, 12))
+
+        summary_var = tk.StringVar()
+        tk.Label(win, textvariable=summary_var, font=("Arial", 12),
+                 justify="left", fg="#333").pack(fill=tk.X, padx=10, pady=5)
+
+        cols = ("Ay", "Çıkan Fonlar", "Giren Fonlar", "Yeni Dağılım", "Beklenen Fark")
+        tree = ttk.Treeview(win, columns=cols, show='headings', height=12)
+        for col, w in zip(cols, [50, 150, 150, 330, 100]):
+            tree.column(col, width=w, anchor="center" if col in ("Ay", "Beklenen Fark") else "w")
+            tree.heading(col, text=col)
         tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
-        # Mevcut fonlarla karşılaştırma
-        if self.highlight_funds:
-            ttk.Separator(win, orient='horizontal').pack(fill=tk.X, padx=10, pady=5)
-            mevcut_in_top = [c for c, _, _ in top_funds if c in self.highlight_funds]
-            mevcut_not_top = self.highlight_funds - {c for c, _, _ in top_funds}
-            top_not_mevcut = [c for c, _, _ in top_funds if c not in self.highlight_funds]
+        def _refresh():
+            try:
+                horizon = int(horizon_var.get())
+                budget = max(0, limit - int(used_var.get()))
+                plan = planner.plan(self._current_distribution(), budget, horizon)
+            except (ValueError, tk.TclError) as e:
+                messagebox.showerror("Hata", f"Plan hesaplanamadı: {e}", parent=win)
+                return
+            tree.delete(*tree.get_children())
+            for month, before, after, gain in plan.steps:
+                tree.insert('', 'end', values=(
+                    month + 1,
+                    ", ".join(sorted(set(before) - set(after))) or "-",
+                    ", ".join(sorted(set(after) - set(before))) or "-",
+                    ", ".join(f"{c} %{p:.0f}" for c, p in sorted(after.items(), key=lambda x: -x[1])),
+                    f"%{gain * 100:+.2f}",
+                ))
+            if not plan.steps:
+                tree.insert('', 'end', values=("-", "-", "-", "Değişiklik önerilmiyor", "-"))
+            summary_var.set(
+                f"Kalan hak: {budget}  |  Önerilen değişiklik: {plan.switches}\n"
+                f"Beklenen getiri ({horizon} ay): %{plan.expected_growth * 100:.2f}  "
+                f"(dağılım korunursa %{plan.hold_growth * 100:.2f})")
+
+        ttk.Button(params, text="Planla", command=_refresh).pack(side=tk.LEFT)
+        tk.Label(win, text="(Beklenen getiri: kısa vadeli ivme her ay sönerek 1 yıllık ortalamaya yaklaşır)",
+                 font=("Arial", 11, "italic"), fg="#aaa").pack(pady=(0, 5))
+        ttk.Button(win, text="Kapat", command=win.destroy).pack(pady=(0, 10))
+        _refresh()
+
+    def _run_backtest(self):
+        """Strateji backtest'ini fiyat geçmişi üzerinde arka planda çalıştır"""
+        if not HAS_STRATEGY or self.strategy is None:
+            messagebox.showerror("Hata", "Strateji motoru bulunamadı.")
+            return
+        if not self.nav_store.shape[0]:
+            messagebox.showinfo("Bilgi", "Önce 'Fiyat Geçmişini Güncelle' ile fiyat geçmişini indirin.")
+            return
+        if self._backtest_busy:
+            return
+        self._backtest_busy = True
+        if self._status_var is not None:
+            self._status_var.set("Strateji backtest çalışıyor...")
 
-            info_text = ""
-            if mevcut_in_top:
-                info_text += f"✅ Mevcut fonlarınızdan Top 10'da: {', '.join(mevcut_in_top)}\n"
-            if mevcut_not_top:
-                info_text += f"⚠️ Top 10'da olmayan mevcut fonlar: {', '.join(mevcut_not_top)}\n"
-            if top_not_mevcut:
-                info_text += f"💡 Değerlendirebileceğiniz fonlar: {', '.join(top_not_mevcut)}"
+        def _worker():
+            try:
+                with diag.capture("backtest"):
+                    data, macro_history = self._build_backtest_data()
+                    results = run_grid(data,
+                                       default_param_grid(self.config.BES_SWITCH_LIMIT_PER_YEAR),
+                                       processes=self.config.BACKTEST_PROCESSES,
+                                       min_pool_runs=self.config.BACKTEST_POOL_MIN_RUNS)
+                self.root.after(0, self._show_backtest_results, data, results, bool(macro_history))
+            except ValueError as e:
+                self.root.after(0, messagebox.showinfo, "Strateji Backtest", str(e))
+            except Exception as e:
+                self.root.after(0, self.handle_error, f"Backtest çalıştırılamadı: {str(e)}")
+            finally:
+                self._backtest_busy = False
+                self.root.after(0, self._update_status_bar)
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _build_backtest_data(self):
+        """Fiyat geçmişinden ay sonu anlık görüntüleri (arka plan thread'inde çağrılır).
+
+        Makro geçmiş diskten okunur ve günde bir eksik günlerle tamamlanır; hiç yoksa
+        rejim nötr kabul edilir (sonraki çalıştırmada yeniden denenir).
+        (BacktestData, makro_geçmiş) döndürür.
+        """
+        self._ensure_macro_history()
+        dates, codes, prices = self.nav_store.price_matrix()
+        data = BacktestData.build(dates, codes, prices, self.config.PORTFOLIO_PERIODS,
+                                  self.allocation_history, self.allocation_cache,
+                                  self._macro_history, regime_history=self.regime_history)
+        return data, self._macro_history
+
+    def _ensure_macro_history(self):
+        """Kayıtlı makro geçmişi yeni günlerle tamamla, rejim çizelgesini artımlı ilerletip kaydet"""
+        with self._macro_history_lock:
+            day = self._macro_history_day
+            try:
+                self._macro_history, self._macro_history_day = self.fetcher.update_macro_history(
+                    self._macro_history, self._macro_history_day)
+            except Exception as e:
+                print(f"Makro geçmiş alınamadı, rejim nötr kabul edilecek: {e}")
+            if self._macro_history is None:
+                self._macro_history = {}
+            self.regime_history.update(self._macro_history)
+            if self._macro_history_day != day or not os.path.exists(self._regime_history_path):
+                self.regime_history.save(self._regime_history_path)
+            return self._macro_history
+
+    def _show_backtest_results(self, data, results, has_macro):
+        """Backtest sonuç penceresi — parametre setleri yıllık getiriye göre sıralı"""
+        win = tk.Toplevel(self.root)
+        win.title("Strateji Backtest")
+        win.geometry("900x560")
+
+        first, last = data.step_dates[0], data.step_dates[-1]
+        tk.Label(win, text=f"Strateji Backtest: {first} → {last}",
+                 font=("Arial", 15, "bold"), fg="#333").pack(pady=(10, 2))
+        tk.Label(win, text=f"{len(data.codes)} fon, {len(data.step_dates) - 1} ay, "
+                           f"yılda en fazla {self.config.BES_SWITCH_LIMIT_PER_YEAR} değişiklik",
+                 font=("Arial", 12), fg="#777").pack(pady=(0, 3))
+
+        notes = []
+        if not has_macro:
+            notes.append("Makro geçmiş alınamadı: tüm aylarda nötr rejim kullanıldı.")
+        else:
+            counts = {r: data.regimes.count(r) for r in dict.fromkeys(data.regimes)}
+            flips = sum(1 for a, b in zip(data.regimes, data.regimes[1:]) if a != b)
+            shares = ", ".join(f"{self.strategy.REGIME_LABELS[r][0]} {n} ay"
+                               for r, n in sorted(counts.items(), key=lambda x: -x[1]))
+            notes.append(f"Rejimler: {shares}; ay sonları arasında {flips} rejim değişikliği.")
+        current = sum(1 for asof in data.allocation_asof if asof == ALLOCATION_CURRENT)
+        if current:
+            notes.append(f"{current} ayda dağılım geçmişi olmadığından güncel varlık "
+                         "dağılımları kullanıldı (rotasyon puanı iyimser olabilir).")
+        for note in notes:
+            tk.Label(win, text=note, font=("Arial", 11, "italic"), fg="#aaa",
+                     wraplength=850).pack()
+
+        cols = ("En İyi N", "Min. Fark", "Toplam", "Yıllık", "Volatilite",
+                "Maks. Düşüş", "Sharpe", "Değişiklik", "Endeksi Geçen Ay")
+        tree = ttk.Treeview(win, columns=cols, show='headings', height=10)
+        for col in cols:
+            tree.column(col, width=90, anchor="center")
+            tree.heading(col, text=col)
+
+        def _row(label_n, label_gap, stats, switches="—", hit="—"):
+            return (label_n, label_gap,
+                    f"%{stats['total_return'] * 100:.1f}",
+                    f"%{stats['annual_return'] * 100:.1f}",
+                    f"%{stats['volatility'] * 100:.1f}",
+                    f"%{stats['max_drawdown'] * 100:.1f}",
+                    f"{stats['sharpe']:.2f}", switches, hit)
+
+        ranked = sorted(results, key=lambda r: r.stats["annual_return"], reverse=True)
+        for result in ranked:
+            p = result.params
+            tree.insert('', 'end', values=_row(
+                p["top_n"], f"{p['min_improvement']:.0f}", result.stats,
+                result.stats["switches"], f"%{result.stats['hit_rate'] * 100:.0f}"))
+        if ranked:
+            tree.insert('', 'end', values=_row("Tüm fonlar", "eşit", ranked[0].benchmark_stats))
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        if ranked:
+            best = ranked[0]
+            tk.Label(win, text=f"En iyi set (N={best.params['top_n']}) son portföy: "
+                               f"{', '.join(best.holdings[-1])}",
+                     font=("Arial", 12), fg="#333", wraplength=850).pack(padx=10, pady=5)
+
+        ttk.Button(win, text="Kapat", command=win.destroy).pack(pady=10)
+
+    def _run_weight_optimizer(self):
+        """Skor ve öngörü ağırlıklarını fiyat geçmişi üzerinde arka planda optimize et"""
+        if not HAS_STRATEGY or self.strategy is None:
+            messagebox.showerror("Hata", "Strateji motoru bulunamadı.")
+            return
+        if not self.nav_store.shape[0]:
+            messagebox.showinfo("Bilgi", "Önce 'Fiyat Geçmişini Güncelle' ile fiyat geçmişini indirin.")
+            return
+        if self._backtest_busy:
+            return
+        self._backtest_busy = True
+        if self._status_var is not None:
+            self._status_var.set("Ağırlıklar optimize ediliyor...")
+
+        # Tk değişkenleri yalnızca ana thread'de okunur
+        current = {}
+        for col, (var, weight_var) in self.controls.items():
+            try:
+                current[col] = float(weight_var.get()) if var.get() else 0.0
+            except ValueError:
+                current[col] = 0.0
+
+        def _worker():
+            try:
+                with diag.capture("weight_search"):
+                    data, _ = self._build_backtest_data()
+                    options = dict(n_candidates=self.config.WEIGHT_SEARCH_CANDIDATES,
+                                   top_n=self.config.WEIGHT_SEARCH_TOP_N,
+                                   processes=self.config.WEIGHT_SEARCH_PROCESSES)
+                    score_result = optimize_score_weights(
+                        data, self.config.PORTFOLIO_PERIODS,
+                        current if sum(current.values()) > 0 else None, **options)
+                    composite_results = optimize_composite_weights(data, self.strategy, **options)
+                self.root.after(0, self._show_weight_search_results, score_result, composite_results)
+            except ValueError as e:
+                self.root.after(0, messagebox.showinfo, "Ağırlık Optimizasyonu", str(e))
+            except Exception as e:
+                self.root.after(0, self.handle_error, f"Ağırlık optimizasyonu çalıştırılamadı: {str(e)}")
+            finally:
+                self._backtest_busy = False
+                self.root.after(0, self._update_status_bar)
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _show_weight_search_results(self, score_result, composite_results):
+        """Ağırlık optimizasyonu sonuç penceresi — mevcut ve önerilen ağırlıklar"""
+        win = tk.Toplevel(self.root)
+        win.title("Ağırlık Optimizasyonu")
+        win.geometry("720x640")
 
-            tk.Label(win, text=info_text, font=("Arial", 12),
-                     justify="left", wraplength=650, fg="#333").pack(padx=10, pady=5)
+        def _pct(value):
+            return "—" if value is None else f"%{value * 100:.2f}"
+
+        train, holdout = score_result.months
+        tk.Label(win, text="Ağırlık Optimizasyonu",
+                 font=("Arial", 15, "bold"), fg="#333").pack(pady=(10, 2))
+        tk.Label(win, text=f"{score_result.candidates} aday, başarı ölçüsü: her ay en iyi "
+                           f"{self.config.WEIGHT_SEARCH_TOP_N} fonun ertesi ay ortalama getirisi\n"
+                           f"Seçim {train} ayda yapıldı, son {holdout} ay yalnızca kontrol için ayrıldı.",
+                 font=("Arial", 11), fg="#777", justify="center").pack(pady=(0, 8))
+
+        # ── Skor ağırlıkları ──
+        tk.Label(win, text="Skor Ağırlıkları (toplam 10)",
+                 font=("Arial", 13, "bold"), fg="#4CAF50").pack(anchor="w", padx=15)
+        cols = ("Dönem", "Mevcut", "Önerilen")
+        tree = ttk.Treeview(win, columns=cols, show='headings', height=6)
+        for col in cols:
+            tree.column(col, width=120, anchor="center")
+            tree.heading(col, text=col)
+        for name in score_result.names:
+            current = score_result.current.get(name) if score_result.current else None
+            tree.insert('', 'end', values=(
+                name, "—" if current is None else f"{current:.2f}", f"{score_result.best[name]:.2f}"))
+        tree.pack(fill=tk.X, padx=15, pady=4)
+        tk.Label(win, text=f"Aylık getiri — eğitim: {_pct(score_result.current_train)} → "
+                           f"{_pct(score_result.train_score)}, kontrol: "
+                           f"{_pct(score_result.current_holdout)} → {_pct(score_result.holdout_score)}",
+                 font=("Arial", 11), fg="#555").pack(anchor="w", padx=15)
+        ttk.Button(win, text="Skor Ağırlıklarını Uygula",
+                   command=lambda: self._apply_score_weights(score_result.best)
+                   ).pack(anchor="w", padx=15, pady=(4, 10))
+
+        # ── Öngörü (composite) ağırlıkları ──
+        ttk.Separator(win, orient='horizontal').pack(fill=tk.X, padx=10, pady=4)
+        tk.Label(win, text="Öngörü Ağırlıkları (rejim bazında)",
+                 font=("Arial", 13, "bold"), fg="#4CAF50").pack(anchor="w", padx=15)
+        if not composite_results:
+            tk.Label(win, text="Hiçbir rejim için yeterli ay yok.",
+                     font=("Arial", 11), fg="gray").pack(anchor="w", padx=15)
+        for regime, result in composite_results.items():
+            label = self.strategy.REGIME_LABELS.get(regime, (regime, ""))[0]
+            weights = ", ".join(f"{name} {result.current[name]:.2f}→{result.best[name]:.2f}"
+                                for name in result.names)
+            tk.Label(win, text=f"{label} ({sum(result.months)} ay): {weights}\n"
+                               f"   aylık getiri {_pct(result.current_train)} → {_pct(result.train_score)}, "
+                               f"kontrol {_pct(result.current_holdout)} → {_pct(result.holdout_score)}",
+                     font=("Arial", 11), fg="#333", justify="left",
+                     wraplength=680).pack(anchor="w", padx=15, pady=2)
+        if composite_results:
+            ttk.Button(win, text="Öngörü Ağırlıklarını Uygula",
+                       command=lambda: self._apply_composite_weights(composite_results)
+                       ).pack(anchor="w", padx=15, pady=(4, 10))
 
         ttk.Button(win, text="Kapat", command=win.destroy).pack(pady=10)
 
+    def _apply_score_weights(self, weights):
+        """Önerilen skor ağırlıklarını kontrollere yaz (toplam tam 10) ve skoru yeniden hesapla"""
+        cols = [col for col in self.controls if col in weights]
+        if not cols:
+            return
+        rounded = [round(weights[col], 2) for col in cols]
+        largest = rounded.index(max(rounded))
+        rounded[largest] = round(rounded[largest] + 10.0 - sum(rounded), 2)
+        for col, weight in zip(cols, rounded):
+            var, weight_var = self.controls[col]
+            var.set(True)
+            weight_var.set(f"{weight:.2f}")
+        self.update_weight_sum()
+        if self.df is not None:
+            self.calculate_scores()
+
+    def _apply_composite_weights(self, composite_results):
+        """Önerilen öngörü ağırlıklarını strateji motoruna uygula ve öngörüleri yenile"""
+        for regime, result in composite_results.items():
+            self.strategy.set_composite_weights(regime, result.best)
+        if self.forecast_cache:
+            self._calculate_forecasts()
+        else:
+            messagebox.showinfo("Ağırlık Optimizasyonu",
+                                "Öngörü ağırlıkları uygulandı. 'Öngörü Hesapla' ile yeni skorları görün.")
+
+    def _show_allocation_drift_dialog(self):
+        """Varlık dağılımı belirgin değişen (strateji değiştiren) fonlar penceresi"""
+        if not self.allocation_history:
+            messagebox.showinfo("Bilgi", "Önce 'Varlık Dağılımlarını Toplu Güncelle' ile "
+                                         "dağılım geçmişini indirin.")
+            return
+        drift = self.allocation_drift
+        drift.update(self.allocation_history)
+        if len(drift) < 2:
+            messagebox.showinfo("Bilgi", "Karşılaştırma için en az iki günlük dağılım geçmişi gerekli.")
+            return
+
+        names = {}
+        if self.df is not None:
+            names = dict(zip(self.df['Fon Kodu'].astype(str).str.strip(),
+                             self.df['Fon Adı'].astype(str).str.strip()))
+        unit = "puan" if drift.metric == "l1" else ""
+
+        win = tk.Toplevel(self.root)
+        win.title("Strateji Değişiklikleri")
+        win.geometry("900x520")
+
+        tk.Label(win, text="Varlık Dağılımı Belirgin Değişen Fonlar",
+                 font=("Arial", 15, "bold"), fg="#333").pack(pady=(10, 2))
+        tk.Label(win, text=f"Her günün dağılımı önceki {drift.window_days} günün ortalamasıyla "
+                           f"karşılaştırılır ({drift.metric} > {drift.threshold:g} {unit}). "
+                           f"Son veri: {drift.dates[-1]}",
+                 font=("Arial", 12), fg="#777", wraplength=850).pack(pady=(0, 5))
+
+        period_frame = tk.Frame(win)
+        period_frame.pack(fill=tk.X, padx=10)
+        tk.Label(period_frame, text="Dönem:", font=("Arial", 12)).pack(side=tk.LEFT)
+        periods = {"Son 7 gün": 7, "Son 30 gün": 30, "Tüm geçmiş": None}
+        period_var = tk.StringVar(value="Son 7 gün")
+        period_box = ttk.Combobox(period_frame, textvariable=period_var, state="readonly",
+                                  width=14, values=list(periods))
+        period_box.pack(side=tk.LEFT, padx=5)
+        count_lbl = tk.Label(period_frame, text="", font=("Arial", 12), fg="#555")
+        count_lbl.pack(side=tk.LEFT, padx=10)
+
+        cols = ("Fon Kodu", "Fon Adı", "Başlangıç", "Değişim", "Artan", "Azalan")
+        tree = ttk.Treeview(win, columns=cols, show='headings', height=14)
+        for col, w in zip(cols, [70, 230, 90, 70, 190, 190]):
+            tree.column(col, width=w, anchor="w" if col in ("Fon Adı", "Artan", "Azalan") else "center")
+            tree.heading(col, text=col)
+        tree.tag_configure("ended", foreground="#999")
+        tree.tag_configure("held", foreground="#1565C0")
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        def _fmt(items):
+            return ", ".join(f"{name} {delta:+.0f}" for name, delta in items)
+
+        def _fill(event=None):
+            tree.delete(*tree.get_children())
+            days = periods[period_var.get()]
+            found = drift.recent(days) if days else drift.changed_since(drift.dates[0])
+            for code, onset, peak, still in found:
+                gains, losses = drift.shift(code, onset)
+                tags = ("held",) if code in self.highlight_funds else ("ended",) if not still else ()
+                tree.insert('', 'end', iid=code, tags=tags, values=(
+                    code, names.get(code, ""), onset,
+                    f"{peak:.0f}" if drift.metric == "l1" else f"{peak:.2f}",
+                    _fmt(gains), _fmt(losses)))
+            count_lbl.config(text=f"{len(found)} fon")
+
+        period_box.bind("<<ComboboxSelected>>", _fill)
+        _fill()
+
+        tk.Label(win, text="Mavi: mevcut fonlarınız  ·  Gri: değişim artık eşiğin altında  ·  "
+                           "Çift tık: fonu filtreye ekle",
+                 font=("Arial", 11), fg="#888").pack(pady=(0, 5))
+        tree.bind("<Double-1>", lambda e: tree.focus() and self.add_to_filter([tree.focus()]))
+        ttk.Button(win, text="Kapat", command=win.destroy).pack(pady=(0, 10))
+
     def _show_regime_dialog(self):
         """Piyasa rejimi detay penceresi — açıklayıcı"""
         if not HAS_STRATEGY or self.strategy is None:
@@ -3215,6 +4152,14 @@ class FundAnalyzer:
                 tk.Label(row, text=f"{lbl}: {v} puan" + (" ← aktif" if is_active else ""),
                          font=font, fg=color).pack(anchor="w")
 
+        # Rejim geçmişi (makro kapanışlardan)
+        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=15, pady=10)
+        tk.Label(content, text="Rejim Geçmişi",
+                 font=("Arial", 14, "bold"), fg="#444").pack(anchor="w", padx=15, pady=(5, 5))
+        history_frame = ttk.Frame(content)
+        history_frame.pack(fill=tk.X, padx=20)
+        self._render_regime_history(history_frame)
+
         # Önerilen varlık dağılımı
         ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=15, pady=10)
         tk.Label(content, text="Bu Rejimde Önerilen Varlık Dağılımı",
@@ -3240,6 +4185,10 @@ class FundAnalyzer:
             tk.Label(row, text=f"%{weight*100:.0f}",
                      font=("Arial", 13, "bold"), fg="#555").pack(side=tk.LEFT, padx=5)
 
+        # Senaryolara göre sıralama sağlamlığı
+        if self.df is not None:
+            self._render_scenario_section(content)
+
         # Skorlama açıklaması
         ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=15, pady=10)
         tk.Label(content, text="Öngörü Skoru Nasıl Hesaplanır?",
@@ -3261,6 +4210,132 @@ class FundAnalyzer:
 
         ttk.Button(content, text="Kapat", command=win.destroy).pack(pady=10)
 
+    def _render_regime_history(self, frame, retry=True):
+        """Rejim dialogu: mevcut rejimin süresi, değişim sıklığı ve son dönemler"""
+        for widget in frame.winfo_children():
+            widget.destroy()
+        history = self.regime_history
+        if not len(history):
+            if self._macro_history == {} and not retry:
+                text = "Makro geçmiş alınamadı."
+            else:
+                text = "Makro geçmiş yükleniyor..."
+                self._start_regime_history_load(frame)
+            tk.Label(frame, text=text, font=("Arial", 12), fg="gray").pack(anchor="w")
+            return
+
+        labels = self.strategy.REGIME_LABELS
+        regime, start, days = history.current_streak()
+        tk.Label(frame, text=f"Günlük kapanışlara göre: {labels[regime][0]} — {start} tarihinden "
+                             f"beri {days} işlem günü",
+                 font=("Arial", 13, "bold"), fg="#333").pack(anchor="w")
+        shares = history.shares(365)
+        share_text = " · ".join(f"{labels[r][0]} %{v * 100:.0f}"
+                                for r, v in sorted(shares.items(), key=lambda x: -x[1]))
+        tk.Label(frame, text=f"Son 1 yıl: {history.flips(365)} rejim değişikliği  |  {share_text}",
+                 font=("Arial", 12), fg="#555", wraplength=580, justify="left").pack(anchor="w", pady=(2, 4))
+
+        # 5 günden kısa dönemler gürültü sayılıp listelenmez
+        recent = [seg for seg in history.segments() if seg[3] >= 5][-6:]
+        for regime, first, last, length in reversed(recent):
+            tk.Label(frame, text=f"{labels[regime][0]}: {first} → {last} ({length} gün)",
+                     font=("Arial", 11), fg="#777").pack(anchor="w")
+
+    def _start_regime_history_load(self, frame):
+        """Makro geçmişi arka planda çek, bitince rejim geçmişi bölümünü yenile"""
+        if self._regime_history_busy:
+            return
+        self._regime_history_busy = True
+
+        def _worker():
+            try:
+                self._ensure_macro_history()
+            finally:
+                self._regime_history_busy = False
+
+            def _refresh():
+                if frame.winfo_exists():
+                    self._render_regime_history(frame, retry=False)
+            self.root.after(0, _refresh)
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _render_scenario_section(self, content):
+        """Rejim dialogu: En iyi fonların dört rejim ve makro şok senaryolarındaki sıraları"""
+        ttk.Separator(content, orient='horizontal').pack(fill=tk.X, padx=15, pady=10)
+        tk.Label(content, text="Senaryolara Göre Sıralama",
+                 font=("Arial", 14, "bold"), fg="#444").pack(anchor="w", padx=15, pady=(5, 5))
+
+        shock_frame = ttk.Frame(content)
+        shock_frame.pack(fill=tk.X, padx=20, pady=(0, 5))
+        tk.Label(shock_frame, text="Özel şok (aylık %):", font=("Arial", 12)).pack(side=tk.LEFT)
+        shock_var = tk.StringVar(value="BIST-100=-5, USD/TRY=3")
+        ttk.Entry(shock_frame, textvariable=shock_var, width=28).pack(side=tk.LEFT, padx=5)
+
+        table_frame = ttk.Frame(content)
+        table_frame.pack(fill=tk.X, padx=20, pady=5)
+        inputs = self.strategy.forecast_inputs(self.df, self.allocation_cache, self._get_risk_metrics())
+
+        def _parse_shock(text):
+            shock = {}
+            for part in filter(None, (p.strip() for p in text.split(','))):
+                name, _, value = part.partition('=')
+                name = name.strip()
+                if name not in self.config.MACRO_SYMBOLS:
+                    raise ValueError(f"Bilinmeyen gösterge: {name}")
+                shock[name] = float(value.replace('%', '').strip())
+            return shock
+
+        def _render():
+            shocks = dict(self.config.REGIME_SCENARIOS)
+            try:
+                custom = _parse_shock(shock_var.get())
+            except ValueError as e:
+                messagebox.showerror("Hata", f"Şok okunamadı: {e}", parent=content.winfo_toplevel())
+                return
+            if custom:
+                shocks["Özel"] = custom
+            for widget in table_frame.winfo_children():
+                widget.destroy()
+
+            codes, period_returns, asset_groups, risk_totals = inputs
+            scenarios = self.strategy.scenario_contexts(self.macro_data, shocks)
+            current = self.strategy.context(macro_data=self.macro_data)
+            contexts = [current] + [ctx for _, ctx in scenarios]
+            ranks = self.strategy.rank_matrix(self.strategy.scenario_scores(
+                period_returns, asset_groups, risk_totals, contexts))
+
+            top_n = 10
+            index = {code: i for i, code in enumerate(codes)}
+            rows = sorted(range(len(codes)), key=lambda i: ranks[i, 0])[:top_n]
+            rows += [index[c] for c in sorted(self.highlight_funds) if c in index and index[c] not in rows]
+
+            # İlk dört senaryo sabit rejimler; şok senaryolarında ortaya çıkan rejim gösterilir
+            n_fixed = len(self.strategy.REGIME_LABELS)
+            names = (["Şu An"] + [name for name, _ in scenarios[:n_fixed]]
+                     + [f"{name} → {ctx.label.split()[0]}" for name, ctx in scenarios[n_fixed:]])
+            cols = ["Fon"] + names + ["Top 10", "En Kötü"]
+            tree = ttk.Treeview(table_frame, columns=cols, show='headings', height=min(len(rows), 14))
+            for col in cols:
+                tree.column(col, width=70 if col in ("Fon", "Top 10", "En Kötü") else 95, anchor="center")
+                tree.heading(col, text=col)
+            tree.tag_configure("held", foreground="red")
+            robust = []
+            for i in rows:
+                in_top = int((ranks[i] <= top_n).sum())
+                if in_top == ranks.shape[1]:
+                    robust.append(codes[i])
+                tree.insert('', 'end', values=[codes[i]] + ranks[i].tolist()
+                            + [f"{in_top}/{ranks.shape[1]}", int(ranks[i].max())],
+                            tags=("held",) if codes[i] in self.highlight_funds else ())
+            tree.pack(fill=tk.X)
+            text = (f"Tüm senaryolarda ilk {top_n}'da kalan: {', '.join(robust)}" if robust
+                    else f"Hiçbir fon tüm senaryolarda ilk {top_n}'da kalmıyor.")
+            tk.Label(table_frame, text=text + "  (kırmızı = mevcut fonlar)", font=("Arial", 11),
+                     fg="#555", wraplength=600, justify="left").pack(anchor="w", pady=(4, 0))
+
+        ttk.Button(shock_frame, text="Hesapla", command=_render).pack(side=tk.LEFT)
+        _render()
+
     def open_fund_url(self, fon_kodu):
         """Fon kodunun URL'sini tarayıcıda aç"""
         try:
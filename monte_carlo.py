@@ -0,0 +1,155 @@
+"""
+TEFAS BES Fon Analizi — Monte Carlo Portföy Simülasyonu
+Fiyat geçmişindeki günlük getirilerden blok bootstrap ile yol üretir ve
+portföyün TL değer dağılımını 1, 3, 6 ve 12 ay için hesaplar. Bir blok tüm
+fonlar için aynı günleri kullanır (fonlar arası korelasyon korunur); blok
+içi getiri, log önek toplamlarının iki satır farkıdır. Böylece bir yolun
+değeri gün sayısıyla değil blok sayısıyla orantılı işlem ister. Yollar
+bellek için parçalar halinde (yol × blok × fon) üretilir, istenirse süreç
+havuzuna dağıtılır. Portföy dönem boyunca tutulur (al-tut). GUI'den bağımsızdır.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from perf_monitor import monitor, CATEGORY_COMPUTE
+from risk_metrics import TRADING_DAYS_PER_MONTH
+
+HORIZON_MONTHS = (1, 3, 6, 12)
+PERCENTILES = (5, 25, 50, 75, 95)
+PATH_CHUNK = 25000           # Bellek için yollar bu büyüklükte parçalarla üretilir
+MIN_HISTORY_DAYS = 63        # Bundan kısa ortak geçmişle simülasyon yapılmaz
+
+
+class SimulationResult:
+    """Ufuk başına yüzdelikler, ortalama ve zarar olasılığı."""
+
+    def __init__(self, codes, weights, start_value, paths, history_days, horizons):
+        self.codes = codes                  # Simüle edilen fonlar
+        self.weights = weights              # Normalize ağırlıklar (toplam 1)
+        self.start_value = start_value
+        self.paths = paths
+        self.history_days = history_days    # Örneklenen ortak geçmiş (gün)
+        self.horizons = horizons            # {ay: {"percentiles": {p: değer}, "mean", "loss_prob"}}
+
+
+def _simulate_chunk(log_prefix, weights, block, horizon_days, n_paths, seed):
+    """n_paths yol için ufuk başına portföy büyümesi: (H × n_paths) float32.
+
+    log_prefix: ((T+1) × k) log getiri önek toplamları.
+    """
+    rng = np.random.default_rng(seed)
+    n_days = log_prefix.shape[0] - 1
+    n_blocks = -(-max(horizon_days) // block)
+    starts = rng.integers(0, n_days - block + 1, size=(n_paths, n_blocks))
+
+    # Tam blokların log getirileri (yol × blok × fon) ve blok sınırlarındaki birikimler
+    block_logs = log_prefix[starts + block] - log_prefix[starts]
+    cumulative = np.cumsum(block_logs, axis=1)
+
+    out = np.empty((len(horizon_days), n_paths), dtype=np.float32)
+    for h, days in enumerate(horizon_days):
+        full, rest = divmod(days, block)
+        logs = cumulative[:, full - 1] if full else np.zeros((n_paths, log_prefix.shape[1]))
+        if rest:
+            s = starts[:, full]
+            logs = logs + log_prefix[s + rest] - log_prefix[s]
+        out[h] = np.exp(logs) @ weights
+    return out
+
+
+_WORKER_STATE = None
+
+
+def _init_worker(log_prefix, weights, block, horizon_days):
+    """Havuz süreci başlangıcı: önek toplamları süreç başına bir kez aktarılır."""
+    global _WORKER_STATE
+    _WORKER_STATE = (log_prefix, weights, block, horizon_days)
+
+
+def _simulate_worker(args):
+    n_paths, seed = args
+    return _simulate_chunk(*_WORKER_STATE, n_paths, seed)
+
+
+class MonteCarloSimulator:
+    """Bir portföyün blok bootstrap ile gelecekteki değer dağılımı."""
+
+    def __init__(self, returns, codes, weights, block=TRADING_DAYS_PER_MONTH):
+        """
+        Args:
+            returns: (T × k) günlük basit getiri; NaN satırları atılır
+            codes: Fon kodları (k)
+            weights: (k,) portföy ağırlıkları (normalize edilir)
+            block: Blok uzunluğu (işlem günü)
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        complete = ~np.isnan(returns).any(axis=1)
+        if complete.sum() < max(MIN_HISTORY_DAYS, block + 1):
+            raise ValueError("Simülasyon için fonların ortak fiyat geçmişi yetersiz.")
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.sum() <= 0:
+            raise ValueError("Portföy ağırlıkları boş.")
+        self.codes = list(codes)
+        self.weights = weights / weights.sum()
+        self.block = block
+        self.history_days = int(complete.sum())
+        log_returns = np.log1p(returns[complete])
+        self.log_prefix = np.vstack([np.zeros((1, log_returns.shape[1])),
+                                     np.cumsum(log_returns, axis=0)])
+
+    @classmethod
+    def from_store(cls, store, distribution, lookback_days, block=TRADING_DAYS_PER_MONTH):
+        """NavStore'dan; distribution {fon: yüzde}. Depoda olmayan fonlar atlanır.
+
+        Returns:
+            (MonteCarloSimulator, eksik_fonlar)
+        """
+        found = [c for c, p in distribution.items() if p > 0 and c in store.codes]
+        missing = sorted(c for c, p in distribution.items() if p > 0 and c not in store.codes)
+        if not found:
+            raise ValueError("Portföydeki fonların fiyat geçmişi yok.")
+        dates, codes, returns = store.return_matrix(found)
+        returns = returns[-lookback_days:]
+        return cls(returns, codes, [distribution[c] for c in codes], block), missing
+
+    @monitor.timed("monte_carlo", CATEGORY_COMPUTE)
+    def simulate(self, start_value, paths=100000, horizons=HORIZON_MONTHS, seed=0,
+                 processes=0, chunk=PATH_CHUNK):
+        """paths yol üret; parçalar processes > 0 ise süreç havuzunda çalışır.
+
+        Parça tohumları SeedSequence'tan türetildiği için sonuç süreç sayısından bağımsızdır.
+        """
+        horizon_days = [months * TRADING_DAYS_PER_MONTH for months in horizons]
+        sizes = [min(chunk, paths - i) for i in range(0, paths, chunk)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        jobs = list(zip(sizes, seeds))
+        args = (self.log_prefix, self.weights, self.block, horizon_days)
+
+        processes = min(processes, os.cpu_count() or 1, len(jobs))
+        chunks = None
+        if processes > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=processes,
+                                         mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_worker, initargs=args) as pool:
+                    chunks = list(pool.map(_simulate_worker, jobs))
+            except (BrokenProcessPool, OSError) as e:
+                print(f"Simülasyon süreç havuzu kullanılamadı, sırayla çalıştırılacak: {e}")
+        if chunks is None:
+            chunks = [_simulate_chunk(*args, n, s) for n, s in jobs]
+        growth = np.concatenate(chunks, axis=1)
+
+        results = {}
+        for h, months in enumerate(horizons):
+            values = growth[h].astype(np.float64) * start_value
+            results[months] = {
+                "percentiles": dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist())),
+                "mean": float(values.mean()),
+                "loss_prob": float((growth[h] < 1.0).mean()),
+            }
+        return SimulationResult(self.codes, self.weights, start_value, paths,
+                                self.history_days, results)
@@ -0,0 +1,197 @@
+"""
+TEFAS BES Fon Analizi — Birim Fiyat (NAV) Geçmişi Deposu
+Tüm fonların günlük fiyatlarını tarih × fon float32 matrisi olarak saklar:
+    nav_prices.npy   → np.load(mmap_mode="r") ile belleğe eşlenir
+    nav_index.json   → satır tarihleri ve sütun fon kodları
+Yeni veriler artımlı birleştirilir; tekrar çalıştırmada yalnızca son kayıtlı
+günden sonrası çekilir. Güncelleme arka plan thread'inde çalışır; tarih,
+fon, sütun indeksi ve matris tek bir kilit altında birlikte değiştirilir,
+okuyucular da aynı kilidi alır. GUI'den bağımsızdır.
+"""
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+PRICES_FILE = "nav_prices.npy"
+INDEX_FILE = "nav_index.json"
+
+
+class NavStore:
+    """Tarih × fon fiyat matrisi; hizalanmış fiyat/getiri matrisleri döndürür."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._dates = []        # ISO tarih, artan
+        self._codes = []        # Sütun sırası (yeni fonlar sona eklenir)
+        self._col = {}          # fon_kodu → sütun
+        self._prices = np.empty((0, 0), dtype=np.float32)
+        self.load()
+
+    # ── Disk ──────────────────────────────────────
+
+    @property
+    def _prices_path(self):
+        return os.path.join(self.directory, PRICES_FILE)
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def load(self):
+        """Depoyu diskten (salt okunur mmap) yükle; yoksa boş başla."""
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            prices = np.load(self._prices_path, mmap_mode='r')
+            if prices.shape != (len(index["dates"]), len(index["codes"])):
+                raise ValueError("indeks ve matris boyutu uyuşmuyor")
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(self._index_path):
+                print(f"Fiyat deposu okunamadı, sıfırdan oluşturulacak: {e}")
+            return
+        self._swap(index["dates"], index["codes"], prices)
+
+    def _swap(self, dates, codes, prices):
+        """Durumu tek adımda değiştir; eski eşlemeyi yalnızca değişimden sonra kilit içinde bırak."""
+        col = {code: i for i, code in enumerate(codes)}
+        with self._lock:
+            old = self._prices
+            self._dates, self._codes, self._col, self._prices = dates, codes, col, prices
+            # Windows'ta eşlenmiş dosyanın üzerine yazılamaz; okuyucular kopya aldığından kapatmak güvenli
+            if os.name == 'nt' and isinstance(old, np.memmap) and old._mmap is not None:
+                old._mmap.close()
+
+    def _write(self, dates, codes, prices):
+        os.makedirs(self.directory, exist_ok=True)
+        # Dosyalar değişirken okuyucular bellekteki yeni matrisi görür
+        self._swap(dates, codes, prices)
+        tmp_prices = self._prices_path + ".tmp.npy"
+        tmp_index = self._index_path + ".tmp"
+        np.save(tmp_prices, prices)
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump({"dates": dates, "codes": codes}, f, separators=(',', ':'))
+        os.replace(tmp_prices, self._prices_path)
+        os.replace(tmp_index, self._index_path)
+        self.load()
+
+    # ── Bilgi ─────────────────────────────────────
+
+    @property
+    def dates(self):
+        with self._lock:
+            return list(self._dates)
+
+    @property
+    def codes(self):
+        with self._lock:
+            return list(self._codes)
+
+    @property
+    def shape(self):
+        with self._lock:
+            return self._prices.shape
+
+    @property
+    def last_date(self):
+        with self._lock:
+            dates = self._dates
+        return date.fromisoformat(dates[-1]) if dates else None
+
+    # ── Güncelleme ────────────────────────────────
+
+    def merge(self, prices_by_date):
+        """{tarih_iso: {fon_kodu: fiyat}} kayıtlarını depoya ekle/üzerine yaz.
+
+        Yazılan hücre sayısını döndürür.
+        """
+        if not prices_by_date:
+            return 0
+        with self._lock:
+            old_dates, old_codes = self._dates, self._codes
+            new_codes = sorted({code for day in prices_by_date.values() for code in day}
+                               - set(self._col))
+            codes = old_codes + new_codes
+            dates = sorted(set(old_dates).union(prices_by_date))
+            row_of = {d: i for i, d in enumerate(dates)}
+            col_of = {c: i for i, c in enumerate(codes)}
+
+            merged = np.full((len(dates), len(codes)), np.nan, dtype=np.float32)
+            if old_dates:
+                old_rows = np.fromiter((row_of[d] for d in old_dates), dtype=np.intp,
+                                       count=len(old_dates))
+                merged[old_rows, :len(old_codes)] = self._prices
+
+        rows, cols, values = [], [], []
+        for day, funds in prices_by_date.items():
+            r = row_of[day]
+            for code, price in funds.items():
+                rows.append(r)
+                cols.append(col_of[code])
+                values.append(price)
+        merged[np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)] = values
+
+        self._write(dates, codes, merged)
+        return len(values)
+
+    def update(self, fetcher, history_days, today=None):
+        """Eksik son günleri fetcher.fetch_price_history ile çekip birleştir.
+
+        Depo boşsa `history_days` gün geriye gidilir. Son kayıtlı gün de yeniden
+        istenir (gün içinde geç yayımlanan fiyatlar için). Her TEFAS parçası
+        (TEFAS_HISTORY_CHUNK_DAYS) çekilir çekilmez kaydedilir; yarıda kalan
+        güncelleme sonraki çalıştırmada son kayıtlı günden devam eder.
+        Yazılan hücre sayısı.
+        """
+        end = today or date.today()
+        start = self.last_date or (end - timedelta(days=history_days))
+        written = 0
+        for chunk_start, chunk_end in fetcher._date_chunks(
+                start, end, fetcher.config.TEFAS_HISTORY_CHUNK_DAYS):
+            written += self.merge(fetcher.fetch_price_history(chunk_start, chunk_end))
+        return written
+
+    # ── Sorgu ─────────────────────────────────────
+
+    @staticmethod
+    def _forward_fill(values):
+        """Sütun bazında NaN'ları son geçerli değerle doldur (baştaki NaN'lar kalır)."""
+        mask = np.isnan(values)
+        if not mask.any():
+            return values
+        idx = np.where(~mask, np.arange(values.shape[0])[:, None], 0)
+        np.maximum.accumulate(idx, axis=0, out=idx)
+        return values[idx, np.arange(values.shape[1])]
+
+    def price_matrix(self, codes=None, start=None, end=None, fill=True):
+        """Hizalanmış fiyat matrisi: (tarihler, fon_kodları, T × N float32).
+
+        codes verilmezse tüm fonlar; depoda olmayan fonlar NaN sütun olur.
+        fill=True ise tatil/eksik günler önceki fiyatla doldurulur.
+        """
+        with self._lock:
+            codes = list(self._codes if codes is None else codes)
+            day_index = np.asarray(self._dates, dtype='datetime64[D]')
+            lo = 0 if start is None else int(np.searchsorted(day_index, np.datetime64(start, 'D')))
+            hi = (len(day_index) if end is None
+                  else int(np.searchsorted(day_index, np.datetime64(end, 'D'), side='right')))
+
+            cols = np.fromiter((self._col.get(c, -1) for c in codes), dtype=np.intp,
+                               count=len(codes))
+            values = np.full((max(hi - lo, 0), len(codes)), np.nan, dtype=np.float32)
+            present = cols >= 0
+            if hi > lo and present.any():
+                values[:, present] = self._prices[lo:hi][:, cols[present]]
+        if fill:
+            values = self._forward_fill(values)
+        return day_index[lo:hi], codes, values
+
+    def return_matrix(self, codes=None, start=None, end=None):
+        """Günlük basit getiriler: (tarihler[1:], fon_kodları, (T-1) × N float32)."""
+        dates, codes, prices = self.price_matrix(codes, start, end, fill=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = prices[1:] / prices[:-1] - 1.0
+        return dates[1:], codes, returns
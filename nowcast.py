@@ -0,0 +1,118 @@
+"""
+TEFAS BES Fon Analizi — Gün İçi Tahmin (Nowcast)
+Fon fiyatları günde bir kez yayımlanır; makro göstergeler ise birkaç saniyede
+bir yenilenir. Her fonun gün içi değişimi, varlık dağılımından çıkan faktör
+maruziyeti × makro göstergelerin günlük değişimi olarak tahmin edilir.
+
+Maruziyet matrisi (fon × faktör) varlık dağılımı değiştiğinde yalnızca
+değişen fonlar için yeniden kurulur; her yenilemede tüm fonların tahmini
+tek matris-vektör çarpımıdır. Görünen metni değişmeyen fonlar bildirilmez.
+GUI'den bağımsızdır.
+"""
+import numpy as np
+
+
+class NowcastEngine:
+    """Varlık dağılımı maruziyetleri × makro faktör değişimleri."""
+
+    def __init__(self, classify, groups, group_factors, digits=2):
+        """
+        Args:
+            classify: allocation_data → {varlık_sınıfı: yüzde} (StrategyEngine.classify_assets)
+            groups: Varlık sınıfı sırası
+            group_factors: {varlık_sınıfı: {makro_adı: ağırlık}}; olmayan sınıf 0 kabul edilir
+            digits: Görünen tahmin hassasiyeti (değişim bildirimi bu yuvarlamaya göre)
+        """
+        self.classify = classify
+        self.groups = list(groups)
+        self.factors = sorted({name for mix in group_factors.values() for name in mix})
+        self.digits = digits
+        # (sınıf × faktör) dönüşüm: sınıf kesri → faktör maruziyeti
+        self._mix = np.zeros((len(self.groups), len(self.factors)))
+        for g, group in enumerate(self.groups):
+            for name, weight in group_factors.get(group, {}).items():
+                self._mix[g, self.factors.index(name)] = weight
+
+        self.codes = []
+        self._index = {}
+        self._sources = []                       # Satırın kurulduğu allocation_data nesnesi
+        self.exposures = np.zeros((0, len(self.factors)))
+        self.values = np.zeros(0)                # Son tahmin (%)
+        self._shown = np.zeros(0)                # Son bildirilen yuvarlanmış değer
+        self._ready = np.zeros(0, dtype=bool)
+
+    def _grow(self, extra):
+        self.exposures = np.vstack([self.exposures, np.zeros((extra, len(self.factors)))])
+        self.values = np.concatenate([self.values, np.zeros(extra)])
+        self._shown = np.concatenate([self._shown, np.full(extra, np.nan)])
+        self._ready = np.concatenate([self._ready, np.zeros(extra, dtype=bool)])
+
+    def sync(self, allocation_cache):
+        """allocation_cache ile maruziyetleri eşitle; değişen satır sayısını döndür.
+
+        Dağılım nesnesi değişmeyen fonlar yeniden sınıflandırılmaz (kimlik karşılaştırması).
+        Arka plan yüklemeleri sözlüğü değiştirebileceğinden bir kopyası üzerinde çalışılır.
+        """
+        items = list(allocation_cache.items())
+        new = [code for code, alloc in items
+               if alloc and code not in self._index]
+        if new:
+            start = len(self.codes)
+            self._grow(len(new))
+            for i, code in enumerate(new, start):
+                self._index[code] = i
+                self.codes.append(code)
+                self._sources.append(None)
+
+        changed = 0
+        for code, alloc in items:
+            i = self._index.get(code)
+            if i is None or self._sources[i] is alloc:
+                continue
+            groups = self.classify(alloc)
+            fractions = np.array([groups.get(g, 0.0) for g in self.groups]) / 100.0
+            self.exposures[i] = fractions @ self._mix
+            self._sources[i] = alloc
+            self._ready[i] = True
+            changed += 1
+        return changed
+
+    def factor_vector(self, macro_data):
+        """Makro verisinden (F,) günlük değişim vektörü (%); eksik gösterge 0."""
+        return np.array([
+            (macro_data.get(name) or {}).get('daily') or 0.0 for name in self.factors
+        ], dtype=np.float64)
+
+    def update(self, macro_data):
+        """Tüm fonların tahminini güncelle; görünen değeri değişen fon kodlarını döndür."""
+        self.values = self.exposures @ self.factor_vector(macro_data)
+        rounded = np.round(self.values, self.digits)
+        changed = np.flatnonzero(self._ready & (rounded != self._shown))
+        self._shown[changed] = rounded[changed]
+        return [self.codes[i] for i in changed]
+
+    def value(self, code):
+        """Fonun son tahmini (%); dağılımı bilinmiyorsa None."""
+        i = self._index.get(code)
+        if i is None or not self._ready[i]:
+            return None
+        return float(self.values[i])
+
+    def text(self, code):
+        """Tablo hücresi için tahmin metni ("≈+0.32%") veya boş metin."""
+        value = self.value(code)
+        return "" if value is None else f"≈{value:+.{self.digits}f}%"
+
+    def portfolio(self, distribution, total_value):
+        """Portföyün tahmini TL değişimi ve tahmini olan ağırlık oranı (0-1).
+
+        distribution: {fon: yüzde}
+        """
+        change, covered = 0.0, 0.0
+        for code, pct in distribution.items():
+            value = self.value(code)
+            if pct <= 0 or value is None:
+                continue
+            change += total_value * pct / 100.0 * value / 100.0
+            covered += pct / 100.0
+        return change, covered
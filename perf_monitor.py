@@ -0,0 +1,173 @@
+"""
+TEFAS BES Fon Analizi — Performans Ölçüm Modülü
+Sıcak yollar (çekme, parse, kayıt, çizim, hesaplama) için hafif span/zamanlayıcı.
+Kapalıyken her çağrı tek bir bayrak kontrolüne iner.
+GUI'den bağımsızdır; Görünüm → Performans penceresi bu verileri okur.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Darboğaz kategorileri
+CATEGORY_FETCH = "fetch"
+CATEGORY_PARSE = "parse"
+CATEGORY_PERSIST = "persist"
+CATEGORY_RENDER = "render"
+CATEGORY_COMPUTE = "compute"
+
+CATEGORY_LABELS = {
+    CATEGORY_FETCH: "Ağ",
+    CATEGORY_PARSE: "Parse",
+    CATEGORY_PERSIST: "Kayıt",
+    CATEGORY_RENDER: "Çizim",
+    CATEGORY_COMPUTE: "Hesaplama",
+}
+
+
+class _NullSpan:
+    """Ölçüm kapalıyken dönen, hiçbir şey yapmayan span."""
+    bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_monitor", "_name", "_category", "_start", "bytes")
+
+    def __init__(self, monitor, name, category, nbytes):
+        self._monitor = monitor
+        self._name = name
+        self._category = category
+        self.bytes = nbytes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._monitor.record(self._name, self._category,
+                             time.perf_counter() - self._start, self.bytes)
+        return False
+
+
+class _Stat:
+    __slots__ = ("category", "count", "total", "max", "bytes", "samples")
+
+    def __init__(self, category, max_samples):
+        self.category = category
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.samples = deque(maxlen=max_samples)
+
+
+class PerfMonitor:
+    """İşlem bazında adet, toplam/p50/p95/max süre ve bayt sayacı."""
+
+    def __init__(self, enabled=False, max_samples=2048):
+        self.enabled = enabled
+        self._max_samples = max_samples
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+
+    def span(self, name, category, nbytes=0):
+        """`with monitor.span(...) as sp:` — sp.bytes ile aktarılan bayt eklenebilir."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, nbytes)
+
+    def timed(self, name, category):
+        """Fonksiyon/metot dekoratörü."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, category, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def record(self, name, category, seconds, nbytes=0):
+        with self._lock:
+            stat = self._stats.get(name)
+            if stat is None:
+                stat = self._stats[name] = _Stat(category, self._max_samples)
+            stat.count += 1
+            stat.total += seconds
+            stat.bytes += nbytes
+            if seconds > stat.max:
+                stat.max = seconds
+            stat.samples.append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._started_at = time.time()
+
+    # ── Raporlama ─────────────────────────────────
+
+    @staticmethod
+    def _percentile(sorted_values, pct):
+        if not sorted_values:
+            return 0.0
+        k = min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))
+        return sorted_values[k]
+
+    def snapshot(self):
+        """[{name, category, count, total_ms, p50_ms, p95_ms, max_ms, bytes}, ...] (toplam süreye göre)."""
+        with self._lock:
+            items = [(name, stat, sorted(stat.samples)) for name, stat in self._stats.items()]
+        rows = []
+        for name, stat, samples in items:
+            rows.append({
+                "name": name,
+                "category": stat.category,
+                "count": stat.count,
+                "total_ms": stat.total * 1000,
+                "p50_ms": self._percentile(samples, 50) * 1000,
+                "p95_ms": self._percentile(samples, 95) * 1000,
+                "max_ms": stat.max * 1000,
+                "bytes": stat.bytes,
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def category_totals(self, rows=None):
+        """{kategori: toplam_ms} — en büyük olan darboğazdır."""
+        totals = {c: 0.0 for c in CATEGORY_LABELS}
+        for row in rows if rows is not None else self.snapshot():
+            totals[row["category"]] = totals.get(row["category"], 0.0) + row["total_ms"]
+        return totals
+
+    def export_json(self, path):
+        rows = self.snapshot()
+        data = {
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+            "window_s": round(time.time() - self._started_at, 1),
+            "categories": self.category_totals(rows),
+            "operations": rows,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+
+# Uygulama genelinde tek ölçüm örneği (TEFAS_PERF=1 ile açık başlar)
+monitor = PerfMonitor(enabled=os.environ.get("TEFAS_PERF") == "1")
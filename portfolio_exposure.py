@@ -0,0 +1,146 @@
+"""
+TEFAS BES Fon Analizi — Portföy Varlık Maruziyeti
+Portföydeki fonların varlık dağılımları fon × varlık matrisine çevrilir;
+varlık adları ve her adın varlık grubu (anahtar kelime eşleşmesi) bir kez
+belirlenir. Birleşik dağılım ağırlık vektörü × matris, grup maruziyeti
+ayrıca varlık → grup matrisiyle çarpımdır. Fon çiftlerinin örtüşmesi
+(ortak varlık yüzdelerinin minimumları toplamı) ve yoğunlaşma (HHI) aynı
+matristen hesaplanır; K² büyüyen örtüşme yalnızca ilk istendiğinde (Portföy
+Özeti) hesaplanır, yalnızca birleşik dağılım isteyen çağrılar ödemez. Sonuç (fonlar, ağırlıklar) anahtarıyla saklanır ve
+yalnızca ağırlıklar veya fonlardan birinin dağılım nesnesi değişince yeniden
+hesaplanır. GUI'den bağımsızdır.
+"""
+import numpy as np
+
+OTHER_GROUP = "Diğer"
+CACHE_SIZE = 8
+
+
+class PortfolioExposure:
+    """Bir portföyün birleşik dağılımı, grup maruziyeti, örtüşme ve yoğunlaşması."""
+
+    def __init__(self, codes, weights, assets, groups, matrix, asset_hhi, group_hhi, fund_hhi):
+        self.codes = codes          # Dağılımı olan fonlar (K)
+        self.weights = weights      # (K,) kullanılan ağırlıklar (yüzde / 100)
+        self.assets = assets        # [(varlık, yüzde)] büyükten küçüğe
+        self.groups = groups        # [(grup, yüzde)] büyükten küçüğe
+        self.asset_hhi = asset_hhi  # Varlık bazında HHI (0-1); 1/HHI = etkin varlık sayısı
+        self.group_hhi = group_hhi  # Varlık grubu bazında HHI
+        self.fund_hhi = fund_hhi    # Fon ağırlıkları HHI; 1/HHI = etkin fon sayısı
+        self._matrix = matrix       # (K × A) fon × varlık yüzdeleri
+        self._overlap = None
+
+    @property
+    def overlap(self):
+        """(K × K) ortak varlık yüzdesi (köşegen: fonun toplamı); ilk istendiğinde hesaplanır.
+
+        Satır satır hesaplanır; bellek K × A ile sınırlı kalır.
+        """
+        if self._overlap is None:
+            matrix = self._matrix
+            k = len(matrix)
+            overlap = np.empty((k, k))
+            for i in range(k):
+                overlap[i, i:] = np.minimum(matrix[i], matrix[i:]).sum(axis=1)
+                overlap[i:, i] = overlap[i, i:]
+            self._overlap = overlap
+        return self._overlap
+
+    def pairs(self, minimum=0.0):
+        """[(fon_a, fon_b, örtüşme %)] örtüşmesi minimum'u aşan çiftler, büyükten küçüğe."""
+        i, j = np.triu_indices(len(self.codes), k=1)
+        values = self.overlap[i, j]
+        keep = np.flatnonzero(values > minimum)
+        order = keep[np.argsort(-values[keep], kind="stable")]
+        return [(self.codes[i[k]], self.codes[j[k]], float(values[k])) for k in order]
+
+
+def _hhi(shares):
+    total = shares.sum()
+    return float(((shares / total) ** 2).sum()) if total > 0 else 0.0
+
+
+class ExposureEngine:
+    """Portföy maruziyeti; fon satırları ve sonuçlar önbellekte tutulur."""
+
+    def __init__(self, group_keywords):
+        """
+        Args:
+            group_keywords: {grup: [küçük harf anahtar kelimeler]}; eşleşmeyen varlık OTHER_GROUP
+        """
+        self.group_keywords = group_keywords
+        self.group_names = list(group_keywords) + [OTHER_GROUP]
+        self.assets = []                 # Sütun → varlık adı
+        self._asset_index = {}
+        self._asset_group = []           # Sütun → grup numarası
+        self._rows = {}                  # fon → (allocation_data, sütunlar, yüzdeler)
+        self._cache = {}                 # (fonlar, ağırlıklar) → (dağılım nesneleri, sonuç)
+        self.computed = 0                # Hesaplanan (önbellekte bulunmayan) portföy sayısı
+
+    def _column(self, name):
+        col = self._asset_index.get(name)
+        if col is None:
+            col = len(self.assets)
+            self._asset_index[name] = col
+            self.assets.append(name)
+            lower = name.lower()
+            group = next((g for g, keywords in enumerate(self.group_keywords.values())
+                          if any(kw in lower for kw in keywords)), len(self.group_names) - 1)
+            self._asset_group.append(group)
+        return col
+
+    def _row(self, code, allocation):
+        """Fonun seyrek satırı (sütunlar, yüzdeler); dağılım nesnesi değişmedikçe yeniden kurulmaz."""
+        cached = self._rows.get(code)
+        if cached is not None and cached[0] is allocation:
+            return cached[1], cached[2]
+        cols, values = [], []
+        for name, data in allocation.items():
+            pct = data.get('percentage', 0) if isinstance(data, dict) else float(data)
+            if pct > 0:
+                cols.append(self._column(name))
+                values.append(pct)
+        row = (np.array(cols, dtype=np.intp), np.array(values, dtype=np.float64))
+        self._rows[code] = (allocation, *row)
+        return row
+
+    def exposure(self, available, fund_distribution):
+        """Portföy maruziyeti (PortfolioExposure).
+
+        Args:
+            available: {fon_kodu: allocation_data} — boş olmayan dağılımlar
+            fund_distribution: {fon_kodu: yüzde}; ağırlığı olmayan fona eşit ağırlık (1/K)
+        """
+        codes = list(available)
+        n = len(codes)
+        weights = tuple(fund_distribution.get(c, 0) / 100 if fund_distribution.get(c, 0) > 0
+                        else 1 / n for c in codes)
+        key = (tuple(codes), weights)
+        sources = tuple(available[c] for c in codes)
+        cached = self._cache.get(key)
+        if cached is not None and all(a is b for a, b in zip(cached[0], sources)):
+            return cached[1]
+
+        rows = [self._row(c, available[c]) for c in codes]
+        matrix = np.zeros((n, len(self.assets)))
+        for i, (cols, values) in enumerate(rows):
+            np.add.at(matrix[i], cols, values)
+        w = np.array(weights)
+        combined = w @ matrix
+        group_of = np.array(self._asset_group, dtype=np.intp)
+        group_totals = np.bincount(group_of, weights=combined, minlength=len(self.group_names))
+
+        present = np.flatnonzero(combined > 0)
+        order = present[np.argsort(-combined[present], kind="stable")]
+        assets = [(self.assets[c], float(combined[c])) for c in order]
+        g_present = np.flatnonzero(group_totals > 0)
+        g_order = g_present[np.argsort(-group_totals[g_present], kind="stable")]
+        groups = [(self.group_names[g], float(group_totals[g])) for g in g_order]
+
+        result = PortfolioExposure(codes, w, assets, groups, matrix,
+                                   _hhi(combined), _hhi(group_totals), _hhi(w))
+        self.computed += 1
+        self._cache[key] = (sources, result)
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)))
+        return result
@@ -0,0 +1,299 @@
+"""
+TEFAS BES Fon Analizi — Portföy Özeti Görünümü
+Portföy Özeti sekmesinin widget'ları her mod (Mevcut / Planlanan) için bir kez
+kurulur ve yerinde güncellenir. Fon satırları (dağılım girişi, TL değer,
+dönemsel getiri) fon başına bir kez oluşturulur; sonraki çizimlerde yalnızca
+değişen metin ve renkler yazılır. Yapısı veriyle değişen bölümler
+(simülasyon, korelasyon, varlık dağılımı) girdi anahtarıyla saklanır ve
+yalnızca anahtar değişince yeniden çizilir. Fare tekerleği widget başına
+bağlanmaz; tüm widget'lar tek bir bindtag'i paylaşır.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+WHEEL_TAG = "PortfolioWheel"   # Portföy Özeti kaydırma bindtag'i (bind_class ile bağlanır)
+_UNSET = object()
+
+
+def add_wheel(widget):
+    """Widget ve altındakilere WHEEL_TAG ekle (bir kez)."""
+    tags = widget.bindtags()
+    if WHEEL_TAG not in tags:
+        widget.bindtags(tags[:1] + (WHEEL_TAG,) + tags[1:])
+    for child in widget.winfo_children():
+        add_wheel(child)
+
+
+def _update(widget, **options):
+    """Yalnızca değişen seçenekleri yaz."""
+    changed = {k: v for k, v in options.items() if str(widget.cget(k)) != str(v)}
+    if changed:
+        widget.config(**changed)
+
+
+class Section:
+    """Girdi anahtarı değiştiğinde içeriği yeniden çizilen bölüm."""
+
+    def __init__(self, parent):
+        self.frame = ttk.Frame(parent)
+        self.frame.pack(fill=tk.X)
+        self.key = _UNSET
+
+    def render(self, key, build):
+        """Anahtar öncekiyle aynıysa bir şey yapma; değilse build(frame) ile yeniden çiz."""
+        if self.key is not _UNSET and key == self.key:
+            return False
+        for widget in self.frame.winfo_children():
+            widget.destroy()
+        build(self.frame)
+        add_wheel(self.frame)
+        self.key = key
+        return True
+
+
+class _FundRow:
+    """Fon dağılımı satırı: kod, yüzde girişi, TL değer."""
+
+    def __init__(self, parent, code, color, on_apply):
+        self.frame = ttk.Frame(parent)
+        tk.Label(self.frame, text=code, font=("Arial", 12, "bold"),
+                 fg=color, width=8, anchor="w").pack(side=tk.LEFT)
+        self.pct_var = tk.StringVar()
+        entry = ttk.Entry(self.frame, textvariable=self.pct_var, width=8,
+                          font=("Arial", 12), justify="center")
+        entry.pack(side=tk.LEFT, padx=(0, 5))
+        entry.bind("<Return>", lambda e: on_apply())
+        self.tl_label = tk.Label(self.frame, text="—", font=("Arial", 12),
+                                 fg="#333", width=14, anchor="e")
+        self.tl_label.pack(side=tk.LEFT)
+        self.shown_pct = None      # Girişe son yazılan kayıtlı yüzde
+        add_wheel(self.frame)
+
+
+class _ReturnRow:
+    """Dönemsel TL getiri satırı: kod ve dönem başına bir etiket."""
+
+    def __init__(self, parent, code, color, n_periods, font=("Arial", 10), code_font=("Arial", 11, "bold")):
+        self.frame = ttk.Frame(parent)
+        tk.Label(self.frame, text=code, font=code_font,
+                 fg=color, width=7, anchor="w").pack(side=tk.LEFT)
+        self.cells = []
+        for _ in range(n_periods):
+            lbl = tk.Label(self.frame, text="—", font=font, fg="#999", width=10, anchor="center")
+            lbl.pack(side=tk.LEFT)
+            self.cells.append(lbl)
+        add_wheel(self.frame)
+
+    def set(self, cells):
+        """cells: [(metin, renk)] dönem sırasıyla."""
+        for lbl, (text, color) in zip(self.cells, cells):
+            _update(lbl, text=text, fg=color)
+
+
+class PortfolioView:
+    """Bir modun (Mevcut / Planlanan) Portföy Özeti widget'ları."""
+
+    def __init__(self, parent, mode_label, mode_color, periods, value_var, on_apply, on_equalize):
+        """
+        Args:
+            parent: Portföy sekmesinin kaydırılabilir içeriği
+            periods: Config.PORTFOLIO_PERIODS
+            value_var: Toplam portföy değeri StringVar (modlar arasında ortak)
+            on_apply: Uygula / Enter; on_equalize: Eşitle
+        """
+        self.mode_label = mode_label
+        self.mode_color = mode_color
+        self._on_apply = on_apply
+        self.frame = ttk.Frame(parent)
+        self.empty_label = tk.Label(
+            self.frame, text=f"{mode_label} fonlarınız tanımlı değil.\n\n"
+            "Fon Yönetimi kutusuna\nfon kodlarını girin ve kaydedin.",
+            font=("Arial", 13), fg="gray", justify="center")
+        self.body = ttk.Frame(self.frame)
+        body = self.body
+
+        # ── Fon kodları listesi ──
+        codes_frame = ttk.Frame(body)
+        codes_frame.pack(fill=tk.X, padx=10, pady=(2, 6))
+        tk.Label(codes_frame, text=f"{mode_label} Fonlar:",
+                 font=("Arial", 11, "bold"), fg=mode_color).pack(side=tk.LEFT, padx=(0, 5))
+        self.codes_label = tk.Label(codes_frame, text="", font=("Arial", 11), fg="#555",
+                                    wraplength=280, justify="left")
+        self.codes_label.pack(side=tk.LEFT, fill=tk.X)
+        ttk.Separator(body, orient='horizontal').pack(fill=tk.X, padx=5, pady=4)
+
+        # ── Portföy değer takibi ──
+        pv_header = ttk.Frame(body)
+        pv_header.pack(fill=tk.X, padx=10, pady=(6, 2))
+        tk.Label(pv_header, text="💰 Portföy Değer Takibi",
+                 font=("Arial", 14, "bold"), fg="#4CAF50").pack(anchor="w")
+
+        pv_input_frame = ttk.Frame(body)
+        pv_input_frame.pack(fill=tk.X, padx=10, pady=(4, 6))
+        tk.Label(pv_input_frame, text="Toplam Değer (TL):",
+                 font=("Arial", 12, "bold"), fg="#555").pack(side=tk.LEFT, padx=(0, 5))
+        pv_entry = ttk.Entry(pv_input_frame, textvariable=value_var, width=18, font=("Arial", 13))
+        pv_entry.pack(side=tk.LEFT, padx=(0, 5))
+        pv_entry.bind("<Return>", lambda e: on_apply())
+        ttk.Button(pv_input_frame, text="Uygula", command=on_apply).pack(side=tk.LEFT, padx=2)
+        ttk.Button(pv_input_frame, text="Eşitle", command=on_equalize).pack(side=tk.LEFT, padx=2)
+
+        dist_header = ttk.Frame(body)
+        dist_header.pack(fill=tk.X, padx=10, pady=(4, 2))
+        tk.Label(dist_header, text="Fon", font=("Arial", 11, "bold"),
+                 fg="#555", width=8, anchor="w").pack(side=tk.LEFT)
+        tk.Label(dist_header, text="Dağılım %", font=("Arial", 11, "bold"),
+                 fg="#555", width=8, anchor="center").pack(side=tk.LEFT, padx=(0, 5))
+        tk.Label(dist_header, text="TL Değer", font=("Arial", 11, "bold"),
+                 fg="#555", width=14, anchor="e").pack(side=tk.LEFT)
+
+        self.rows_frame = ttk.Frame(body)
+        self.rows_frame.pack(fill=tk.X, padx=10)
+
+        total_pct_frame = ttk.Frame(body)
+        total_pct_frame.pack(fill=tk.X, padx=10, pady=(4, 2))
+        self.total_pct_label = tk.Label(total_pct_frame, text="", font=("Arial", 12, "bold"))
+        self.total_pct_label.pack(side=tk.LEFT)
+        self.value_label = tk.Label(total_pct_frame, text="", font=("Arial", 12), fg="#555")
+        self.value_label.pack(side=tk.LEFT, padx=(10, 0))
+
+        # ── Dönemsel TL getiri tablosu (portföy değeri ve dağılım varsa gösterilir) ──
+        self.returns_frame = ttk.Frame(body)
+        ret = self.returns_frame
+        ttk.Separator(ret, orient='horizontal').pack(fill=tk.X, padx=5, pady=6)
+        tk.Label(ret, text="📊 Dönemsel Getiri (TL)",
+                 font=("Arial", 13, "bold"), fg="#4CAF50").pack(anchor="w", padx=10, pady=(2, 4))
+        ret_header = ttk.Frame(ret)
+        ret_header.pack(fill=tk.X, padx=10, pady=(0, 2))
+        tk.Label(ret_header, text="Fon", font=("Arial", 11, "bold"),
+                 fg="#555", width=7, anchor="w").pack(side=tk.LEFT)
+        for _, label, _ in periods:
+            tk.Label(ret_header, text=label, font=("Arial", 10, "bold"),
+                     fg="#555", width=10, anchor="center").pack(side=tk.LEFT)
+        ttk.Separator(ret, orient='horizontal').pack(fill=tk.X, padx=10)
+        self.return_rows_frame = ttk.Frame(ret)
+        self.return_rows_frame.pack(fill=tk.X, padx=10)
+        ttk.Separator(ret, orient='horizontal').pack(fill=tk.X, padx=10)
+        self.total_row = _ReturnRow(ret, "TOPLAM", "#333", len(periods), font=("Arial", 10, "bold"))
+        self.total_row.frame.pack(fill=tk.X, padx=10, pady=2)
+
+        daily_frame = ttk.Frame(ret)
+        daily_frame.pack(fill=tk.X, padx=10, pady=(6, 2))
+        self.daily_title = tk.Label(daily_frame, text="", font=("Arial", 12, "bold"), fg="#555")
+        self.daily_title.pack(side=tk.LEFT)
+        self.daily_label = tk.Label(daily_frame, text="", font=("Arial", 14, "bold"))
+        self.daily_label.pack(side=tk.LEFT, padx=8)
+        self.nowcast_label = tk.Label(daily_frame, text="", font=("Arial", 12, "bold"))
+        self.nowcast_label.pack(side=tk.LEFT, padx=8)
+
+        # ── Veriyle yapısı değişen bölümler ──
+        self.simulation = Section(body)
+        self.correlation = Section(body)
+        ttk.Separator(body, orient='horizontal').pack(fill=tk.X, padx=5, pady=8)
+        self.allocation = Section(body)
+
+        self._periods = len(periods)
+        self._rows = {}            # fon → _FundRow
+        self._return_rows = {}     # fon → _ReturnRow
+        self._order = ()           # Gösterilen dağılım satırları
+        self._return_order = ()    # Gösterilen getiri satırları
+        add_wheel(self.frame)
+
+    # ── Güncelleme ────────────────────────────────
+
+    def show_funds(self, funds):
+        """Fon satırlarını eşitle (yeni fona satır, çıkan fonun satırı silinir); fon yoksa False."""
+        funds = tuple(funds)
+        if not funds:
+            self.body.pack_forget()
+            if not self.empty_label.winfo_manager():
+                self.empty_label.pack(pady=40)
+            return False
+        self.empty_label.pack_forget()
+        if not self.body.winfo_manager():
+            self.body.pack(fill=tk.BOTH, expand=True)
+        _update(self.codes_label, text=", ".join(funds))
+
+        for rows in (self._rows, self._return_rows):
+            for code in [c for c in rows if c not in funds]:
+                rows.pop(code).frame.destroy()
+        self._return_order = tuple(c for c in self._return_order if c in self._return_rows)
+        if funds != self._order:
+            for row in self._rows.values():
+                row.frame.pack_forget()
+            for code in funds:
+                row = self._rows.get(code)
+                if row is None:
+                    row = self._rows[code] = _FundRow(self.rows_frame, code, self.mode_color, self._on_apply)
+                row.frame.pack(fill=tk.X, pady=2)
+            self._order = funds
+        return True
+
+    @property
+    def entries(self):
+        """{fon_kodu: StringVar} gösterilen dağılım girişleri."""
+        return {code: self._rows[code].pct_var for code in self._order}
+
+    @property
+    def tl_labels(self):
+        return {code: self._rows[code].tl_label for code in self._order}
+
+    def reset_inputs(self):
+        """Sonraki set_distribution tüm girişleri kayıtlı değerlerle yeniden yazsın."""
+        for row in self._rows.values():
+            row.shown_pct = None
+
+    def set_distribution(self, distribution, total_value):
+        """Dağılım girişlerini, TL değerleri ve toplamı yaz; toplam yüzdeyi döndür.
+
+        Giriş yalnızca kayıtlı yüzde değiştiyse yazılır; kaydedilmemiş düzenleme korunur.
+        """
+        total_pct = 0.0
+        for code in self._order:
+            row = self._rows[code]
+            pct = distribution.get(code, 0)
+            total_pct += pct
+            if pct != row.shown_pct:
+                row.pct_var.set(f"{pct:.1f}" if pct > 0 else "")
+                row.shown_pct = pct
+            tl_val = total_value * (pct / 100) if pct > 0 else 0
+            _update(row.tl_label, text=f"{tl_val:,.0f} ₺" if tl_val > 0 else "—")
+
+        ok = abs(total_pct - 100) < 0.5
+        _update(self.total_pct_label,
+                text=f"Toplam Dağılım: %{total_pct:.1f}" + (" ✓" if ok else " ⚠"),
+                fg="#4CAF50" if ok else "#f44336")
+        _update(self.value_label,
+                text=f"  |  Portföy: {total_value:,.0f} ₺" if total_value > 0 else "")
+        return total_pct
+
+    def set_returns(self, cells, totals=None, daily=None):
+        """Dönemsel getiri tablosu.
+
+        Args:
+            cells: {fon_kodu: [(metin, renk)]} gösterilecek satırlar; None ise tablo gizlenir
+            totals: TOPLAM satırı [(metin, renk)]
+            daily: Bugünkü değişim (metin, renk) veya None
+        """
+        if cells is None:
+            self.returns_frame.pack_forget()
+            return
+        if not self.returns_frame.winfo_manager():
+            self.returns_frame.pack(fill=tk.X, before=self.simulation.frame)
+        order = tuple(code for code in self._order if code in cells)
+        if order != self._return_order or any(c not in self._return_rows for c in order):
+            for row in self._return_rows.values():
+                row.frame.pack_forget()
+            for code in order:
+                row = self._return_rows.get(code)
+                if row is None:
+                    row = self._return_rows[code] = _ReturnRow(
+                        self.return_rows_frame, code, self.mode_color, self._periods)
+                row.frame.pack(fill=tk.X, pady=1)
+            self._return_order = order
+        for code in order:
+            self._return_rows[code].set(cells[code])
+        self.total_row.set(totals)
+        text, color = daily if daily is not None else ("", "#555")
+        _update(self.daily_title, text="Bugünkü Değişim:" if daily is not None else "")
+        _update(self.daily_label, text=text, fg=color)
@@ -0,0 +1,186 @@
+"""
+TEFAS BES Fon Analizi — Fon Değişikliği Planlayıcı
+BES'te fon dağılımı yılda sınırlı sayıda (6) değiştirilebilir. Planlayıcı,
+mevcut dağılımdan başlayıp önümüzdeki H ay için hangi ay hangi dağılıma
+geçileceğini kalan değişiklik hakkı içinde seçer.
+
+Beklenen aylık getiri: kısa vadeli (1-3 ay) getiri ivmesi ay başına `decay`
+oranında sönerek uzun vadeli (1 yıl) ortalamaya yaklaşır. Aday dağılımlar:
+mevcut dağılım, her ay için beklenen getirisi en yüksek k fon, öngörü skoru
+en yüksek k fon ve mevcut dağılımdan en zayıf fonların tek tek değiştirildiği
+ara adımlar. Seçim, (ay, dağılım, kullanılan hak) üzerinde dinamik
+programlamadır; geçiş "en iyi önceki durum" üzerinden yapıldığından süre
+aday sayısıyla doğrusal büyür. GUI'den bağımsızdır.
+"""
+import numpy as np
+
+DEFAULT_DECAY = 0.7        # Kısa vadeli ivmenin aylık sönme oranı
+DEFAULT_MIN_GAIN = 0.002   # Bir değişiklik hakkının fırsat maliyeti (log getiri)
+
+
+def _monthly(total_pct, months):
+    """Dönem getirisi (%) → bileşik aylık getiri (kesir)."""
+    with np.errstate(invalid='ignore'):
+        return np.power(1 + total_pct / 100.0, 1.0 / months) - 1
+
+
+class RebalancePlan:
+    """Planlayıcı çıktısı."""
+
+    def __init__(self, steps, portfolios, expected_growth, hold_growth, switches):
+        self.steps = steps                  # [(ay, önceki_dağılım, yeni_dağılım, beklenen_fark)]
+        self.portfolios = portfolios        # Her ay tutulan dağılım {fon: yüzde}
+        self.expected_growth = expected_growth  # Ufuk boyunca beklenen toplam getiri (kesir)
+        self.hold_growth = hold_growth          # Hiç değişiklik yapılmazsa
+        self.switches = switches
+
+
+class RebalancePlanner:
+    """Kalan değişiklik hakkıyla ay ay dağılım planı."""
+
+    def __init__(self, codes, short_returns, long_returns, scores=None,
+                 decay=DEFAULT_DECAY, min_gain=DEFAULT_MIN_GAIN):
+        """
+        Args:
+            codes: Fon kodları (N)
+            short_returns, long_returns: (N,) beklenen aylık getiri (kesir), NaN = veri yok
+            scores: (N,) öngörü composite skoru (opsiyonel; aday hedef üretimi için)
+        """
+        self.codes = list(codes)
+        self._index = {code: i for i, code in enumerate(self.codes)}
+        short = np.asarray(short_returns, dtype=np.float64)
+        long_ = np.asarray(long_returns, dtype=np.float64)
+        self.long = np.where(np.isfinite(long_), long_, np.where(np.isfinite(short), short, 0.0))
+        self.short = np.where(np.isfinite(short), short, self.long)
+        self.scores = None if scores is None else np.asarray(scores, dtype=np.float64)
+        self.decay = decay
+        self.min_gain = min_gain
+
+    @classmethod
+    def from_frame(cls, df, forecasts=None, **kwargs):
+        """load_and_prepare_data çıktısından; 0 değerli dönemler veri yok sayılır.
+
+        forecasts: ForecastStore (opsiyonel) — composite skorlar dizisinden okunur.
+        """
+        codes = df['Fon Kodu'].astype(str).str.strip().tolist()
+
+        def col(name):
+            values = df[name].to_numpy(dtype=np.float64) if name in df else np.zeros(len(df))
+            return np.where(values != 0, values, np.nan)
+
+        m1, m3, m6, y1 = col("1 Ay (%)"), col("3 Ay (%)"), col("6 Ay (%)"), col("1 Yıl (%)")
+        s1, s3 = _monthly(m1, 1), _monthly(m3, 3)
+        short = np.where(np.isfinite(s1) & np.isfinite(s3), 0.5 * s1 + 0.5 * s3,
+                         np.where(np.isfinite(s1), s1, s3))
+        long_ = _monthly(y1, 12)
+        for values, months in ((m6, 6), (m3, 3), (m1, 1)):
+            long_ = np.where(np.isfinite(long_), long_, _monthly(values, months))
+        scores = None
+        if forecasts:
+            scores = forecasts.composites_for(codes, missing=np.nan)
+        return cls(codes, short, long_, scores, **kwargs)
+
+    def expected_returns(self, horizon):
+        """(H × N) beklenen aylık getiri: ivme aylar geçtikçe uzun vadeli ortalamaya söner."""
+        fade = self.decay ** np.arange(horizon)[:, None]
+        return self.long + fade * (self.short - self.long)
+
+    # ── Aday Dağılımlar ───────────────────────────
+
+    def _top(self, values, k):
+        values = np.where(np.isfinite(values), values, -np.inf)
+        k = min(k, len(values))
+        idx = np.argpartition(-values, k - 1)[:k]
+        return idx[np.argsort(-values[idx], kind="stable")]
+
+    def candidates(self, current, k, horizon):
+        """Aday dağılımlar listesi; ilki mevcut dağılım. Dağılımlar {fon: yüzde} (toplam 100)."""
+        mu = self.expected_returns(horizon)
+        found, seen = [], set()
+
+        def _add(dist):
+            key = tuple(sorted((c, round(p, 1)) for c, p in dist.items() if p > 0))
+            if key and key not in seen:
+                seen.add(key)
+                found.append(dist)
+
+        _add(dict(current))
+        equal = 100.0 / k
+        for t in range(horizon):
+            _add({self.codes[i]: equal for i in self._top(mu[t], k)})
+        if self.scores is not None and np.isfinite(self.scores).any():
+            _add({self.codes[i]: equal for i in self._top(self.scores, k)})
+
+        # Mevcut dağılımdan en zayıf fonları sırayla en iyi fonlarla değiştir (ağırlık korunur)
+        avg_mu = mu.mean(axis=0)
+        held = [c for c in current if c in self._index]
+        held.sort(key=lambda c: avg_mu[self._index[c]])
+        outside = [self.codes[i] for i in self._top(avg_mu, k + len(held))
+                   if self.codes[i] not in current]
+        dist = dict(current)
+        for weak, strong in zip(held, outside):
+            if avg_mu[self._index[strong]] <= avg_mu[self._index[weak]]:
+                break
+            dist = dict(dist)
+            dist[strong] = dist.pop(weak)
+            _add(dist)
+        return found
+
+    # ── Plan ──────────────────────────────────────
+
+    def plan(self, current, budget, horizon, k=None):
+        """Mevcut dağılımdan başlayarak en fazla `budget` değişiklikli H aylık plan.
+
+        Her değişiklik min_gain kadar log getiriden feragat sayılır (ufuk sonrası
+        için hak saklamanın değeri); kazancı bunu aşmayan değişiklik önerilmez.
+        """
+        current = {c: p for c, p in current.items() if p > 0}
+        total = sum(current.values())
+        if total <= 0:
+            raise ValueError("Mevcut dağılım boş.")
+        current = {c: p * 100.0 / total for c, p in current.items()}
+        k = k or len(current)
+        horizon = max(1, horizon)
+        budget = max(0, budget)
+
+        portfolios = self.candidates(current, k, horizon)
+        mu = self.expected_returns(horizon)
+        weights = np.zeros((len(portfolios), len(self.codes)))
+        for p, dist in enumerate(portfolios):
+            for code, pct in dist.items():
+                i = self._index.get(code)
+                if i is not None:
+                    weights[p, i] = pct / 100.0
+        # Dağılımda olup veri setinde olmayan fonlar 0 getiri sayılır
+        growth = np.log1p(weights @ mu.T)          # (P × H)
+
+        n_p, n_s = len(portfolios), budget + 1
+        value = np.full((n_p, n_s), -np.inf)
+        value[0, 0] = 0.0
+        back = np.zeros((horizon, n_p, n_s), dtype=np.intp)   # -1 = kal, aksi halde önceki dağılım
+        for t in range(horizon):
+            best_prev = value.argmax(axis=0)                    # her hak sayısı için en iyi dağılım
+            switched = np.full((n_p, n_s), -np.inf)
+            switched[:, 1:] = value[best_prev[:-1], np.arange(n_s - 1)] - self.min_gain
+            stay_better = value >= switched
+            value = np.where(stay_better, value, switched) + growth[:, t][:, None]
+            back[t] = np.where(stay_better, -1, best_prev[np.maximum(np.arange(n_s) - 1, 0)][None, :])
+
+        p, s = np.unravel_index(np.argmax(value), value.shape)
+        path = []
+        for t in range(horizon - 1, -1, -1):
+            path.append(p)
+            prev = back[t, p, s]
+            if prev >= 0:
+                p, s = prev, s - 1
+        path.reverse()
+
+        steps, previous = [], 0
+        for t, p in enumerate(path):
+            if p != previous:
+                gain = float(np.expm1(growth[p, t:].sum() - growth[previous, t:].sum()))
+                steps.append((t, portfolios[previous], portfolios[p], gain))
+                previous = p
+        expected = float(np.expm1(sum(growth[p, t] for t, p in enumerate(path))))
+        hold = float(np.expm1(growth[0].sum()))
+        return RebalancePlan(steps, [portfolios[p] for p in path], expected, hold, len(steps))
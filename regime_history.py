@@ -0,0 +1,194 @@
+"""
+TEFAS BES Fon Analizi — Piyasa Rejimi Geçmişi
+StrategyEngine.classify_regime kurallarını makro kapanış geçmişinin
+(DataFetcher.fetch_macro_history) tüm günlerine tek seferde uygular:
+her gösterge için günlük ve 22 kapanışlık (aylık) değişim dizileri çıkarılır,
+puanlar np.select ile hesaplanır. Sonuç zaman çizelgesi saklanır; geçmişe
+yeni günler eklendiğinde yalnızca yeni günler (ve yeniden yayımlanmış olabilecek
+son gün) hesaplanır. Çizelge diske kaydedilip sonraki oturumda yüklenir.
+Rejimin ne zamandır sürdüğü ve ne sıklıkla değiştiği buradan okunur.
+GUI'den bağımsızdır.
+"""
+import os
+import threading
+
+import numpy as np
+
+from strategy_engine import StrategyEngine
+
+# Sabit sıra: kod → rejim anahtarı (puan sütunları ilk üçü)
+REGIMES = (StrategyEngine.REGIME_RISK_ON, StrategyEngine.REGIME_DEFENSIVE,
+           StrategyEngine.REGIME_INFLATION, StrategyEngine.REGIME_NEUTRAL)
+NEUTRAL_CODE = REGIMES.index(StrategyEngine.REGIME_NEUTRAL)
+MONTH_CLOSES = 22   # macro_snapshot / load_macro_data: aylık değişim 22 kapanış öncesine göre
+INDICATORS = ("BIST-100", "Altın", "USD/TRY")
+
+
+def _changes(dates, closes, days):
+    """Bir göstergenin `days` günlerindeki (günlük %, aylık %) değişimi; veri yoksa 0.
+
+    Her gün için o güne kadarki son kapanış kullanılır (macro_snapshot ile aynı).
+    """
+    series_dates = np.asarray(dates, dtype='datetime64[D]')
+    closes = np.asarray(closes, dtype=np.float64)
+    idx = np.searchsorted(series_dates, days, side='right') - 1
+    daily = np.zeros(len(days))
+    monthly = np.zeros(len(days))
+    ok = idx >= 1
+    current = closes[idx[ok]]
+    daily[ok] = (current - closes[idx[ok] - 1]) / closes[idx[ok] - 1] * 100
+    ok_m = idx >= MONTH_CLOSES - 1
+    base = closes[idx[ok_m] - (MONTH_CLOSES - 1)]
+    monthly[ok_m] = (closes[idx[ok_m]] - base) / base * 100
+    return daily, monthly
+
+
+def score_days(changes):
+    """classify_regime puanlaması, dizi hâlinde.
+
+    Args:
+        changes: {gösterge: (günlük %, aylık %)} — eksik gösterge 0 sayılır
+
+    Returns:
+        (scores (T × 3) risk_on/defensive/inflation, regime_codes (T,) REGIMES sırası)
+    """
+    n = len(next(iter(changes.values()))[0]) if changes else 0
+    zero = np.zeros(n)
+    bist_d, bist_m = changes.get("BIST-100", (zero, zero))
+    gold_d, gold_m = changes.get("Altın", (zero, zero))
+    usd_d, usd_m = changes.get("USD/TRY", (zero, zero))
+
+    risk_on = np.select([bist_m > 5, bist_m > 2, bist_m > 0], [3, 2, 1], 0)
+    defensive = np.select([bist_m < -5, bist_m < -2, bist_m < 0], [3, 2, 1], 0)
+    inflation = np.zeros(n, dtype=int)
+
+    defensive = defensive + np.select([gold_m > 5, gold_m > 2], [2, 1], 0)
+    inflation = inflation + (gold_m > 5)
+    inflation = inflation + np.select([usd_m > 5, usd_m > 3, usd_m > 1], [3, 2, 1], 0)
+
+    risk_on = risk_on + (bist_d > 1)
+    defensive = defensive + (gold_d > 1)
+    inflation = inflation + (usd_d > 0.5)
+
+    scores = np.column_stack((risk_on, defensive, inflation)).astype(np.int8)
+    codes = np.where(scores.max(axis=1) <= 1, NEUTRAL_CODE, scores.argmax(axis=1)).astype(np.int8)
+    return scores, codes
+
+
+class RegimeHistory:
+    """Günlük rejim zaman çizelgesi; makro geçmiş uzadıkça artımlı güncellenir."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dates = np.array([], dtype='datetime64[D]')
+        self.scores = np.zeros((0, 3), dtype=np.int8)
+        self.codes = np.zeros(0, dtype=np.int8)
+        self._source_first = None   # Geçmişin ilk günü (değişirse baştan hesaplanır)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @classmethod
+    def load(cls, path):
+        """Kayıtlı çizelgeyi yükle; dosya yoksa veya okunamazsa boş çizelge."""
+        history = cls()
+        try:
+            with np.load(path) as data:
+                dates, scores, codes = data["dates"], data["scores"], data["codes"]
+                first = data["source_first"]
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(path):
+                print(f"Rejim çizelgesi okunamadı, yeniden hesaplanacak: {e}")
+            return history
+        if len(dates) == len(scores) == len(codes) and len(first) == 1:
+            history.dates = dates.astype('datetime64[D]')
+            history.scores = scores.astype(np.int8)
+            history.codes = codes.astype(np.int8)
+            history._source_first = first[0]
+        return history
+
+    def save(self, path):
+        """Çizelgeyi .npz olarak yaz (geçici dosya + yer değiştirme)."""
+        with self._lock:
+            if self._source_first is None:
+                return
+            tmp = path + ".tmp.npz"
+            try:
+                np.savez(tmp, dates=self.dates, scores=self.scores, codes=self.codes,
+                         source_first=np.array([self._source_first], dtype='datetime64[D]'))
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"Rejim çizelgesi kaydedilemedi: {e}")
+
+    def update(self, history):
+        """{ad: ([ISO tarih], [kapanış])} geçmişiyle çizelgeyi güncelle; hesaplanan gün sayısı.
+
+        Önceki çizelge yeni günlerin önekiyse yalnızca son kayıtlı gün ve sonrası
+        hesaplanır; aksi halde baştan hesaplanır.
+        """
+        series = {name: history[name] for name in INDICATORS if history.get(name)}
+        if not series:
+            return 0
+        all_days = np.unique(np.concatenate([
+            np.asarray(dates, dtype='datetime64[D]') for dates, _ in series.values()]))
+        first = all_days[0]
+
+        with self._lock:
+            start = 0
+            kept = len(self.dates)
+            if (kept and self._source_first == first and len(all_days) >= kept
+                    and all_days[kept - 1] == self.dates[-1]):
+                start = kept - 1      # Son gün yeniden yayımlanmış olabilir
+            days = all_days[start:]
+            changes = {name: _changes(dates, closes, days)
+                       for name, (dates, closes) in series.items()}
+            scores, codes = score_days(changes)
+
+            self.dates = np.concatenate([self.dates[:start], days])
+            self.scores = np.concatenate([self.scores[:start], scores])
+            self.codes = np.concatenate([self.codes[:start], codes])
+            self._source_first = first
+            return len(days)
+
+    # ── Sorgular ──────────────────────────────────
+
+    def regimes_at(self, days):
+        """Verilen günlerin (ISO veya datetime64) rejim anahtarları; çizelge öncesi nötr."""
+        days = np.asarray(days, dtype='datetime64[D]')
+        idx = np.searchsorted(self.dates, days, side='right') - 1
+        codes = np.where(idx >= 0, self.codes[np.maximum(idx, 0)], NEUTRAL_CODE)
+        return [REGIMES[c] for c in codes]
+
+    def current_streak(self):
+        """(rejim, başlangıç ISO tarihi, süren işlem günü); çizelge boşsa None."""
+        if not len(self.codes):
+            return None
+        changes = np.flatnonzero(self.codes[1:] != self.codes[:-1])
+        start = changes[-1] + 1 if len(changes) else 0
+        return REGIMES[self.codes[-1]], str(self.dates[start]), int(len(self.codes) - start)
+
+    def flips(self, days=None):
+        """Son `days` takvim gününde (None = tüm çizelge) rejim değişikliği sayısı."""
+        codes = self.codes
+        if days is not None and len(self.dates):
+            codes = codes[self.dates >= self.dates[-1] - np.timedelta64(days, 'D')]
+        return int(np.count_nonzero(codes[1:] != codes[:-1]))
+
+    def shares(self, days=None):
+        """Son `days` takvim gününde rejimlerin gün payı: {rejim: oran}."""
+        codes = self.codes
+        if days is not None and len(self.dates):
+            codes = codes[self.dates >= self.dates[-1] - np.timedelta64(days, 'D')]
+        if not len(codes):
+            return {}
+        counts = np.bincount(codes, minlength=len(REGIMES))
+        return {REGIMES[i]: float(counts[i] / len(codes)) for i in range(len(REGIMES)) if counts[i]}
+
+    def segments(self):
+        """[(rejim, başlangıç ISO, bitiş ISO, gün sayısı)] kesintisiz rejim dönemleri."""
+        if not len(self.codes):
+            return []
+        bounds = np.concatenate([[0], np.flatnonzero(self.codes[1:] != self.codes[:-1]) + 1,
+                                 [len(self.codes)]])
+        return [(REGIMES[self.codes[a]], str(self.dates[a]), str(self.dates[b - 1]), int(b - a))
+                for a, b in zip(bounds[:-1], bounds[1:])]
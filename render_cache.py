@@ -0,0 +1,72 @@
+"""
+TEFAS BES Fon Analizi — Fon Detayı Çizim Önbelleği
+Fon detay sekmelerinin (varlık dağılımı, öngörü) hazır çizimlerini fon kodu
+başına saklar. Her kayıt çizimin dayandığı içeriğin özetini taşır; fon tekrar
+seçildiğinde özet aynıysa çizim yeniden kurulmadan kullanılır, farklıysa
+eski çizim atılır. En az kullanılan kayıt kapasite aşılınca düşer ve
+`on_evict` ile serbest bırakılır. Çizim nesnesinin türüne bakmaz; GUI'den
+bağımsızdır.
+"""
+import hashlib
+from collections import OrderedDict
+
+DEFAULT_CAPACITY = 24
+
+
+def content_digest(*parts):
+    """Parçaların repr'inden 16 baytlık BLAKE2b özeti (NaN içeren değerlerde de kararlı)."""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).digest()
+
+
+class RenderCache:
+    """Fon kodu → (içerik özeti, çizim); LRU."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, on_evict=None):
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, payload):
+        """Çizim önbellekte mi (kimlik karşılaştırması)."""
+        return any(entry[1] is payload for entry in self._entries.values())
+
+    def get(self, key, digest):
+        """Özet eşleşirse çizimi döndür; eşleşmeyen eski çizim atılır, yoksa None."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == digest:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            self.discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, key, digest, payload):
+        self.discard(key)
+        self._entries[key] = (digest, payload)
+        while len(self._entries) > self.capacity:
+            _, (_, old) = self._entries.popitem(last=False)
+            self._release(old)
+
+    def discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._release(entry[1])
+
+    def clear(self):
+        while self._entries:
+            _, (_, payload) = self._entries.popitem(last=False)
+            self._release(payload)
+
+    def _release(self, payload):
+        if self.on_evict is not None:
+            try:
+                self.on_evict(payload)
+            except Exception as e:
+                print(f"Çizim önbelleği temizleme hatası: {e}")
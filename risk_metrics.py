@@ -0,0 +1,182 @@
+"""
+TEFAS BES Fon Analizi — Gerçek Risk Metrikleri
+NavStore fiyat matrisinden (tarih × fon) tüm fonlar için aynı anda:
+gerçekleşen volatilite, maksimum düşüş, aşağı yönlü sapma, Sharpe,
+Sortino, Calmar ve kayan Sharpe hesaplar. Her PORTFOLIO_PERIODS dönemi
+için son N işlem günü kullanılır (1 ay = 21 işlem günü). Python döngüsü
+yalnızca dönemler üzerindedir; fon ve gün ekseni NumPy ile işlenir.
+GUI'den bağımsızdır.
+"""
+import numpy as np
+
+TRADING_DAYS_PER_MONTH = 21
+TRADING_DAYS_PER_YEAR = 252
+MIN_COVERAGE = 0.8   # Pencerede verisi bu oranın altında olan fon için NaN
+COLUMN_BLOCK = 2048  # Bellek için fonlar bu genişlikte sütun bloklarıyla işlenir
+
+METRIC_NAMES = ("annual_return", "volatility", "downside_dev", "max_drawdown",
+                "sharpe", "sortino", "calmar", "observations")
+
+
+def daily_returns(prices):
+    """(T × N) fiyat → ((T-1) × N) basit günlük getiri; eksik fiyatta NaN."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return prices[1:] / prices[:-1] - 1.0
+
+
+def prefix_sums(returns, risk_free_daily=0.0):
+    """Pencere istatistikleri için satır önek toplamları ((T+1) × N, ilk satır 0).
+
+    NaN getiriler 0 sayılır ve gözlem sayısına katılmaz. Her dönem bu toplamların
+    iki satırının farkıyla O(N) hesaplanır.
+    """
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0.0).astype(np.float64)
+    downside = np.minimum(x - risk_free_daily, 0.0) * valid
+
+    def _prefix(values):
+        out = np.empty((values.shape[0] + 1, values.shape[1]))
+        out[0] = 0.0
+        np.cumsum(values, axis=0, out=out[1:])
+        return out
+
+    return {
+        "x": _prefix(x),
+        "x2": _prefix(x * x),
+        "n": _prefix(valid.astype(np.float64)),
+        "down2": _prefix(downside * downside),
+        "log": _prefix(np.log1p(x)),   # log servet eğrisi
+    }
+
+
+def _window_sums(ps, window, end=None):
+    """[end-window, end) satırlarının toplamları (end=None → son satır)."""
+    end = ps["n"].shape[0] - 1 if end is None else end
+    return {key: values[end] - values[end - window] for key, values in ps.items()}
+
+
+def rolling_sharpe(ps, window, risk_free_daily=0.0):
+    """Kayan yıllık Sharpe serisi: ((T-window+1) × N).
+
+    Gözlemi MIN_COVERAGE altında kalan pencereler NaN olur.
+    """
+    s1 = ps["x"][window:] - ps["x"][:-window]
+    s2 = ps["x2"][window:] - ps["x2"][:-window]
+    n = ps["n"][window:] - ps["n"][:-window]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s1 / n
+        var = (s2 - n * mean * mean) / (n - 1)
+        sharpe = ((mean - risk_free_daily) / np.sqrt(np.maximum(var, 0))
+                  * np.sqrt(TRADING_DAYS_PER_YEAR))
+    sharpe[n < window * MIN_COVERAGE] = np.nan
+    return sharpe
+
+
+def window_metrics(ps, window, risk_free_annual=0.0, end=None):
+    """Son `window` günden fon başına metrikler: {ad: (N,) dizi}.
+
+    Oranlar kesir olarak döner (0.12 = %12); volatilite ve sapmalar yıllıktır.
+    Yalnızca maksimum düşüş pencere boyunca tarama (maximum.accumulate) gerektirir.
+    end verilirse pencere önek satırı `end`'de biter (geçmiş bir tarih için).
+    """
+    rf_daily = (1 + risk_free_annual) ** (1 / TRADING_DAYS_PER_YEAR) - 1
+    end = ps["n"].shape[0] - 1 if end is None else end
+    w = _window_sums(ps, window, end)
+    n = w["n"]
+    ann = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = w["x"] / n
+        std = np.sqrt(np.maximum(w["x2"] - n * mean * mean, 0) / (n - 1))
+        volatility = std * ann
+        downside_dev = np.sqrt(w["down2"] / n) * ann
+        annual_return = np.expm1(w["log"] * TRADING_DAYS_PER_YEAR / n)
+
+        # Maksimum düşüş: log servet eğrisinin pencere başından itibaren zirvesine uzaklığı
+        log_wealth = ps["log"][end - window:end + 1]   # pencere başındaki 1.0 dahil
+        peak = np.maximum.accumulate(log_wealth, axis=0)
+        max_drawdown = -np.expm1((log_wealth - peak).min(axis=0))
+
+        sharpe = (mean - rf_daily) / std * ann
+        sortino = (annual_return - risk_free_annual) / downside_dev
+        calmar = annual_return / max_drawdown
+
+    metrics = {
+        "annual_return": annual_return,
+        "volatility": volatility,
+        "downside_dev": downside_dev,
+        "max_drawdown": max_drawdown,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "calmar": calmar,
+    }
+    short = n < window * MIN_COVERAGE
+    for values in metrics.values():
+        values[short | ~np.isfinite(values)] = np.nan
+    metrics["observations"] = n
+    return metrics
+
+
+class RiskMetrics:
+    """Tüm fonlar × PORTFOLIO_PERIODS dönemleri için risk metrikleri."""
+
+    def __init__(self, dates, codes, prices, periods, risk_free_annual=0.0):
+        """
+        Args:
+            dates, codes, prices: NavStore.price_matrix çıktısı
+            periods: Config.PORTFOLIO_PERIODS [(sütun, etiket, ay), ...]
+        """
+        self.codes = list(codes)
+        self.asof = str(dates[-1]) if len(dates) else None
+        self._index = {code: i for i, code in enumerate(self.codes)}
+        self._prices = prices
+        self._rf_daily = (1 + risk_free_annual) ** (1 / TRADING_DAYS_PER_YEAR) - 1
+        n_returns = max(prices.shape[0] - 1, 0)
+        self._window_days = {label: months * TRADING_DAYS_PER_MONTH
+                             for _, label, months in periods
+                             if months * TRADING_DAYS_PER_MONTH <= n_returns}
+
+        self.windows = {}          # etiket → {metrik: (N,) dizi}
+        for cols, ps in self._blocks():
+            for label, window in self._window_days.items():
+                block = window_metrics(ps, window, risk_free_annual)
+                target = self.windows.setdefault(label, {
+                    name: np.empty(len(self.codes)) for name in METRIC_NAMES})
+                for name, values in block.items():
+                    target[name][cols] = values
+
+    def _blocks(self):
+        """(sütun dilimi, önek toplamları) — fonlar COLUMN_BLOCK genişlikte işlenir."""
+        for start in range(0, len(self.codes), COLUMN_BLOCK):
+            cols = slice(start, min(start + COLUMN_BLOCK, len(self.codes)))
+            returns = daily_returns(np.asarray(self._prices[:, cols], dtype=np.float64))
+            yield cols, prefix_sums(returns, self._rf_daily)
+
+    def rolling_sharpe(self, label):
+        """Dönem uzunluğunda kayan Sharpe serisi ((T-w+1) × N); istendiğinde hesaplanır."""
+        window = self._window_days[label]
+        return np.concatenate([rolling_sharpe(ps, window, self._rf_daily)
+                               for _, ps in self._blocks()], axis=1)
+
+    @classmethod
+    def from_store(cls, store, periods, codes=None, risk_free_annual=0.0):
+        """NavStore'dan hesapla; depo boşsa None."""
+        if not store.shape[0]:
+            return None
+        dates, codes, prices = store.price_matrix(codes)
+        return cls(dates, codes, prices, periods, risk_free_annual)
+
+    def __contains__(self, code):
+        return code in self._index
+
+    def for_fund(self, code):
+        """{etiket: {metrik: float}} — verisi yeterli olmayan dönemler atlanır."""
+        i = self._index.get(code)
+        if i is None:
+            return {}
+        result = {}
+        for label, metrics in self.windows.items():
+            if np.isnan(metrics["volatility"][i]):
+                continue
+            result[label] = {name: float(metrics[name][i]) for name in METRIC_NAMES}
+        return result
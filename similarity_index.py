@@ -0,0 +1,213 @@
+"""
+TEFAS BES Fon Analizi — Benzer Fon İndeksi
+Fonları birim vektörlerle temsil eder ve bir fona en benzer fonları cosine
+benzerliğiyle bulur. İki vektör türü kullanılır: varlık dağılımı (varlık adı
+sütunları bir kez numaralanır) ve dönem getirilerinden getiri profili (aylık
+normalize, dönem başına z-skoru).
+
+BES ölçeğinde sorgu tüm matrisle tek çarpımdır. Fon sayısı `brute_force_max`'ı
+aşınca rastgele hiperdüzlem LSH (SimHash) tablolarından aday kümesi alınır ve
+yalnızca adaylar tam benzerlikle sıralanır. Değişen fonların vektörü ve kova
+anahtarları tek tek güncellenir; indeks baştan kurulmaz. GUI'den bağımsızdır.
+"""
+import numpy as np
+
+BRUTE_FORCE_MAX = 5000    # Bu fon sayısına kadar tam tarama
+LSH_TABLES = 8
+LSH_BITS = 10             # Tablo başına hiperdüzlem sayısı (kova anahtarı biti)
+
+
+def _unit(matrix):
+    """Satırları birim uzunluğa getir; sıfır satırlar sıfır kalır."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class SimilarityIndex:
+    """Birim vektörler üzerinde cosine en yakın komşu indeksi."""
+
+    def __init__(self, brute_force_max=BRUTE_FORCE_MAX, tables=LSH_TABLES, bits=LSH_BITS, seed=0):
+        self.brute_force_max = brute_force_max
+        self.tables = tables
+        self.bits = bits
+        self._rng = np.random.default_rng(seed)
+        self._weights = 1 << np.arange(bits, dtype=np.int64)
+        self.codes = []
+        self._index = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)    # (N × D) birim satırlar
+        self.alive = np.zeros(0, dtype=bool)                  # Silinmiş / vektörsüz satır False
+        self._planes = np.zeros((tables * bits, 0), dtype=np.float32)
+        self._keys = np.zeros((0, tables), dtype=np.int64)
+        self._buckets = [{} for _ in range(tables)]           # tablo → {anahtar: {satır}}
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def __contains__(self, code):
+        i = self._index.get(code)
+        return i is not None and bool(self.alive[i])
+
+    # ── Güncelleme ────────────────────────────────
+
+    def _grow(self, n_rows, n_dims):
+        rows, dims = self.vectors.shape
+        if dims < n_dims:
+            # Yeni boyutlar için yeni hiperdüzlem sütunları; eski satırların anahtarı değişmez
+            extra = self._rng.standard_normal((len(self._planes), n_dims - dims)).astype(np.float32)
+            self._planes = np.hstack([self._planes, extra])
+        if rows < n_rows or dims < n_dims:
+            vectors = np.zeros((max(rows, n_rows), max(dims, n_dims)), dtype=np.float32)
+            vectors[:rows, :dims] = self.vectors
+            self.vectors = vectors
+        if rows < n_rows:
+            self.alive = np.concatenate([self.alive, np.zeros(n_rows - rows, dtype=bool)])
+            self._keys = np.vstack([self._keys, np.zeros((n_rows - rows, self.tables), dtype=np.int64)])
+
+    def _hash(self, vectors):
+        """(n × D) → (n × tables) kova anahtarı."""
+        signs = (vectors @ self._planes[:, :vectors.shape[1]].T) > 0
+        return signs.reshape(len(vectors), self.tables, self.bits) @ self._weights
+
+    def _unbucket(self, rows):
+        for i in rows:
+            if self.alive[i]:
+                for t, key in enumerate(self._keys[i]):
+                    bucket = self._buckets[t].get(key)
+                    if bucket is not None:
+                        bucket.discard(i)
+                        if not bucket:
+                            del self._buckets[t][key]
+
+    def upsert(self, codes, matrix):
+        """codes fonlarının vektörlerini ekle/değiştir; matrix (n × D), D büyüyebilir.
+
+        Sıfır vektörlü fon indeksten çıkarılır.
+        """
+        codes = list(codes)
+        if not codes:
+            return
+        matrix = _unit(matrix)
+        for code in codes:
+            if code not in self._index:
+                self._index[code] = len(self.codes)
+                self.codes.append(code)
+        self._grow(len(self.codes), matrix.shape[1])
+        rows = np.array([self._index[c] for c in codes], dtype=np.intp)
+        self._unbucket(rows)
+
+        self.vectors[rows] = 0.0
+        self.vectors[rows, :matrix.shape[1]] = matrix
+        keys = self._hash(self.vectors[rows])
+        self._keys[rows] = keys
+        self.alive[rows] = matrix.any(axis=1)
+        for i, row_keys, alive in zip(rows.tolist(), keys, self.alive[rows]):
+            if alive:
+                for t, key in enumerate(row_keys.tolist()):
+                    self._buckets[t].setdefault(key, set()).add(i)
+
+    def rebuild(self, codes, matrix):
+        """İndeksi verilen fonlarla baştan kur (boyut sayısı değişebilir)."""
+        self.codes, self._index = [], {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self._planes = np.zeros((self.tables * self.bits, 0), dtype=np.float32)
+        self._keys = np.zeros((0, self.tables), dtype=np.int64)
+        self._buckets = [{} for _ in range(self.tables)]
+        self.upsert(codes, matrix)
+
+    def remove(self, codes):
+        rows = [self._index[c] for c in codes if c in self._index]
+        self._unbucket(rows)
+        self.alive[rows] = False
+
+    # ── Sorgu ─────────────────────────────────────
+
+    def _candidates(self, keys, k):
+        """LSH aday satırları; az aday çıkarsa tek bit çevrilmiş komşu kovalara da bakılır."""
+        found = set()
+        for t, key in enumerate(keys.tolist()):
+            found |= self._buckets[t].get(key, set())
+        if len(found) <= k:
+            for t, key in enumerate(keys.tolist()):
+                for b in range(self.bits):
+                    found |= self._buckets[t].get(key ^ (1 << b), set())
+        return np.fromiter(found, dtype=np.intp, count=len(found))
+
+    def query(self, code, k=10, exact=None):
+        """code'a en benzer k fon: [(fon_kodu, benzerlik)], büyükten küçüğe; fon yoksa [].
+
+        exact None ise fon sayısı brute_force_max'ı aşınca LSH kullanılır.
+        """
+        i = self._index.get(code)
+        if i is None or not self.alive[i]:
+            return []
+        vector = self.vectors[i]
+        if exact is None:
+            exact = len(self) <= self.brute_force_max
+        rows = None
+        if not exact:
+            rows = self._candidates(self._keys[i], k)
+            if len(rows) <= k:
+                rows = None
+        if rows is None:
+            rows = np.flatnonzero(self.alive)
+        rows = rows[rows != i]
+        if not len(rows):
+            return []
+        sims = self.vectors[rows] @ vector
+        k = min(k, len(rows))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(self.codes[rows[j]], float(sims[j])) for j in top]
+
+
+class AllocationSimilarity(SimilarityIndex):
+    """Varlık dağılımı benzerliği; allocation_cache değiştikçe yalnızca değişen fonlar yenilenir."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.assets = []
+        self._asset_index = {}
+        self._sources = {}            # fon → vektörün kurulduğu allocation_data nesnesi
+
+    def sync(self, allocation_cache):
+        """allocation_cache ile eşitle; güncellenen fon sayısını döndür (kimlik karşılaştırması)."""
+        snapshot = dict(allocation_cache)   # Arka plan yüklemeleri sözlüğü değiştirebilir
+        changed = [code for code, alloc in snapshot.items()
+                   if self._sources.get(code) is not alloc]
+        if not changed:
+            return 0
+        for code in changed:
+            for name in snapshot[code] or {}:
+                if name not in self._asset_index:
+                    self._asset_index[name] = len(self.assets)
+                    self.assets.append(name)
+        matrix = np.zeros((len(changed), len(self.assets)), dtype=np.float32)
+        for r, code in enumerate(changed):
+            for name, data in (snapshot[code] or {}).items():
+                pct = data.get("percentage", 0) if isinstance(data, dict) else data
+                try:
+                    matrix[r, self._asset_index[name]] = max(float(pct), 0.0)
+                except (TypeError, ValueError):
+                    continue
+            self._sources[code] = snapshot[code]
+        self.upsert(changed, matrix)
+        return len(changed)
+
+
+def return_profiles(period_returns, months):
+    """(N × P) % dönem getirisi → (N × P) getiri profili.
+
+    Getiriler aylığa çevrilir (0 = veri yok), her dönem verisi olan fonlar
+    üzerinden z-skoruna getirilir; verisi olmayan dönem 0 (ortalama) sayılır.
+    """
+    r = np.asarray(period_returns, dtype=np.float64)
+    has = r != 0
+    monthly = r / np.asarray(months, dtype=np.float64)
+    count = has.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, (monthly * has).sum(axis=0) / count, 0.0)
+        std = np.sqrt((((monthly - mean) * has) ** 2).sum(axis=0) / count)
+        z = np.where(has & (std > 0), (monthly - mean) / std, 0.0)
+    return z
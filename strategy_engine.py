@@ -4,6 +4,33 @@ Momentum, Varlık Rotasyonu, Risk-Getiri ve Tutarlılık analizleri ile
 composite öngörü skoru hesaplar.
 """
 import math
+from types import MappingProxyType
+
+import numpy as np
+
+from forecast_store import ForecastStore
+from perf_monitor import monitor, CATEGORY_COMPUTE
+
+
+class RegimeContext:
+    """Değişmez rejim bağlamı: rejim, tespit detayı ve o rejimin ağırlıkları.
+
+    calculate_forecast'e verildiğinde motorun durumu okunmaz ve değiştirilmez;
+    aynı motorla farklı rejimler yan yana hesaplanabilir.
+    """
+
+    __slots__ = ("regime", "detail", "regime_weights", "composite_weights", "label", "description")
+
+    def __init__(self, regime, detail, regime_weights, composite_weights, label, description):
+        for name, value in (("regime", regime),
+                            ("detail", MappingProxyType(dict(detail))),
+                            ("regime_weights", MappingProxyType(dict(regime_weights))),
+                            ("composite_weights", MappingProxyType(dict(composite_weights))),
+                            ("label", label), ("description", description)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RegimeContext değiştirilemez")
 
 
 class StrategyEngine:
@@ -67,6 +94,9 @@ class StrategyEngine:
         },
     }
 
+    # Composite bileşenleri (composite_components sütun sırası)
+    COMPONENTS = ("momentum", "rotation", "risk_return", "consistency")
+
     REGIME_LABELS = {
         REGIME_RISK_ON: ("🟢 Risk-On", "Hisse ağırlıklı fonlar öne çıkar"),
         REGIME_DEFENSIVE: ("🔴 Defansif", "Altın/Tahvil fonları öne çıkar"),
@@ -83,7 +113,7 @@ class StrategyEngine:
     # ──────────────────────────────────────
 
     def detect_regime(self, macro_data):
-        """Makro verilerden piyasa rejimini tespit et.
+        """Makro verilerden piyasa rejimini tespit et ve motorun rejimi olarak ayarla.
 
         Args:
             macro_data: {name: {price, daily, monthly, quarterly}} dict
@@ -91,10 +121,13 @@ class StrategyEngine:
         Returns:
             (regime_key, detail_dict)
         """
+        self._regime, self._regime_detail = self.classify_regime(macro_data)
+        return self._regime, self._regime_detail
+
+    def classify_regime(self, macro_data):
+        """detect_regime'in yan etkisiz hali: (regime_key, detail_dict)."""
         if not macro_data:
-            self._regime = self.REGIME_NEUTRAL
-            self._regime_detail = {"reason": "Makro veri yok"}
-            return self._regime, self._regime_detail
+            return self.REGIME_NEUTRAL, {"reason": "Makro veri yok"}
 
         bist = macro_data.get("BIST-100", {})
         gold = macro_data.get("Altın", {})
@@ -173,14 +206,32 @@ class StrategyEngine:
         else:
             regime = max(scores, key=scores.get)
 
-        self._regime = regime
-        self._regime_detail = detail
         return regime, detail
 
     def get_regime_label(self):
         """Mevcut rejim etiketini döndür"""
         return self.REGIME_LABELS.get(self._regime, ("⚪ Nötr", ""))
 
+    def context(self, regime=None, macro_data=None):
+        """Rejim bağlamı (RegimeContext); motorun durumu değişmez.
+
+        regime verilirse o rejim, macro_data verilirse ondan tespit edilen rejim,
+        ikisi de yoksa son tespit edilen rejim kullanılır.
+        """
+        if regime is None and macro_data is not None:
+            regime, detail = self.classify_regime(macro_data)
+        elif regime is None:
+            regime, detail = self._regime, self._regime_detail
+        else:
+            detail = {}
+        neutral = self.REGIME_NEUTRAL
+        label, description = self.REGIME_LABELS.get(regime, ("⚪ Nötr", ""))
+        return RegimeContext(
+            regime, detail,
+            self.REGIME_WEIGHTS.get(regime, self.REGIME_WEIGHTS[neutral]),
+            self.COMPOSITE_WEIGHTS.get(regime, self.COMPOSITE_WEIGHTS[neutral]),
+            label, description)
+
     # ──────────────────────────────────────
     # Momentum Analizi
     # ──────────────────────────────────────
@@ -290,11 +341,12 @@ class StrategyEngine:
     # Varlık Rotasyonu Puanı
     # ──────────────────────────────────────
 
-    def calculate_rotation_score(self, allocation_data):
-        """Fonun varlık dağılımını mevcut rejime göre puanla.
+    def calculate_rotation_score(self, allocation_data, context=None):
+        """Fonun varlık dağılımını rejime göre puanla.
 
         Args:
             allocation_data: {varlık_adı: {percentage: float, color: str}}
+            context: RegimeContext (opsiyonel; varsayılan: mevcut rejim)
 
         Returns:
             dict: {asset_breakdown, total}
@@ -302,26 +354,10 @@ class StrategyEngine:
         if not allocation_data:
             return {"asset_breakdown": {}, "total": 0, "detail": "Varlık verisi yok"}
 
-        # Varlık sınıflarını grupla
-        asset_groups = {k: 0.0 for k in self.ASSET_CLASS_KEYWORDS}
-
-        for asset_name, data in allocation_data.items():
-            pct = data.get("percentage", 0) if isinstance(data, dict) else float(data)
-            matched = False
-            for group, keywords in self.ASSET_CLASS_KEYWORDS.items():
-                for keyword in keywords:
-                    if keyword.lower() in asset_name.lower():
-                        asset_groups[group] += pct
-                        matched = True
-                        break
-                if matched:
-                    break
-            if not matched:
-                # Eşleşmeyen varlıkları "fon" grubuna ekle
-                asset_groups["fon"] += pct
+        asset_groups = self.classify_assets(allocation_data)
 
         # Rejime göre ağırlıklarla puanla
-        regime_weights = self.REGIME_WEIGHTS.get(self._regime, self.REGIME_WEIGHTS[self.REGIME_NEUTRAL])
+        regime_weights = (context or self.context()).regime_weights
         total_score = 0
         breakdown = {}
 
@@ -341,20 +377,56 @@ class StrategyEngine:
             "total": round(total_score, 2),
         }
 
+    def classify_assets(self, allocation_data):
+        """Varlık dağılımını varlık sınıflarına grupla: {sınıf: yüzde}.
+
+        Eşleşmeyen varlıklar "fon" sınıfına eklenir.
+        """
+        asset_groups = {k: 0.0 for k in self.ASSET_CLASS_KEYWORDS}
+
+        for asset_name, data in allocation_data.items():
+            pct = data.get("percentage", 0) if isinstance(data, dict) else float(data)
+            matched = False
+            for group, keywords in self.ASSET_CLASS_KEYWORDS.items():
+                for keyword in keywords:
+                    if keyword.lower() in asset_name.lower():
+                        asset_groups[group] += pct
+                        matched = True
+                        break
+                if matched:
+                    break
+            if not matched:
+                # Eşleşmeyen varlıkları "fon" grubuna ekle
+                asset_groups["fon"] += pct
+
+        return asset_groups
+
     # ──────────────────────────────────────
     # Risk-Getiri Metrikleri
     # ──────────────────────────────────────
 
-    def calculate_risk_return(self, row):
-        """Risk-getiri metriklerini hesapla (Pseudo-Sharpe + Drawdown).
-        0 değerli dönemler hariç tutulur.
+    # Fiyat geçmişinden risk-getiri için tercih edilen dönemler (ilk bulunan)
+    RISK_WINDOW_PREFERENCE = ("1 Yıl", "6 Ay", "3 Yıl", "3 Ay")
+
+    def calculate_risk_return(self, row, risk=None):
+        """Risk-getiri metriklerini hesapla.
+
+        `risk` (RiskMetrics.for_fund çıktısı) varsa fiyat geçmişinden gerçek
+        Sharpe ve maksimum düşüş kullanılır; yoksa dönem getirilerinden
+        Pseudo-Sharpe + aralık bazlı düşüş. 0 değerli dönemler hariç tutulur.
 
         Args:
             row: DataFrame satırı
+            risk: {dönem_etiketi: {metrik: değer}} (opsiyonel)
 
         Returns:
-            dict: {avg_return, volatility, sharpe, max_drawdown, total}
+            dict: {avg_return, volatility, sharpe, max_drawdown, total, source}
         """
+        if risk:
+            window = next((w for w in self.RISK_WINDOW_PREFERENCE if w in risk), None)
+            if window:
+                return self._risk_return_from_history(risk[window], window)
+
         m1 = self._safe_float(row.get("1 Ay (%)", 0))
         m3 = self._safe_float(row.get("3 Ay (%)", 0))
         m6 = self._safe_float(row.get("6 Ay (%)", 0))
@@ -401,6 +473,31 @@ class StrategyEngine:
             "sharpe": round(sharpe, 2),
             "max_drawdown": round(max_drawdown, 2),
             "total": round(total, 2),
+            "source": "periods",
+        }
+
+    @staticmethod
+    def _risk_return_from_history(metrics, window):
+        """Gerçek (yıllık) Sharpe ve maksimum düşüşten risk-getiri skoru.
+
+        Ölçek Pseudo-Sharpe skoruyla aynı aralığa (-30..+30) denk gelecek şekilde:
+        Sharpe -3..+3 → ±24, %100 düşüş → -30. Tanımsız Sharpe 0 sayılır
+        (history_risk_totals ile aynı); tanımsız Sortino/Calmar None döner.
+        """
+        sharpe = float(np.clip(np.nan_to_num(metrics["sharpe"], nan=0.0), -3, 3))
+        max_drawdown = metrics["max_drawdown"]
+        total = sharpe * 8 - max_drawdown * 30
+
+        return {
+            "avg_return": round(metrics["annual_return"] * 100 / 12, 2),  # aylık %
+            "volatility": round(metrics["volatility"] * 100, 2),          # yıllık %
+            "sharpe": round(sharpe, 2),
+            "sortino": round(metrics["sortino"], 2) if math.isfinite(metrics["sortino"]) else None,
+            "calmar": round(metrics["calmar"], 2) if math.isfinite(metrics["calmar"]) else None,
+            "max_drawdown": round(max_drawdown, 2),
+            "total": round(total, 2),
+            "source": "nav",
+            "window": window,
         }
 
     # ──────────────────────────────────────
@@ -461,31 +558,47 @@ class StrategyEngine:
     # Composite Öngörü Skoru
     # ──────────────────────────────────────
 
-    def calculate_forecast(self, row, allocation_data=None, macro_data=None):
+    def set_composite_weights(self, regime, weights):
+        """Bir rejimin composite ağırlıklarını yalnızca bu motor için değiştir.
+
+        Ağırlıklar toplamı 1 olacak şekilde ölçeklenir; sınıf varsayılanları değişmez.
+        """
+        total = sum(weights[name] for name in self.COMPONENTS)
+        if total <= 0:
+            raise ValueError("Composite ağırlıkların toplamı pozitif olmalı")
+        if "COMPOSITE_WEIGHTS" not in self.__dict__:
+            self.COMPOSITE_WEIGHTS = {k: dict(v) for k, v in type(self).COMPOSITE_WEIGHTS.items()}
+        self.COMPOSITE_WEIGHTS[regime] = {name: weights[name] / total for name in self.COMPONENTS}
+
+    def calculate_forecast(self, row, allocation_data=None, macro_data=None, risk=None,
+                           context=None):
         """Tek bir fon için composite öngörü skoru hesapla.
 
         Args:
             row: DataFrame satırı
             allocation_data: Fonun varlık dağılımı (opsiyonel)
             macro_data: Piyasa verileri (opsiyonel, rejim zaten belirlenmiş olabilir)
+            risk: Fiyat geçmişinden risk metrikleri (opsiyonel, RiskMetrics.for_fund)
+            context: RegimeContext (opsiyonel) — verilirse macro_data yok sayılır
+                ve motorun rejimi değişmez
 
         Returns:
             dict: {momentum, rotation, risk_return, consistency, composite, regime, details}
         """
-        # Eğer macro_data verilmişse rejimi güncelle
-        if macro_data:
-            self.detect_regime(macro_data)
+        if context is None:
+            # Eğer macro_data verilmişse rejimi güncelle
+            if macro_data:
+                self.detect_regime(macro_data)
+            context = self.context()
 
         # Her bileşeni hesapla
         momentum = self.calculate_momentum(row)
-        rotation = self.calculate_rotation_score(allocation_data or {})
-        risk_return = self.calculate_risk_return(row)
+        rotation = self.calculate_rotation_score(allocation_data or {}, context)
+        risk_return = self.calculate_risk_return(row, risk)
         consistency = self.calculate_consistency(row)
 
         # Composite ağırlıklar (rejime göre)
-        weights = self.COMPOSITE_WEIGHTS.get(
-            self._regime, self.COMPOSITE_WEIGHTS[self.REGIME_NEUTRAL]
-        )
+        weights = dict(context.composite_weights)
 
         # Normalize: her bileşeni -100..+100 arası normalize et
         mom_norm = self._normalize(momentum["total"], -50, 100)
@@ -500,17 +613,15 @@ class StrategyEngine:
             + con_norm * weights["consistency"]
         )
 
-        regime_label, regime_desc = self.get_regime_label()
-
         return {
             "momentum": momentum,
             "rotation": rotation,
             "risk_return": risk_return,
             "consistency": consistency,
             "composite": round(composite, 1),
-            "regime": self._regime,
-            "regime_label": regime_label,
-            "regime_desc": regime_desc,
+            "regime": context.regime,
+            "regime_label": context.label,
+            "regime_desc": context.description,
             "weights": weights,
             "normalized": {
                 "momentum": round(mom_norm, 1),
@@ -520,31 +631,53 @@ class StrategyEngine:
             },
         }
 
-    def calculate_all_forecasts(self, df, allocation_cache, macro_data):
+    @monitor.timed("calculate_all_forecasts", CATEGORY_COMPUTE)
+    def calculate_all_forecasts(self, df, allocation_cache, macro_data, risk_metrics=None):
         """Tüm fonlar için öngörü skoru hesapla.
 
+        Skorlar calculate_forecast ile aynı kurallarla dizi hâlinde hesaplanır;
+        bir fonun ayrıntı sözlüğü ancak istendiğinde calculate_forecast ile üretilir.
+
         Args:
             df: Fon verileri DataFrame'i
             allocation_cache: {fon_kodu: allocation_data} dict
             macro_data: Piyasa verileri dict
+            risk_metrics: RiskMetrics (opsiyonel) — varsa gerçek Sharpe/düşüş kullanılır
 
         Returns:
-            dict: {fon_kodu: forecast_result}
+            ForecastStore: {fon_kodu: forecast_result} gibi okunur
         """
         # Rejimi bir kez belirle
         self.detect_regime(macro_data)
-
-        results = {}
-        for _, row in df.iterrows():
-            fon_kodu = str(row.get("Fon Kodu", "")).strip()
-            if not fon_kodu:
-                continue
-
-            alloc = allocation_cache.get(fon_kodu, {})
-            forecast = self.calculate_forecast(row, alloc)
-            results[fon_kodu] = forecast
-
-        return results
+        context = self.context()
+
+        codes, period_returns, asset_groups, risk_totals = self.forecast_inputs(
+            df, allocation_cache, risk_metrics)
+        # Boş kodlar atlanır; tekrarlanan kodda son satır geçerlidir (sözlükteki gibi)
+        index = {}
+        for i, code in enumerate(codes):
+            if code:
+                index[code] = i
+        rows = np.fromiter(index.values(), dtype=np.intp, count=len(index))
+        codes = list(index)
+        period_returns, asset_groups, risk_totals = (
+            period_returns[rows], asset_groups[rows], risk_totals[rows])
+
+        momentum, risk_return, consistency = self._regime_free_components(period_returns, risk_totals)
+        rotation = self._rotation_matrix(asset_groups, [context.regime_weights], len(codes))[:, 0]
+        components = np.column_stack((momentum, rotation, risk_return, consistency))
+        composite = np.zeros(len(codes))
+        for j, name in enumerate(self.COMPONENTS):
+            composite += components[:, j] * context.composite_weights[name]
+
+        allocations = [allocation_cache.get(code, {}) for code in codes]
+
+        def detail(i):
+            row = dict(zip(self.PERIOD_COLUMNS, period_returns[i].tolist()))
+            risk = risk_metrics.for_fund(codes[i]) if risk_metrics is not None else None
+            return self.calculate_forecast(row, allocations[i], risk=risk, context=context)
+
+        return ForecastStore(codes, self._round_vector(composite, 1), components, detail)
 
     def get_top_funds(self, forecasts, n=10):
         """En yüksek öngörü skoruna sahip N fonu döndür.
@@ -552,6 +685,8 @@ class StrategyEngine:
         Returns:
             list: [(fon_kodu, composite_score, forecast_detail), ...]
         """
+        if isinstance(forecasts, ForecastStore):
+            return [(k, score, forecasts[k]) for k, score in forecasts.top(n)]
         ranked = sorted(
             forecasts.items(),
             key=lambda x: x[1]["composite"],
@@ -559,6 +694,220 @@ class StrategyEngine:
         )
         return [(k, v["composite"], v) for k, v in ranked[:n]]
 
+    # ──────────────────────────────────────
+    # Vektörel Composite Skor (backtest)
+    # ──────────────────────────────────────
+
+    @staticmethod
+    def history_risk_totals(sharpe, max_drawdown):
+        """Fiyat geçmişinden risk-getiri skoru, dizi hâlinde (_risk_return_from_history ölçeği)."""
+        sharpe = np.nan_to_num(np.asarray(sharpe, dtype=np.float64), nan=0.0)
+        return np.clip(sharpe, -3, 3) * 8 - np.asarray(max_drawdown) * 30
+
+    def composite_components(self, period_returns, asset_groups=None,
+                             risk_totals=None, regime=None):
+        """Tüm fonlar için normalize edilmiş (0-100) composite bileşenleri.
+
+        calculate_forecast ile aynı kurallar; bileşen toplamları aynı şekilde
+        2 ondalığa yuvarlanır.
+
+        Args:
+            period_returns: (N × 6) % getiriler, PERFORMANCE_COLUMNS sırası; 0 = veri yok
+            asset_groups: (N × 6) varlık sınıfı yüzdeleri, ASSET_CLASS_KEYWORDS sırası
+                (opsiyonel; dağılımı olmayan fonun satırı 0)
+            risk_totals: (N,) fiyat geçmişinden risk-getiri skoru (opsiyonel; NaN → dönem getirileri)
+            regime: Rejim anahtarı (varsayılan: son tespit edilen)
+
+        Returns:
+            np.ndarray: (N × 4) COMPONENTS sırasıyla normalize bileşenler
+        """
+        regime = regime or self._regime
+        momentum, risk_return, consistency = self._regime_free_components(period_returns, risk_totals)
+        regime_weights = self.REGIME_WEIGHTS.get(regime, self.REGIME_WEIGHTS[self.REGIME_NEUTRAL])
+        rotation = self._rotation_matrix(asset_groups, [regime_weights], len(momentum))
+        return np.column_stack((momentum, rotation[:, 0], risk_return, consistency))
+
+    def _regime_free_components(self, period_returns, risk_totals=None):
+        """Rejime bağlı olmayan normalize bileşenler: (momentum, risk_return, consistency)."""
+        r = np.asarray(period_returns, dtype=np.float64)
+        m1, m3, m6, y1, y3, y5 = r.T
+        has = r != 0
+
+        # Momentum — verisi olan dönemlerin ağırlıkları normalize edilir
+        def _weighted(values, w, mask):
+            w = np.asarray(w) * mask
+            w_sum = w.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out = (values * w).sum(axis=1) / w_sum
+            return np.where(w_sum > 0, out, 0.0)
+
+        short_mom = _weighted(r[:, :3], (0.4, 0.3, 0.3), has[:, :3])
+        long_mom = _weighted(np.column_stack((y1, y3 / 3, y5 / 5)), (0.5, 0.3, 0.2), has[:, 3:])
+        n_periods = has.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pos_ratio = (r > 0).sum(axis=1) / n_periods
+        bonus = np.select([n_periods == 0, pos_ratio >= 1.0, pos_ratio >= 0.83, pos_ratio >= 0.67],
+                          [1.0, 1.25, 1.15, 1.10], 1.0)
+        momentum = self._round_vector((short_mom * 0.6 + long_mom * 0.4) * bonus, 2)
+
+        # Aylık normalize getiriler (risk-getiri ve tutarlılık ortak)
+        monthly = np.column_stack((m1, m3 / 3, m6 / 6, y1 / 12))
+        mask = has[:, :4]
+        count = mask.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = np.where(count > 0, (monthly * mask).sum(axis=1) / count, 0.0)
+            std = np.sqrt((((monthly - avg[:, None]) * mask) ** 2).sum(axis=1) / (count - 1))
+        std = np.where(count > 1, std, 0.0)
+
+        # Risk-getiri (dönem getirilerinden Pseudo-Sharpe)
+        volatility = np.where(count > 1, std, 0.001)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sharpe = np.where(volatility > 0.001, avg / volatility, 0.0)
+        sharpe = np.clip(sharpe, -5, 5)
+        raw = r[:, :4]
+        max_val = np.where(mask, raw, -np.inf).max(axis=1)
+        min_val = np.where(mask, raw, np.inf).min(axis=1)
+        with np.errstate(invalid='ignore'):
+            drawdown = np.where(count > 0, (max_val - min_val) / np.maximum(np.abs(max_val), 1), 0.0)
+        risk_return = self._round_vector(sharpe * 10 - drawdown * 5, 2)
+        if risk_totals is not None:
+            risk_totals = np.asarray(risk_totals, dtype=np.float64)
+            risk_return = np.where(np.isfinite(risk_totals),
+                                   self._round_vector(risk_totals, 2), risk_return)
+
+        # Tutarlılık — ilk ve son mevcut dönem karşılaştırması
+        rows = np.arange(len(r))
+        first = monthly[rows, mask.argmax(axis=1)]
+        last = monthly[rows, 3 - mask[:, ::-1].argmax(axis=1)]
+        trend = np.where(count >= 2, np.select([first > last, first < last], [1.0, -0.5], 0.0), 0.0)
+        consistency = self._round_vector(np.maximum(0, 10 - std * 2) + trend * 3, 2)
+
+        return (self._normalize_vector(momentum, -50, 100),
+                self._normalize_vector(risk_return, -30, 30),
+                self._normalize_vector(consistency, 0, 15))
+
+    def _rotation_matrix(self, asset_groups, weight_sets, n_funds):
+        """(N × S) normalize rotasyon bileşeni; her sütun bir REGIME_WEIGHTS sözlüğü."""
+        rotation = np.zeros((n_funds, len(weight_sets)))
+        if asset_groups is not None:
+            groups = np.asarray(asset_groups, dtype=np.float64)
+            # Sınıf sırasıyla toplanır (skaler toplamla aynı yuvarlama)
+            for j, group in enumerate(self.ASSET_CLASS_KEYWORDS):
+                rotation += groups[:, j, None] * np.array([w.get(group, 0) for w in weight_sets])
+            rotation = self._round_vector(rotation, 2)
+        return self._normalize_vector(rotation, 0, 40)
+
+    def calculate_composite_vector(self, period_returns, asset_groups=None,
+                                   risk_totals=None, regime=None, weights=None):
+        """Tüm fonların composite skorunu tek seferde hesapla.
+
+        Sıralama calculate_all_forecasts ile aynıdır. Argümanlar için
+        composite_components'a bakın; weights verilmezse rejimin COMPOSITE_WEIGHTS'i.
+
+        Returns:
+            np.ndarray: (N,) composite skor
+        """
+        regime = regime or self._regime
+        components = self.composite_components(period_returns, asset_groups, risk_totals, regime)
+        weights = weights or self.COMPOSITE_WEIGHTS.get(
+            regime, self.COMPOSITE_WEIGHTS[self.REGIME_NEUTRAL])
+        composite = np.zeros(len(components))
+        for j, name in enumerate(self.COMPONENTS):
+            composite += components[:, j] * weights[name]
+        return self._round_vector(composite, 1)
+
+    # ──────────────────────────────────────
+    # Rejim Senaryoları
+    # ──────────────────────────────────────
+
+    PERIOD_COLUMNS = ("1 Ay (%)", "3 Ay (%)", "6 Ay (%)", "1 Yıl (%)", "3 Yıl (%)", "5 Yıl (%)")
+
+    def forecast_inputs(self, df, allocation_cache, risk_metrics=None):
+        """calculate_all_forecasts girdilerinin dizi hâli.
+
+        Returns:
+            (codes, period_returns (N × 6), asset_groups (N × 6), risk_totals (N,))
+        """
+        codes = df["Fon Kodu"].astype(str).str.strip().tolist()
+        period_returns = np.zeros((len(codes), len(self.PERIOD_COLUMNS)))
+        for j, col in enumerate(self.PERIOD_COLUMNS):
+            if col not in df:
+                continue
+            try:
+                period_returns[:, j] = df[col].to_numpy(dtype=np.float64)
+            except (ValueError, TypeError):
+                period_returns[:, j] = [self._safe_float(v) for v in df[col]]
+
+        group_names = list(self.ASSET_CLASS_KEYWORDS)
+        asset_groups = np.zeros((len(codes), len(group_names)))
+        for i, code in enumerate(codes):
+            allocation = allocation_cache.get(code)
+            if allocation:
+                groups = self.classify_assets(allocation)
+                asset_groups[i] = [groups[g] for g in group_names]
+
+        risk_totals = np.full(len(codes), np.nan)
+        if risk_metrics is not None:
+            index = {code: i for i, code in enumerate(risk_metrics.codes)}
+            cols = np.array([index.get(c, -1) for c in codes], dtype=np.intp)
+            present = cols >= 0
+            for label in self.RISK_WINDOW_PREFERENCE:
+                metrics = risk_metrics.windows.get(label)
+                if metrics is None:
+                    continue
+                with np.errstate(invalid='ignore'):
+                    total = self.history_risk_totals(metrics["sharpe"][cols],
+                                                     metrics["max_drawdown"][cols])
+                fill = (present & np.isnan(risk_totals) & np.isfinite(total)
+                        & ~np.isnan(metrics["volatility"][cols]))
+                risk_totals[fill] = total[fill]
+        return codes, period_returns, asset_groups, risk_totals
+
+    def scenario_contexts(self, macro_data=None, shocks=None):
+        """[(ad, RegimeContext)]: dört sabit rejim ve makro şok senaryoları.
+
+        shocks: {senaryo_adı: {makro_adı: aylık değişime eklenecek puan (%)}};
+        şoklanmış makro verisinden rejim yeniden tespit edilir.
+        """
+        scenarios = [(self.REGIME_LABELS[r][0], self.context(regime=r))
+                     for r in (self.REGIME_RISK_ON, self.REGIME_DEFENSIVE,
+                               self.REGIME_INFLATION, self.REGIME_NEUTRAL)]
+        for name, shock in (shocks or {}).items():
+            shocked = {k: dict(v) for k, v in (macro_data or {}).items()}
+            for macro, delta in shock.items():
+                info = shocked.setdefault(macro, {})
+                info["monthly"] = (info.get("monthly") or 0) + delta
+            scenarios.append((name, self.context(macro_data=shocked)))
+        return scenarios
+
+    @monitor.timed("scenario_scores", CATEGORY_COMPUTE)
+    def scenario_scores(self, period_returns, asset_groups, risk_totals, contexts):
+        """(N × S) composite skor matrisi: her sütun bir RegimeContext.
+
+        Rejimden bağımsız bileşenler bir kez hesaplanır; rotasyon tüm senaryolar
+        için birlikte toplanır. Her sütun calculate_composite_vector ile aynıdır.
+        """
+        momentum, risk_return, consistency = self._regime_free_components(period_returns, risk_totals)
+        rotation = self._rotation_matrix(asset_groups, [c.regime_weights for c in contexts],
+                                         len(momentum))
+        weights = np.array([[c.composite_weights[name] for name in self.COMPONENTS]
+                            for c in contexts])
+        composite = np.zeros((len(momentum), len(contexts)))
+        composite += momentum[:, None] * weights[:, 0]
+        composite += rotation * weights[:, 1]
+        composite += risk_return[:, None] * weights[:, 2]
+        composite += consistency[:, None] * weights[:, 3]
+        return self._round_vector(composite, 1)
+
+    @staticmethod
+    def rank_matrix(scores):
+        """(N × S) skor → (N × S) sıra (1 = en iyi); eşitlikte önceki satır önde."""
+        order = np.argsort(-scores, axis=0, kind="stable")
+        ranks = np.empty_like(order)
+        columns = np.arange(scores.shape[1])
+        ranks[order, columns] = np.arange(1, scores.shape[0] + 1)[:, None]
+        return ranks
+
     # ──────────────────────────────────────
     # Yardımcı Fonksiyonlar
     # ──────────────────────────────────────
@@ -581,3 +930,22 @@ class StrategyEngine:
         normalized = (value - min_val) / (max_val - min_val) * 100
         return max(0, min(100, normalized))
 
+    @staticmethod
+    def _normalize_vector(values, min_val, max_val):
+        """_normalize'un dizi karşılığı (0-100 arası)"""
+        return np.clip((values - min_val) / (max_val - min_val) * 100, 0, 100)
+
+    @staticmethod
+    def _round_vector(values, digits):
+        """Python round() ile aynı sonucu veren dizi yuvarlama.
+
+        np.round ölçekleyip yuvarladığından yarım değerlere çok yakın sayılarda
+        round()'dan ayrılabilir; bu az sayıdaki eleman round() ile yuvarlanır.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        scaled = values * 10 ** digits
+        result = np.round(values, digits)
+        flat, source = result.reshape(-1), values.reshape(-1)
+        for i in np.flatnonzero(np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6):
+            flat[i] = round(float(source[i]), digits)
+        return result
@@ -0,0 +1,254 @@
+"""
+TEFAS BES Fon Analizi — Ağırlık Optimizasyonu
+Skor ağırlıkları (calculate_scores, toplam 10) ve StrategyEngine composite
+ağırlıkları için binlerce aday ağırlık vektörünü geçmiş ay sonu anlık
+görüntüleri (BacktestData) üzerinde dener. Bir aday bloğunun tüm aylar ve
+fonlar için skoru tek matris çarpımıdır: (ay·fon × özellik) @ (özellik × aday).
+Başarı ölçüsü: her ay en yüksek skorlu N fonun ertesi ayki ortalama getirisi.
+Adaylar ardışık yarılama (successive halving) ile az sayıda ayda elenir,
+kalanlar daha fazla ayda değerlendirilir; aday blokları süreç havuzuna dağılır.
+Son %25'lik dönem seçimde kullanılmaz, sonuç raporunda ayrıca gösterilir.
+GUI'den bağımsızdır.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+CANDIDATE_BLOCK = 256     # Bellek için adaylar bu büyüklükte bloklarla çarpılır
+HALVING_RATE = 3          # Her basamakta adayların 1/3'ü kalır
+MIN_RUNG_MONTHS = 6       # İlk basamakta değerlendirilen ay sayısı (en az)
+HOLDOUT_FRACTION = 0.25   # Seçimde kullanılmayan son dönem oranı
+
+
+def score_features(data, periods):
+    """Skor özellikleri: (K × N × 6) aylık normalize dönem getirileri.
+
+    FundAnalyzer.apply_scores ile aynı: her dönem ay sayısına bölünür, ağırlık/10 ile çarpılır.
+    """
+    divisors = np.array([months for _, _, months in periods], dtype=np.float64)
+    return data.period_returns / divisors
+
+
+def composite_features(data, engine):
+    """Composite özellikleri: (K × N × 4) normalize bileşenler (StrategyEngine.COMPONENTS)."""
+    return np.stack([
+        engine.composite_components(data.period_returns[k], data.asset_groups[k],
+                                    data.risk_totals[k], regime=data.regimes[k])
+        for k in range(len(data.step_dates))
+    ])
+
+
+def forward_returns(data):
+    """(K-1 × N) ertesi ay getirisi ve seçilebilirlik maskesi."""
+    forward = data.growth - 1.0
+    eligible = data.eligible[:-1] & np.isfinite(forward)
+    return np.where(eligible, forward, 0.0), eligible
+
+
+def dirichlet_candidates(n, dims, total=1.0, seed=0, include=()):
+    """Toplamı `total` olan n aday ağırlık vektörü (n × dims); `include` ilk satırlara konur."""
+    rng = np.random.default_rng(seed)
+    fixed = [np.asarray(w, dtype=np.float64) for w in include]
+    fixed = [w / w.sum() * total for w in fixed if w.sum() > 0]
+    random = rng.dirichlet(np.ones(dims), size=max(n - len(fixed), 0)) * total
+    return np.vstack(fixed + [random]) if fixed else random
+
+
+def top_n_returns(features, weights, forward, eligible, top_n):
+    """Aday başına ortalama aylık getiri: (C,).
+
+    features (k × N × F), weights (C × F); skorlar tek matris çarpımıyla hesaplanır,
+    her ay ve aday için en iyi top_n fon argpartition ile seçilir.
+    """
+    k, n, f = features.shape
+    top_n = max(1, min(top_n, n))
+    scores = (features.reshape(-1, f) @ weights.T).reshape(k, n, -1)
+    scores[~eligible] = -np.inf
+    picked = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n, :]
+    gains = np.take_along_axis(np.broadcast_to(forward[:, :, None], scores.shape), picked, axis=1)
+    counts = np.minimum(eligible.sum(axis=1), top_n)[:, None]
+    valid = np.take_along_axis(np.broadcast_to(eligible[:, :, None], scores.shape), picked, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        monthly = (gains * valid).sum(axis=1) / counts
+    return np.nan_to_num(monthly).mean(axis=0)
+
+
+def _evaluate(features, forward, eligible, top_n, weights, months):
+    """Aday bloklarını verilen aylarda değerlendir."""
+    f, fw, el = features[months], forward[months], eligible[months]
+    return np.concatenate([
+        top_n_returns(f, weights[i:i + CANDIDATE_BLOCK], fw, el, top_n)
+        for i in range(0, len(weights), CANDIDATE_BLOCK)
+    ])
+
+
+_WORKER_STATE = None
+
+
+def _init_worker(features, forward, eligible, top_n):
+    """Havuz süreci başlangıcı: geçmiş veriler süreç başına bir kez aktarılır."""
+    global _WORKER_STATE
+    _WORKER_STATE = (features, forward, eligible, top_n)
+
+
+def _evaluate_worker(args):
+    weights, months = args
+    return _evaluate(*_WORKER_STATE, weights, months)
+
+
+class SearchResult:
+    """Arama sonucu: en iyi ağırlıklar ve eğitim / ayrılmış dönem başarıları."""
+
+    def __init__(self, names, best, current, train_score, holdout_score,
+                 current_train, current_holdout, candidates, evaluations, months):
+        self.names = names
+        self.best = best                     # {ad: ağırlık}
+        self.current = current               # {ad: ağırlık} veya None
+        self.train_score = train_score       # Ortalama aylık getiri (kesir)
+        self.holdout_score = holdout_score
+        self.current_train = current_train
+        self.current_holdout = current_holdout
+        self.candidates = candidates
+        self.evaluations = evaluations       # Aday × ay değerlendirme sayısı
+        self.months = months                 # (eğitim, ayrılmış)
+
+
+class WeightSearch:
+    """Ardışık yarılamalı, süreç havuzuna dağıtılmış ağırlık araması."""
+
+    def __init__(self, features, forward, eligible, top_n=5, processes=2,
+                 holdout=HOLDOUT_FRACTION, seed=0):
+        self.features = features[:len(forward)]
+        self.forward = forward
+        self.eligible = eligible
+        self.top_n = top_n
+        self.processes = processes
+        self.seed = seed
+        n_months = len(forward)
+        n_holdout = int(n_months * holdout) if n_months * (1 - holdout) >= MIN_RUNG_MONTHS else 0
+        self.train_months = np.arange(n_months - n_holdout)
+        self.holdout_months = np.arange(n_months - n_holdout, n_months)
+        self._pool = None
+        self.evaluations = 0
+
+    def _start_pool(self, n_candidates):
+        processes = min(self.processes, os.cpu_count() or 1)
+        if processes < 1 or n_candidates < CANDIDATE_BLOCK * 2:
+            return None
+        try:
+            return ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.features, self.forward, self.eligible, self.top_n))
+        except Exception as e:
+            print(f"Ağırlık araması süreç havuzu başlatılamadı, sırayla çalışılacak: {e}")
+            return None
+
+    def _score(self, weights, months):
+        """Adayları değerlendir; havuz varsa bloklar süreçlere dağıtılır."""
+        self.evaluations += len(weights) * len(months)
+        if self._pool is not None and len(weights) >= CANDIDATE_BLOCK * 2:
+            chunks = [(weights[i:i + CANDIDATE_BLOCK], months)
+                      for i in range(0, len(weights), CANDIDATE_BLOCK)]
+            try:
+                return np.concatenate(list(self._pool.map(_evaluate_worker, chunks)))
+            except (BrokenProcessPool, OSError) as e:
+                print(f"Ağırlık araması süreç havuzu durdu, sırayla devam ediliyor: {e}")
+                self._pool = None
+        return _evaluate(self.features, self.forward, self.eligible, self.top_n, weights, months)
+
+    def run(self, candidates, names, current=None):
+        """candidates (C × F) arasından eğitim döneminde en iyi ortalama getiriyi seç.
+
+        current verilirse aday listesinde olmalıdır (ilk satır); karşılaştırma için raporlanır.
+        """
+        if not len(self.train_months):
+            raise ValueError("Ağırlık araması için yeterli geçmiş ay yok.")
+        rng = np.random.default_rng(self.seed)
+        order = rng.permutation(self.train_months)
+        alive = np.arange(len(candidates))
+
+        # Basamak ay sayıları: MIN_RUNG_MONTHS'tan tüm eğitim aylarına HALVING_RATE katıyla
+        rungs = []
+        months = min(MIN_RUNG_MONTHS, len(order))
+        while months < len(order):
+            rungs.append(months)
+            months *= HALVING_RATE
+        rungs.append(len(order))
+
+        self._pool = self._start_pool(len(candidates))
+        try:
+            for i, n_months in enumerate(rungs):
+                scores = self._score(candidates[alive], np.sort(order[:n_months]))
+                if i == len(rungs) - 1:
+                    break
+                keep = max(HALVING_RATE, len(alive) // HALVING_RATE)
+                if keep >= len(alive):
+                    continue
+                alive = alive[np.argsort(-scores, kind="stable")[:keep]]
+            best_pos = int(np.argmax(scores))
+            best = candidates[alive[best_pos]]
+            train_score = float(scores[best_pos])
+
+            holdout_score = current_holdout = current_train = None
+            if len(self.holdout_months):
+                holdout_score = float(self._score(best[None, :], self.holdout_months)[0])
+            if current is not None:
+                current_train = float(self._score(current[None, :], self.train_months)[0])
+                if len(self.holdout_months):
+                    current_holdout = float(self._score(current[None, :], self.holdout_months)[0])
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+        return SearchResult(
+            list(names), dict(zip(names, best.tolist())),
+            dict(zip(names, current.tolist())) if current is not None else None,
+            train_score, holdout_score, current_train, current_holdout,
+            len(candidates), self.evaluations,
+            (len(self.train_months), len(self.holdout_months)))
+
+
+def optimize_score_weights(data, periods, current=None, n_candidates=4096, top_n=5,
+                           processes=2, seed=0):
+    """Skor ağırlıkları (toplam 10) için arama. current: {dönem_sütunu: ağırlık}."""
+    names = [col for col, _, _ in periods]
+    forward, eligible = forward_returns(data)
+    current_vec = (np.array([current.get(c, 0.0) for c in names], dtype=np.float64)
+                   if current else None)
+    candidates = dirichlet_candidates(
+        n_candidates, len(names), total=10.0, seed=seed,
+        include=[current_vec] if current_vec is not None else ())
+    if current_vec is not None and current_vec.sum() > 0:
+        current_vec = current_vec / current_vec.sum() * 10.0
+    search = WeightSearch(score_features(data, periods), forward, eligible, top_n,
+                          processes, seed=seed)
+    return search.run(candidates, names, current_vec)
+
+
+def optimize_composite_weights(data, engine, n_candidates=4096, top_n=5, processes=2,
+                               seed=0, min_months=12):
+    """Composite ağırlıkları için rejim bazında arama: {rejim: SearchResult}.
+
+    Yalnızca o rejimdeki aylar kullanılır; min_months'tan az ayı olan rejim atlanır.
+    """
+    features = composite_features(data, engine)
+    forward, eligible = forward_returns(data)
+    regimes = np.array(data.regimes[:len(forward)])
+    names = list(engine.COMPONENTS)
+    results = {}
+    for regime in sorted(set(regimes.tolist())):
+        months = np.flatnonzero(regimes == regime)
+        if len(months) < min_months:
+            continue
+        current = np.array([engine.COMPOSITE_WEIGHTS[regime][c] for c in names])
+        candidates = dirichlet_candidates(n_candidates, len(names), seed=seed,
+                                          include=[current])
+        search = WeightSearch(features[months], forward[months], eligible[months],
+                              top_n, processes, seed=seed)
+        results[regime] = search.run(candidates, names, current)
+    return results